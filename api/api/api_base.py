@@ -2,14 +2,24 @@
 This file contains API base classes to be derived later
 """
 
-import json
+import copy
+import hashlib
+import itertools
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pprint import pformat
+from urllib.parse import urlsplit
 
 import requests
 from requests import Response
 
 from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+from python_pytest_selenium_web_api_test.api.api.response_cache import ResponseCache
+from python_pytest_selenium_web_api_test.api.api.json_decoder import JsonResponse, get_json_decoder, iter_json_array_items
+from python_pytest_selenium_web_api_test.api.api.request_timing import RequestTiming, TimedHTTPAdapter
+from python_pytest_selenium_web_api_test.api.api.schema import Schema, SchemaValidationError
+from python_pytest_selenium_web_api_test.api.api.streamed_body import BodyCheckError, StreamedBody
 
 
 log = Logger(__name__)
@@ -28,12 +38,66 @@ class ApiError(Exception):
         super().__init__(msg)
 
 
-class ApiBase:
+def split_base_url(base_url: str) -> tuple:
     """
-    Method for the derived classes
+    Args:
+        base_url (str): e.g. https://catfact.ninja or http://127.0.0.1:8080
+
+    Returns:
+        tuple, (protocol, host, port), e.g. ("https", "catfact.ninja", 443)
+    """
+    parsed = urlsplit(base_url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError(f"Base URL must be like https://host[:port], got: {base_url}")
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    return parsed.scheme, parsed.hostname, port
+
+
+class RequestResult:
+    """
+    Result of one request made within a batch, see ApiBase.make_requests
+    """
+
+    def __init__(self, index: int, spec: dict, response=None, error: Exception = None):
+        """
+        Args:
+            index (int): index of the request spec in the batch
+            spec (dict): the request spec, the keyword arguments for make_request
+            response: what make_request returned, None if it failed
+            error (Exception): the error the request failed with, None if it succeeded
+        """
+        self.index = index
+        self.spec = spec
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """
+        Returns:
+            bool, True if the request didn't fail
+        """
+        return self.error is None
+
+    def __repr__(self):
+        return f"RequestResult(index={self.index}, spec={self.spec}, ok={self.ok}, error={self.error!r})"
+
+
+class ApiClientBase:
+    """
+    Common parts of the sync and async API clients: URL, headers, request config and log lines
     """
     BEGIN_REQ = "========== BEGIN =========="
     END_REQ = "========== END =========="
+    # Number of per-host connection pools to cache and max number of kept-alive connections in each of them
+    DEFAULT_POOL_CONNECTIONS = 10
+    DEFAULT_POOL_MAXSIZE = 10
+    # Correlation ID header, it's unique for every request
+    REQUEST_ID_HEADER = "X-Request-Id"
+    # Max number of body bytes to log, the size and hash of the whole body are logged as well; None - log whole body
+    LOG_BODY_LIMIT = 2048
+    # Values of these headers are not logged
+    SENSITIVE_HEADERS = ("authorization", "proxy-authorization", "cookie", "set-cookie", "x-api-key")
 
     def __init__(self, protocol: str, host: str, port: int):
         """
@@ -42,12 +106,14 @@ class ApiBase:
             host (str): e.g. google.com
             port (dict): e.g. 443
         """
-        self._unique_request_id_increment = 0
+        self._request_id_prefix = f"{int(time.time()):x}{uuid.uuid4().hex[:8]}"
+        self._request_ids = itertools.count(1)
         self.protocol = protocol
         self.host = host
         self.port = port
-        self.headers = {"User-Agent": "python-automation-home-test",
-                        "Unique-RequestId": str(self._unique_request_id_increment) + "_" + hex(int(time.time()))}
+        self.headers = {"User-Agent": "python-automation-home-test"}
+        # Cassette to record requests to or replay them from, see cassette.py; None - real requests only
+        self.cassette = None
 
     def append_headers(self, new_headers: dict):
         """
@@ -56,25 +122,39 @@ class ApiBase:
         """
         self.headers.update(new_headers)
 
-    def make_request(self,
-                     method: str,
-                     uri: str,
-                     payload: dict = None,
-                     query_params: dict = None,
-                     headers: dict = None):
+    def get_url(self, uri: str) -> str:
         """
-        Getting the Response object.
-        Log lines are consolidated into single variable to support concurrent requests, if any are added.
+        Args:
+            uri (str): e.g. /v1/someApiRequest
+
+        Returns:
+            str, full URL
+        """
+        return f"{self.protocol}://{self.host}:{self.port}{uri}"
+
+    def next_request_id(self) -> str:
+        """
+        Returns:
+            str, correlation ID for the next request, e.g. 68f3a1c2d41b9e07-12
+        """
+        return f"{self._request_id_prefix}-{next(self._request_ids)}"
 
+    def _prepare_request(self,
+                         method: str,
+                         uri: str,
+                         payload: dict = None,
+                         query_params: dict = None,
+                         headers: dict = None) -> dict:
+        """
         Args:
             method (str): one of ("get", "post", "put", "delete")
             uri (str): e.g. /v1/someApiRequest
             payload (dict): payload
             query_params (dict): these params will be used in URL
-            headers (dict): headers to add to the default ones
+            headers (dict): headers to add to the default ones for this request only
 
         Returns:
-            Response
+            dict, the keyword arguments for the request
         """
         if not payload:
             payload = {}
@@ -82,18 +162,30 @@ class ApiBase:
             query_params = {}
         if not headers:
             headers = {}
-        client = requests.session()
-        url = f"{self.protocol}://{self.host}:{self.port}{uri}"
-        if headers:
-            self.headers.update(headers)
-        self._unique_request_id_increment += 1
+        url = self.get_url(uri)
+        request_headers = {**self.headers, **headers, self.REQUEST_ID_HEADER: self.next_request_id()}
         method = method.upper()
+        return self._get_request_config(method, url, payload, query_params, request_headers)
+
+    def _get_request_config(self, method: str, url: str, payload: dict, query_params: dict, headers: dict) -> dict:
+        """
+        Getting the config for the particular HTTP method
+
+        Args:
+            method (str): one of ("GET", "POST", "PUT", "DELETE")
+            url (str): full URL
+            payload (dict): payload
+            query_params (dict): these params will be used in URL
+            headers (dict): request headers
+
+        Returns:
+            dict, the keyword arguments for the request
+        """
         methods_config = {}
-        resp = Response()
         try:
             methods_config = {"GET": {"method": method,
                                       "url": url,
-                                      "headers": self.headers,
+                                      "headers": headers,
                                       "params": query_params,
                                       "data": {},
                                       "timeout": 30,
@@ -101,7 +193,7 @@ class ApiBase:
                                       },
                               "POST": {"method": method,
                                        "url": url,
-                                       "headers": self.headers,
+                                       "headers": headers,
                                        "params": query_params,
                                        "data": payload,
                                        "timeout": 30,
@@ -109,7 +201,7 @@ class ApiBase:
                                        },
                               "DELETE": {"method": method,
                                          "url": url,
-                                         "headers": self.headers,
+                                         "headers": headers,
                                          "params": query_params,
                                          "data": payload,
                                          "timeout": 30,
@@ -117,7 +209,7 @@ class ApiBase:
                                          },
                               "PUT": {"method": method,
                                       "url": url,
-                                      "headers": self.headers,
+                                      "headers": headers,
                                       "params": query_params,
                                       "data": payload,
                                       "timeout": 30,
@@ -126,53 +218,449 @@ class ApiBase:
                               }
         except Exception as ex:
             message = f"\n{self.BEGIN_REQ}"
-            message += f"\nURL: {url} \nMethod: {method} \nheaders: {pformat(self.headers)} " \
+            message += f"\nURL: {url} \nMethod: {method} \nheaders: {pformat(headers)} " \
                 f"\nparams: {query_params} \npayload: {payload}"
             message += f"\nError: {ex}"
             message += f"\n{self.END_REQ}"
             log.error(message)
             raise ApiError(message) from ex
-        if method in methods_config:
-            message = f"\n{self.BEGIN_REQ}"
-            message += f"\nRequest config: {methods_config[method]}"
-            try:
-                resp = client.request(**methods_config[method])
-                message += f"\nResponse URL: {resp.url}"
-                message += f"\nResponse text: {resp.text}"
-                message += f"\nResponse headers: {resp.headers}"
-                message += f"\nResponse status code: {resp.status_code}"
-                message += f"\n{self.END_REQ}"
-                log.debug(message)
-            except Exception as ex:
-                message += f"\nResponse URL: {resp.url}"
-                message += f"\nResponse text: {resp.text}"
-                message += f"\nResponse headers: {resp.headers}"
-                message += f"\nResponse status code: {resp.status_code}"
-                message += f"\n{self.END_REQ}"
-                log.error(message)
-                raise ApiError(message) from ex
-            client.close()
-        else:
+        if method not in methods_config:
             raise ApiError(f"HTTP method is not implemented: {method}\n")
+        return methods_config[method]
+
+    def _replay(self, request_config: dict):
+        """
+        Args:
+            request_config (dict): the keyword arguments of the request
+
+        Returns:
+            Response from the cassette in replay mode, None if the request needs to be made
+        """
+        if self.cassette is None or self.cassette.mode != "replay":
+            return None
+        return self.cassette.replay(request_config)
+
+    def _record(self, request_config: dict, resp: Response):
+        """
+        Saving the request/response pair to the cassette in record mode
+
+        Args:
+            request_config (dict): the keyword arguments the request was made with
+            resp (Response): received response; streamed responses (download, make_streaming_request) are not
+                             recorded, reading their body here would load it into memory before it's spooled
+        """
+        if self.cassette is None or self.cassette.mode != "record":
+            return
+        if request_config.get("stream"):
+            log.debug(f"Streamed response is not recorded to the cassette: {resp.url}")
+            return
+        self.cassette.record(request_config, resp)
+
+    def _redact_headers(self, headers) -> dict:
+        """
+        Args:
+            headers (dict): request or response headers
+
+        Returns:
+            dict, copy of the headers with values of SENSITIVE_HEADERS replaced
+        """
+        return {key: "***" if key.lower() in self.SENSITIVE_HEADERS else value for key, value in (headers or {}).items()}
+
+    def _get_body_for_log(self, content: bytes) -> str:
+        """
+        Args:
+            content (bytes): response body
+
+        Returns:
+            str, the body truncated to LOG_BODY_LIMIT bytes with its size and sha256 if it's truncated
+        """
+        content = content or b""
+        if self.LOG_BODY_LIMIT is None or len(content) <= self.LOG_BODY_LIMIT:
+            return content.decode("utf-8", errors="replace")
+        head = content[:self.LOG_BODY_LIMIT].decode("utf-8", errors="replace")
+        return f"{head}... [truncated, size: {len(content)} bytes, sha256: {hashlib.sha256(content).hexdigest()}]"
+
+    def _get_response_log_message(self, request_config: dict, resp: Response) -> str:
+        """
+        Log lines are consolidated into single message to support concurrent requests.
+        The body is truncated and sensitive headers are redacted, see LOG_BODY_LIMIT and SENSITIVE_HEADERS.
+
+        Args:
+            request_config (dict): the keyword arguments the request was made with
+            resp (Response): received response
+
+        Returns:
+            str
+        """
+        request_headers = request_config.get("headers") or {}
+        logged_config = {**request_config, "headers": self._redact_headers(request_headers)}
+        message = f"\n{self.BEGIN_REQ}"
+        message += f"\nRequest ID: {request_headers.get(self.REQUEST_ID_HEADER)}"
+        message += f"\nRequest config: {logged_config}"
+        message += f"\nResponse URL: {resp.url}"
+        if request_config.get("stream"):
+            message += "\nResponse text: <streamed, not read yet>"
+        else:
+            message += f"\nResponse text: {self._get_body_for_log(resp.content)}"
+        message += f"\nResponse headers: {self._redact_headers(resp.headers)}"
+        message += f"\nResponse status code: {resp.status_code}"
+        message += f"\n{self.END_REQ}"
+        return message
+
+
+class ApiBase(ApiClientBase):
+    """
+    Method for the derived classes
+    """
+
+    def __init__(self,
+                 protocol: str,
+                 host: str,
+                 port: int,
+                 pool_maxsize: int = ApiClientBase.DEFAULT_POOL_MAXSIZE,
+                 pool_connections: int = ApiClientBase.DEFAULT_POOL_CONNECTIONS):
+        """
+        Args:
+            protocol (str): http or https
+            host (str): e.g. google.com
+            port (dict): e.g. 443
+            pool_maxsize (int): max number of kept-alive connections per host
+            pool_connections (int): number of per-host connection pools to keep
+        """
+        super().__init__(protocol, host, port)
+        self.pool_maxsize = pool_maxsize
+        # counters of the pools that were already closed, they're not kept by the session adapters anymore
+        self._closed_pools_stats = {"requests": 0, "new_connections": 0}
+        self.session = self._create_session(pool_connections, pool_maxsize)
+        # Collector of the request timings, see request_timing.py; None - timings are only attached to responses
+        self.timing_recorder = None
+        # Retries of the failed requests, see retry.py; None - requests are made once
+        self.retry_handler = None
+        # Client-side rate limiter, see rate_limiter.py; None - requests are not throttled
+        self.rate_limiter = None
+
+    def _create_session(self, pool_connections: int, pool_maxsize: int) -> requests.Session:
+        """
+        Creating the session that keeps connections alive and reuses them between requests;
+        new connections report their DNS/connect/TLS timings
+
+        Args:
+            pool_connections (int): number of per-host connection pools to keep
+            pool_maxsize (int): max number of kept-alive connections per host
+
+        Returns:
+            requests.Session
+        """
+        session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _connection_pools(self) -> list:
+        """
+        Returns:
+            list, urllib3 connection pools that are currently kept by the session adapters
+        """
+        pools = []
+        for adapter in set(self.session.adapters.values()):
+            pool_container = adapter.poolmanager.pools
+            pools.extend(pool_container[key] for key in pool_container.keys())
+        return pools
+
+    def connection_stats(self) -> dict:
+        """
+        Connection reuse counters; a request that did not open a new connection reused a kept-alive one
+
+        Returns:
+            dict, e.g. {"requests": 10, "new_connections": 1, "reused_connections": 9}
+        """
+        requests_count = self._closed_pools_stats["requests"]
+        connections_count = self._closed_pools_stats["new_connections"]
+        for pool in self._connection_pools():
+            requests_count += pool.num_requests
+            connections_count += pool.num_connections
+        return {"requests": requests_count,
+                "new_connections": connections_count,
+                "reused_connections": max(0, requests_count - connections_count)}
+
+    def close(self):
+        """
+        Closing all the kept-alive connections; the instance still can be used after that, new connections will be opened
+        """
+        stats = self.connection_stats()
+        self._closed_pools_stats = {"requests": stats["requests"], "new_connections": stats["new_connections"]}
+        self.session.close()
+        log.info(f"Connection pool for {self.protocol}://{self.host}:{self.port} is closed; stats: {stats}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def make_request(self,
+                     method: str,
+                     uri: str,
+                     payload: dict = None,
+                     query_params: dict = None,
+                     headers: dict = None):
+        """
+        Getting the Response object.
+        Log lines are consolidated into single variable to support concurrent requests, if any are added.
+
+        Args:
+            method (str): one of ("get", "post", "put", "delete")
+            uri (str): e.g. /v1/someApiRequest
+            payload (dict): payload
+            query_params (dict): these params will be used in URL
+            headers (dict): headers to add to the default ones
+
+        Returns:
+            Response
+        """
+        request_config = self._prepare_request(method, uri, payload, query_params, headers)
+        return self._send(request_config)
+
+    def make_streaming_request(self,
+                               method: str,
+                               uri: str,
+                               payload: dict = None,
+                               query_params: dict = None,
+                               headers: dict = None):
+        """
+        Getting the Response object without reading the body, so the body is not logged;
+        the caller reads it, e.g. with resp.iter_content(), and closes the response
+
+        Args:
+            method (str): one of ("get", "post", "put", "delete")
+            uri (str): e.g. /v1/someApiRequest
+            payload (dict): payload
+            query_params (dict): these params will be used in URL
+            headers (dict): headers to add to the default ones
+
+        Returns:
+            Response
+        """
+        request_config = self._prepare_request(method, uri, payload, query_params, headers)
+        request_config["stream"] = True
+        return self._send(request_config)
+
+    def download(self,
+                 method: str,
+                 uri: str,
+                 payload: dict = None,
+                 query_params: dict = None,
+                 headers: dict = None,
+                 chunk_size: int = StreamedBody.DEFAULT_CHUNK_SIZE,
+                 spool_size: int = StreamedBody.DEFAULT_SPOOL_SIZE,
+                 max_size: int = None,
+                 expected_sha256: str = None) -> StreamedBody:
+        """
+        Streaming download: the body is read in chunks and spooled to memory or a temporary file,
+        it's hashed and size-checked on the fly, so peak memory doesn't grow with the size of the response
+
+        Args:
+            method (str): one of ("get", "post", "put", "delete")
+            uri (str): e.g. /v1/someApiRequest
+            payload (dict): payload
+            query_params (dict): these params will be used in URL
+            headers (dict): headers to add to the default ones
+            chunk_size (int): number of bytes read at once
+            spool_size (int): max bytes kept in memory, 0 - always spool to a file
+            max_size (int): max body size, ApiError is raised as soon as it's exceeded; None - no limit
+            expected_sha256 (str): hex digest the body must have, None - not checked
+
+        Returns:
+            StreamedBody, the caller closes it (or uses it as a context manager)
+        """
+        resp = self.make_streaming_request(method, uri, payload, query_params, headers)
+        started = time.perf_counter()
+        try:
+            body = StreamedBody.from_response(resp, chunk_size, spool_size, max_size, expected_sha256)
+        except BodyCheckError as ex:
+            log.error(str(ex))
+            raise ApiError(str(ex)) from ex
+        timing = getattr(resp, "timing", None)
+        if timing is not None and timing.source == "network":
+            timing.download = time.perf_counter() - started
+            timing.total += timing.download
+        return body
+
+    def _send(self, request_config: dict) -> Response:
+        """
+        Args:
+            request_config (dict): the keyword arguments for the request
+
+        Returns:
+            Response, with the timing attribute, see RequestTiming
+        """
+        resp = self._replay(request_config)
+        if resp is not None:
+            resp.timing = RequestTiming(request_config, source="replay")
+            self._add_timing(resp.timing)
+            log.debug(lambda: self._get_response_log_message(request_config, resp), request_id=resp.timing.request_id)
+            return resp
+        if self.retry_handler is not None:
+            resp = self.retry_handler.send(request_config, self._send_once)
+        else:
+            resp = self._send_once(request_config)
+        # only the final attempt is recorded, so replay gives the same result as retries did
+        self._record(request_config, resp)
         return resp
 
+    def _send_once(self, request_config: dict) -> Response:
+        """
+        Making the request over the network once, after the rate limiter allows it
+
+        Args:
+            request_config (dict): the keyword arguments for the request
+
+        Returns:
+            Response, with the timing attribute, see RequestTiming
+        """
+        resp = Response()
+        timing = RequestTiming(request_config)
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(request_config["url"])
+            started = time.perf_counter()
+            with timing.measure_connection():
+                resp = self.session.request(**request_config)
+            if self.rate_limiter is not None:
+                self.rate_limiter.adapt(request_config["url"], resp)
+            timing.finish(resp, time.perf_counter() - started, is_streamed=request_config.get("stream", False))
+            resp.timing = timing
+            self._add_timing(timing)
+            log.debug(lambda: self._get_response_log_message(request_config, resp),
+                      request_id=timing.request_id, duration_ms=round(timing.total * 1000, 3))
+        except Exception as ex:
+            message = self._get_response_log_message(request_config, resp)
+            log.error(message, request_id=timing.request_id)
+            raise ApiError(message) from ex
+        return resp
+
+    def _add_timing(self, timing: RequestTiming):
+        """
+        Args:
+            timing (RequestTiming): timing of a finished request, it's passed to the recorder if there is one
+        """
+        if self.timing_recorder is not None:
+            self.timing_recorder.add(timing)
+
+    def _make_request_for_batch(self, index: int, spec: dict) -> RequestResult:
+        """
+        Args:
+            index (int): index of the request spec in the batch
+            spec (dict): the keyword arguments for make_request
+
+        Returns:
+            RequestResult, the error is stored in the result instead of being raised
+        """
+        try:
+            return RequestResult(index, spec, response=self.make_request(**spec))
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            return RequestResult(index, spec, error=ex)
+
+    def make_requests_as_completed(self, request_specs: list, max_workers: int = None):
+        """
+        Making a batch of requests on a bounded thread pool, results are yielded as the requests complete.
+        One failed request does not abort the batch, the error is stored in its result.
+
+        Args:
+            request_specs (list): list of dicts with the keyword arguments for make_request,
+                                  e.g. [{"method": "get", "uri": "/facts", "query_params": {"page": 1}}]
+            max_workers (int): thread pool size, defaults to the connection pool size, so every worker keeps
+                               its connection alive
+
+        Yields:
+            RequestResult
+        """
+        max_workers = max_workers or self.pool_maxsize
+        log.info(f"Making {len(request_specs)} requests in {max_workers} workers")
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-batch") as executor:
+            futures = [executor.submit(self._make_request_for_batch, index, spec)
+                       for index, spec in enumerate(request_specs)]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def make_requests(self, request_specs: list, max_workers: int = None) -> list:
+        """
+        Making a batch of requests on a bounded thread pool, see make_requests_as_completed
+
+        Args:
+            request_specs (list): list of dicts with the keyword arguments for make_request
+            max_workers (int): thread pool size, defaults to the connection pool size
+
+        Returns:
+            list, RequestResult objects in the order of request_specs
+        """
+        results = [None] * len(request_specs)
+        for result in self.make_requests_as_completed(request_specs, max_workers):
+            results[result.index] = result
+        failed = [result for result in results if not result.ok]
+        if failed:
+            log.warning(f"{len(failed)} of {len(results)} requests failed in the batch")
+        return results
+
+
+def validate_response(response_obj: JsonResponse, schema: Schema, raise_error_if_failed: bool):
+    """
+    Validation of the decoded body, shared by the sync and asyncio JSON clients
+
+    Args:
+        response_obj (JsonResponse): received response
+        schema (Schema): compiled schema of the body
+        raise_error_if_failed (bool): True - raise SchemaValidationError, otherwise log the violations
+    """
+    violations = schema.validate(response_obj.json())
+    if not violations:
+        return
+    error = SchemaValidationError(violations)
+    if raise_error_if_failed:
+        log.error(f"{response_obj.url} does not match {schema.name}: {error}")
+        raise error
+    log.warning(f"{response_obj.url} does not match {schema.name}: {error}")
+
 
 class ApiJsonRequest(ApiBase):
     """
     API methods for the service that returs data in JSON format
     """
 
-    def __init__(self, protocol: str, host: str, port: int):
+    def __init__(self,
+                 protocol: str,
+                 host: str,
+                 port: int,
+                 pool_maxsize: int = ApiBase.DEFAULT_POOL_MAXSIZE,
+                 pool_connections: int = ApiBase.DEFAULT_POOL_CONNECTIONS,
+                 response_cache: ResponseCache = None,
+                 json_decoder: str = None):
         """
         Args:
             protocol (str): http or https
             host (str): e.g. google.com
             port (dict): e.g. 443
+            pool_maxsize (int): max number of kept-alive connections per host
+            pool_connections (int): number of per-host connection pools to keep
+            response_cache (ResponseCache): cache for GET responses, None - responses are not cached;
+                                            the same cache can be shared by several instances
+            json_decoder (str): one of ("orjson", "simdjson", "json"), None - the fastest installed one
         """
-        super().__init__(protocol, host, port)
+        super().__init__(protocol, host, port, pool_maxsize, pool_connections)
         headers = {"Content-Type": "application/json",
                    "Accept": "application/json"}
         self.append_headers(headers)
+        self.response_cache = response_cache
+        self.json_decoder = get_json_decoder(json_decoder)
+
+    def close(self):
+        """
+        Closing all the kept-alive connections and logging the response cache stats
+        """
+        super().close()
+        if self.response_cache is not None:
+            log.info(f"Response cache stats: {self.response_cache.stats()}")
 
     def make_request(self,
                      method: str,
@@ -181,7 +669,9 @@ class ApiJsonRequest(ApiBase):
                      query_params: dict = None,
                      headers: dict = None,
                      is_return_resp_obj: bool = False,
-                     raise_error_if_failed: bool = None):
+                     raise_error_if_failed: bool = None,
+                     use_cache: bool = True,
+                     schema: Schema = None):
         """
         Args:
             method (str): one of ("get", "post", "put", "delete")
@@ -190,9 +680,13 @@ class ApiJsonRequest(ApiBase):
             query_params (dict): these params will be used in URL
             headers (dict): headers to add to the default ones
             raise_error_if_failed (bool): If a test should fail when response validation failed;
-                                          TODO: needs to be implemented
+                                          True - SchemaValidationError (AssertionError) is raised,
+                                          otherwise the violations are logged as a warning
             is_return_resp_obj (bool): True - returns the Response object, False - returns JSON;
-                                       Note: it's needed for API testing
+                                       Note: it's needed for API testing; the body is decoded once,
+                                       so Response.json() can be called many times
+            use_cache (bool): False - bypass the response cache for this request
+            schema (Schema): the whole decoded body is validated against it, see schema.py; None - no validation
 
         Returns:
             json, (list/dict)
@@ -203,13 +697,103 @@ class ApiJsonRequest(ApiBase):
             query_params = {}
         if not headers:
             headers = {}
-        response_obj = super().make_request(method, uri, payload, query_params, headers)
+        if self.response_cache is not None and use_cache and method.upper() == "GET":
+            response_obj = self._make_cached_request(uri, query_params, headers)
+        else:
+            response_obj = super().make_request(method, uri, payload, query_params, headers)
+        response_obj = JsonResponse.from_response(response_obj, self.json_decoder)
+        if schema is not None:
+            validate_response(response_obj, schema, raise_error_if_failed)
         if is_return_resp_obj:
             return response_obj
-        resp_text = response_obj.text
-        response_json = json.loads(resp_text)
-        # Response validation can be added here.
-        # Use raise_error_if_failed and raise AssertionError if validation failed and raise_error_if_failed is True
-        if raise_error_if_failed:
-            pass
-        return response_json
+        return response_obj.json()
+
+    def _make_cached_request(self, uri: str, query_params: dict, headers: dict) -> Response:
+        """
+        GET request through the response cache: a fresh entry is returned without a request,
+        an expired one is revalidated with If-None-Match/If-Modified-Since if the server sent ETag/Last-Modified.
+        Identical requests in flight are coalesced: one caller makes the request, the others get its cached response.
+
+        Args:
+            uri (str): e.g. /v1/someApiRequest
+            query_params (dict): these params will be used in URL
+            headers (dict): headers to add to the default ones
+
+        Returns:
+            Response
+        """
+        cache = self.response_cache
+        key = cache.make_key("GET", self.get_url(uri), query_params, {**self.headers, **headers})
+        cached_resp = self._get_fresh_cached_response(key, uri, headers, "hits")
+        if cached_resp is not None:
+            return cached_resp
+        with cache.single_flight(key) as is_leader:
+            # checking again: the identical request might be finished since the first check
+            cached_resp = self._get_fresh_cached_response(key, uri, headers, "hits" if is_leader else "coalesced")
+            if cached_resp is not None:
+                return cached_resp
+            entry = cache.get(key)
+            conditional_headers = entry.conditional_headers() if entry is not None else {}
+            resp = super().make_request("get", uri, {}, query_params, {**headers, **conditional_headers})
+            if conditional_headers and resp.status_code == 304:
+                cached_resp = cache.refresh(key, resp)
+                if cached_resp is not None:
+                    cache.count("revalidated")
+                    log.debug(f"Response cache revalidated: {key}")
+                    cached_resp.timing = resp.timing
+                    return cached_resp
+                resp = super().make_request("get", uri, {}, query_params, headers)
+            cache.count("misses")
+            log.debug(f"Response cache miss: {key}")
+            cache.put(key, resp)
+        return resp
+
+    def _get_fresh_cached_response(self, key: tuple, uri: str, headers: dict, event: str):
+        """
+        Args:
+            key (tuple): cache key
+            uri (str): e.g. /v1/someApiRequest
+            headers (dict): headers of the request
+            event (str): cache stats counter to increase if the entry is fresh, "hits" or "coalesced"
+
+        Returns:
+            Response, copy of the cached one; None if there's no fresh entry
+        """
+        entry = self.response_cache.get(key)
+        if entry is None or not entry.is_fresh():
+            return None
+        self.response_cache.count(event)
+        log.debug(f"Response cache {event}: {key}")
+        cached_resp = copy.copy(entry.response)
+        cached_resp.timing = RequestTiming({"method": "get", "url": self.get_url(uri), "headers": headers}, source="cache")
+        self._add_timing(cached_resp.timing)
+        return cached_resp
+
+    def iter_json_items(self,
+                        method: str,
+                        uri: str,
+                        key: str = "data",
+                        query_params: dict = None,
+                        headers: dict = None,
+                        chunk_size: int = 65536):
+        """
+        Streaming request for very large list payloads: items of the list are parsed incrementally while
+        the body is being downloaded, the whole document is never built
+
+        Args:
+            method (str): one of ("get", "post", "put", "delete")
+            uri (str): e.g. /v1/someApiRequest
+            key (str): top-level key of the list, e.g. "data" for {"data": [...], ...}
+            query_params (dict): these params will be used in URL
+            headers (dict): headers to add to the default ones
+            chunk_size (int): number of bytes read at once
+
+        Yields:
+            items of the list
+        """
+        resp = self.make_streaming_request(method, uri, {}, query_params, headers)
+        try:
+            resp.raise_for_status()
+            yield from iter_json_array_items(resp.iter_content(chunk_size), key)
+        finally:
+            resp.close()
@@ -0,0 +1,229 @@
+"""
+This file contains asyncio API base classes to be derived later
+"""
+# pylint: disable=duplicate-code
+
+import asyncio
+import time
+
+import aiohttp
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+from python_pytest_selenium_web_api_test.api.api.api_base import ApiClientBase, ApiError, validate_response
+from python_pytest_selenium_web_api_test.api.api.json_decoder import JsonResponse, get_json_decoder
+from python_pytest_selenium_web_api_test.api.api.schema import Schema
+
+
+log = Logger(__name__)
+
+
+class AsyncApiBase(ApiClientBase):
+    """
+    Asyncio version of ApiBase; all the requests share one connection pool and are limited by max_concurrency.
+    The requests are logged with the request ID and duration like in ApiBase, but retry_handler and rate_limiter
+    are sync-only (they sleep in the calling thread), they're not used by the asyncio client
+    """
+    DEFAULT_MAX_CONCURRENCY = 20
+
+    def __init__(self,
+                 protocol: str,
+                 host: str,
+                 port: int,
+                 pool_maxsize: int = ApiClientBase.DEFAULT_POOL_MAXSIZE,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        The aiohttp session is bound to the event loop, so it's created on the first request
+
+        Args:
+            protocol (str): http or https
+            host (str): e.g. google.com
+            port (dict): e.g. 443
+            pool_maxsize (int): max number of kept-alive connections per host
+            max_concurrency (int): max number of requests in flight
+        """
+        super().__init__(protocol, host, port)
+        self.pool_maxsize = pool_maxsize
+        self.max_concurrency = max_concurrency
+        self._session = None
+        self._semaphore = None
+        self._stats = {"requests": 0, "new_connections": 0, "reused_connections": 0}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns:
+            aiohttp.ClientSession, created in the running event loop if it's not created yet
+        """
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            trace_config.on_connection_create_end.append(self._on_connection_create_end)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.pool_maxsize)
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _on_request_start(self, *_):
+        self._stats["requests"] += 1
+
+    async def _on_connection_create_end(self, *_):
+        self._stats["new_connections"] += 1
+
+    async def _on_connection_reuseconn(self, *_):
+        self._stats["reused_connections"] += 1
+
+    def connection_stats(self) -> dict:
+        """
+        Connection reuse counters
+
+        Returns:
+            dict, e.g. {"requests": 10, "new_connections": 1, "reused_connections": 9}
+        """
+        return dict(self._stats)
+
+    async def close(self):
+        """
+        Closing all the kept-alive connections; a new session is created if the instance is used after that
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        log.info(f"Connection pool for {self.protocol}://{self.host}:{self.port} is closed; "
+                 f"stats: {self.connection_stats()}")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def make_request(self,
+                           method: str,
+                           uri: str,
+                           payload: dict = None,
+                           query_params: dict = None,
+                           headers: dict = None) -> Response:
+        """
+        Getting the Response object; the body is read completely, so the response does not hold the connection.
+
+        Args:
+            method (str): one of ("get", "post", "put", "delete")
+            uri (str): e.g. /v1/someApiRequest
+            payload (dict): payload
+            query_params (dict): these params will be used in URL
+            headers (dict): headers to add to the default ones
+
+        Returns:
+            Response
+        """
+        request_config = self._prepare_request(method, uri, payload, query_params, headers)
+        request_id = request_config["headers"].get(self.REQUEST_ID_HEADER)
+        resp = self._replay(request_config)
+        if resp is not None:
+            log.debug(lambda: self._get_response_log_message(request_config, resp), request_id=request_id)
+            return resp
+        resp = Response()
+        started = time.perf_counter()
+        try:
+            session = self._get_session()
+            async with self._semaphore:
+                resp = await self._send(session, request_config)
+            self._record(request_config, resp)
+            log.debug(lambda: self._get_response_log_message(request_config, resp),
+                      request_id=request_id, duration_ms=round((time.perf_counter() - started) * 1000, 3))
+        except Exception as ex:
+            message = self._get_response_log_message(request_config, resp)
+            log.error(message, request_id=request_id, duration_ms=round((time.perf_counter() - started) * 1000, 3))
+            raise ApiError(message) from ex
+        return resp
+
+    async def _send(self, session: aiohttp.ClientSession, request_config: dict) -> Response:
+        """
+        Making the request and converting the result to the requests' Response, so it's the same as in the sync client
+
+        Args:
+            session (aiohttp.ClientSession): session to make request with
+            request_config (dict): the keyword arguments the request was made with
+
+        Returns:
+            Response
+        """
+        async with session.request(request_config["method"],
+                                   request_config["url"],
+                                   headers=request_config["headers"],
+                                   params={key: str(value) for key, value in request_config["params"].items()},
+                                   data=request_config["data"] or None,
+                                   timeout=aiohttp.ClientTimeout(total=request_config["timeout"]),
+                                   ssl=None if request_config["verify"] else False) as aio_resp:
+            content = await aio_resp.read()
+        resp = Response()
+        resp.status_code = aio_resp.status
+        resp.reason = aio_resp.reason
+        resp.url = str(aio_resp.url)
+        resp.headers = CaseInsensitiveDict(aio_resp.headers)
+        resp.encoding = aio_resp.charset
+        resp._content = content  # pylint: disable=protected-access
+        return resp
+
+
+class AsyncApiJsonRequest(AsyncApiBase):
+    """
+    Asyncio API methods for the service that returs data in JSON format
+    """
+
+    def __init__(self,
+                 protocol: str,
+                 host: str,
+                 port: int,
+                 pool_maxsize: int = ApiClientBase.DEFAULT_POOL_MAXSIZE,
+                 max_concurrency: int = AsyncApiBase.DEFAULT_MAX_CONCURRENCY,
+                 json_decoder: str = None):
+        """
+        Args:
+            protocol (str): http or https
+            host (str): e.g. google.com
+            port (dict): e.g. 443
+            pool_maxsize (int): max number of kept-alive connections per host
+            max_concurrency (int): max number of requests in flight
+            json_decoder (str): one of ("orjson", "simdjson", "json"), None - the fastest installed one
+        """
+        super().__init__(protocol, host, port, pool_maxsize, max_concurrency)
+        headers = {"Content-Type": "application/json",
+                   "Accept": "application/json"}
+        self.append_headers(headers)
+        self.json_decoder = get_json_decoder(json_decoder)
+
+    async def make_request(self,
+                           method: str,
+                           uri: str,
+                           payload: dict = None,
+                           query_params: dict = None,
+                           headers: dict = None,
+                           is_return_resp_obj: bool = False,
+                           raise_error_if_failed: bool = None,
+                           schema: Schema = None):
+        """
+        Args:
+            method (str): one of ("get", "post", "put", "delete")
+            uri (str): e.g. /v1/someApiRequest
+            payload (dict): payload
+            query_params (dict): these params will be used in URL
+            headers (dict): headers to add to the default ones
+            raise_error_if_failed (bool): If a test should fail when response validation failed;
+                                          True - SchemaValidationError (AssertionError) is raised,
+                                          otherwise the violations are logged as a warning
+            is_return_resp_obj (bool): True - returns the Response object, False - returns JSON;
+                                       Note: it's needed for API testing
+            schema (Schema): the whole decoded body is validated against it, see schema.py; None - no validation
+
+        Returns:
+            json, (list/dict)
+        """
+        response_obj = JsonResponse.from_response(await super().make_request(method, uri, payload, query_params, headers),
+                                                  self.json_decoder)
+        if schema is not None:
+            validate_response(response_obj, schema, raise_error_if_failed)
+        if is_return_resp_obj:
+            return response_obj
+        return response_obj.json()
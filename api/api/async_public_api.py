@@ -0,0 +1,67 @@
+"""
+Asyncio API methods
+"""
+# pylint: disable=duplicate-code
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+from python_pytest_selenium_web_api_test.api.api.api_base import split_base_url
+from python_pytest_selenium_web_api_test.api.api.async_api_base import AsyncApiBase, AsyncApiJsonRequest
+from python_pytest_selenium_web_api_test.api.api.cassette import Cassette
+
+
+log = Logger(__name__)
+
+
+class AsyncPublicApi(AsyncApiJsonRequest):
+    """
+    Asyncio API methods, the same as in PublicApi
+    """
+    DEFAULT_BASE_URL = "https://catfact.ninja"
+
+    def __init__(self,
+                 base_url: str = DEFAULT_BASE_URL,
+                 pool_maxsize: int = AsyncApiBase.DEFAULT_POOL_MAXSIZE,
+                 max_concurrency: int = AsyncApiBase.DEFAULT_MAX_CONCURRENCY,
+                 json_decoder: str = None,
+                 cassette: Cassette = None):
+        """
+        Args:
+            base_url (str): e.g. https://catfact.ninja or a local stand-in server, see stand_in_server.py
+            pool_maxsize (int): max number of kept-alive connections to the host
+            max_concurrency (int): max number of requests in flight
+            json_decoder (str): one of ("orjson", "simdjson", "json"), None - the fastest installed one
+            cassette (Cassette): cassette to record requests to or replay them from, None - real requests only
+        """
+        super().__init__(*split_base_url(base_url),
+                         pool_maxsize=pool_maxsize, max_concurrency=max_concurrency, json_decoder=json_decoder)
+        self.cassette = cassette
+
+    async def get_facts(self, page=None, limit=None):
+        """
+        /facts
+
+        Returns:
+            dict
+        """
+        query_params = {}
+        if page is not None:
+            query_params["page"] = page
+        if limit is not None:
+            query_params["limit"] = limit
+        resp = await self.make_request("get", "/facts", {}, query_params, {})
+        return resp
+
+    async def get_breeds(self, page=None, limit=None):
+        """
+        /breeds
+
+        Returns:
+            dict
+        """
+        query_params = {}
+        if page is not None:
+            query_params["page"] = page
+        if limit is not None:
+            query_params["limit"] = limit
+        resp = await self.make_request("get", "/breeds", {}, query_params, {})
+        return resp
@@ -0,0 +1,191 @@
+"""
+Record/replay of API requests, so API suites can run offline
+
+Cassette file layout:
+    MAGIC (8 bytes) | index offset (8 bytes, big-endian) | zlib-compressed bodies | index (JSON)
+The index keeps the request key, status, headers and the body position of every recorded response,
+so in replay mode only the index is parsed and the bodies are read from the memory-mapped file on demand.
+"""
+
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from urllib.parse import urlencode
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+from python_pytest_selenium_web_api_test.api.api.api_base import ApiError
+
+
+log = Logger(__name__)
+
+
+class CassetteError(ApiError):
+    """
+    Class for raising cassette errors, e.g. unrecorded request in strict replay mode
+    """
+
+
+class Cassette:  # pylint: disable=too-many-instance-attributes
+    """
+    Recorded request/response pairs; one instance can be shared by several API instances
+    """
+    MAGIC = b"APICAS01"
+    HEADER = struct.Struct(">8sQ")
+    MODES = ("record", "replay")
+
+    def __init__(self,
+                 path: str,
+                 mode: str,
+                 match_headers: tuple = (),
+                 ignore_params: tuple = (),
+                 strict: bool = True):
+        """
+        Args:
+            path (str): cassette file path
+            mode (str): "record" - make real requests and save them, "replay" - serve saved responses without sockets
+            match_headers (tuple): request headers that are a part of the key, e.g. ("Accept",)
+            ignore_params (tuple): query params that are not a part of the key, e.g. ("timestamp",)
+            strict (bool): in replay mode, True - raise CassetteError for unrecorded requests,
+                           False - make a real request for them
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', use one of {self.MODES}")
+        self.path = path
+        self.mode = mode
+        self.match_headers = tuple(header.lower() for header in match_headers)
+        self.ignore_params = tuple(ignore_params)
+        self.strict = strict
+        self._lock = threading.Lock()
+        # key -> list of index entries; replayed in the recorded order, the last one is repeated
+        self._entries = {}
+        self._replay_counters = {}
+        self._file = None
+        self._mmap = None
+        if mode == "record":
+            self._open_for_record()
+        else:
+            self._open_for_replay()
+
+    def make_key(self, request_config: dict) -> str:
+        """
+        Args:
+            request_config (dict): the keyword arguments of the request, see ApiClientBase._get_request_config
+
+        Returns:
+            str, e.g. GET https://catfact.ninja:443/facts?limit=5&page=1 accept=application/json
+        """
+        params = sorted((str(key), str(value)) for key, value in (request_config.get("params") or {}).items()
+                        if key not in self.ignore_params)
+        headers = sorted((key.lower(), str(value)) for key, value in (request_config.get("headers") or {}).items()
+                         if key.lower() in self.match_headers)
+        key = f"{request_config['method'].upper()} {request_config['url']}"
+        if params:
+            key += f"?{urlencode(params)}"
+        if headers:
+            key += " " + " ".join(f"{name}={value}" for name, value in headers)
+        return key
+
+    def _open_for_record(self):
+        """
+        Creating the file; bodies are appended as they're recorded, the index is written on close
+        """
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, "wb")  # pylint: disable=consider-using-with
+        self._file.write(self.HEADER.pack(self.MAGIC, 0))
+        log.info(f"Recording API cassette: {self.path}")
+
+    def _open_for_replay(self):
+        """
+        Memory-mapping the file and loading the index
+        """
+        if not os.path.exists(self.path):
+            raise CassetteError(f"Cassette is not found: {self.path}")
+        self._file = open(self.path, "rb")  # pylint: disable=consider-using-with
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset = self.HEADER.unpack_from(self._mmap, 0)
+        if magic != self.MAGIC or not index_offset:
+            raise CassetteError(f"Cassette is corrupted or was not closed after recording: {self.path}")
+        for entry in json.loads(self._mmap[index_offset:]):
+            self._entries.setdefault(entry["key"], []).append(entry)
+        log.info(f"Replaying API cassette: {self.path}; {len(self._entries)} recorded requests")
+
+    def record(self, request_config: dict, resp: Response):
+        """
+        Args:
+            request_config (dict): the keyword arguments the request was made with
+            resp (Response): received response, its body is read
+        """
+        key = self.make_key(request_config)
+        body = zlib.compress(resp.content or b"")
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(body)
+            self._entries.setdefault(key, []).append({"key": key,
+                                                      "status": resp.status_code,
+                                                      "reason": resp.reason,
+                                                      "url": resp.url,
+                                                      "headers": dict(resp.headers),
+                                                      "offset": offset,
+                                                      "length": len(body)})
+
+    def replay(self, request_config: dict):
+        """
+        Args:
+            request_config (dict): the keyword arguments of the request
+
+        Returns:
+            Response, None if the request is not recorded and the cassette is not strict
+        """
+        key = self.make_key(request_config)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                if self.strict:
+                    raise CassetteError(f"Request is not recorded in the cassette {self.path}: {key}")
+                log.warning(f"Request is not recorded in the cassette, making real request: {key}")
+                return None
+            counter = self._replay_counters.get(key, 0)
+            self._replay_counters[key] = counter + 1
+            entry = entries[min(counter, len(entries) - 1)]
+            body = zlib.decompress(self._mmap[entry["offset"]:entry["offset"] + entry["length"]])
+        resp = Response()
+        resp.status_code = entry["status"]
+        resp.reason = entry["reason"]
+        resp.url = entry["url"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = body  # pylint: disable=protected-access
+        # the body is already read, so iter_content() of streaming requests (download, iter_json_items) slices it
+        # and close() doesn't need a connection
+        resp._content_consumed = True  # pylint: disable=protected-access
+        resp.raw = io.BytesIO(body)
+        return resp
+
+    def close(self):
+        """
+        Writing the index in record mode and closing the file
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            if self.mode == "record":
+                index_offset = self._file.tell()
+                index = [entry for entries in self._entries.values() for entry in entries]
+                self._file.write(json.dumps(index, separators=(",", ":")).encode())
+                self._file.seek(0)
+                self._file.write(self.HEADER.pack(self.MAGIC, index_offset))
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._file.close()
+            self._file = None
+        log.info(f"API cassette is closed: {self.path}; {len(self._entries)} requests")
@@ -0,0 +1,261 @@
+"""
+Pluggable JSON decoders working on raw bytes, a response that decodes its body once and
+an incremental parser of big JSON lists
+"""
+
+import codecs
+import json
+import time
+
+from requests import Response
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+def _get_orjson_loads():
+    """
+    Returns:
+        callable, orjson.loads; ImportError if orjson is not installed
+    """
+    import orjson  # pylint: disable=import-outside-toplevel
+    return orjson.loads  # pylint: disable=no-member
+
+
+def _get_simdjson_loads():
+    """
+    Returns:
+        callable, simdjson.loads; ImportError if pysimdjson is not installed
+    """
+    import simdjson  # pylint: disable=import-outside-toplevel,import-error
+    return simdjson.loads
+
+
+def _get_json_loads():
+    """
+    Returns:
+        callable, json.loads, it's always available and detects UTF-8/16/32 in bytes itself
+    """
+    return json.loads
+
+
+# Decoders in the order of preference, every value returns a callable that decodes bytes
+JSON_DECODERS = {"orjson": _get_orjson_loads, "simdjson": _get_simdjson_loads, "json": _get_json_loads}
+
+
+def get_json_decoder(name: str = None):
+    """
+    Args:
+        name (str): one of JSON_DECODERS keys; None or "auto" - the fastest installed one
+
+    Returns:
+        callable, decoder that takes bytes, e.g. orjson.loads
+    """
+    if name not in (None, "auto"):
+        if name not in JSON_DECODERS:
+            raise ValueError(f"Unknown JSON decoder '{name}', use one of {list(JSON_DECODERS)}")
+        return JSON_DECODERS[name]()
+    for decoder_name, get_decoder in JSON_DECODERS.items():
+        try:
+            decoder = get_decoder()
+            log.debug(f"JSON decoder: {decoder_name}")
+            return decoder
+        except ImportError:
+            continue
+    return json.loads
+
+
+class JsonResponse(Response):
+    """
+    Response that decodes its body from bytes once, the result is cached for the next json() calls;
+    the decode time is added to the request timing if the response has one, see request_timing.py
+    """
+    __attrs__ = Response.__attrs__ + ["json_decoder"]
+
+    def __init__(self):
+        super().__init__()
+        self.json_decoder = json.loads
+        self._json = None
+        self._is_json_decoded = False
+
+    @classmethod
+    def from_response(cls, resp: Response, json_decoder):
+        """
+        Args:
+            resp (Response): received response, its body must be already read
+            json_decoder (callable): decoder for json() that takes bytes, see get_json_decoder
+
+        Returns:
+            JsonResponse, with the same state as resp
+        """
+        json_resp = cls()
+        json_resp.__dict__.update(resp.__dict__)
+        json_resp.json_decoder = json_decoder
+        return json_resp
+
+    def json(self, **kwargs):
+        """
+        Args:
+            kwargs: json.loads keyword arguments; if any is passed, the body is decoded by requests without caching
+
+        Returns:
+            list/dict, decoded body
+        """
+        if kwargs:
+            return super().json(**kwargs)
+        if not getattr(self, "_is_json_decoded", False):
+            content = self.content
+            started = time.perf_counter()
+            self._json = self.json_decoder(content)
+            self._is_json_decoded = True
+            timing = getattr(self, "timing", None)
+            if timing is not None:
+                timing.json_decode = time.perf_counter() - started
+        return self._json
+
+
+def iter_json_array_items(chunks, key: str = "data"):
+    """
+    Incremental parser of a big JSON document: items of the list are decoded and yielded one by one,
+    so the whole document is never built; chunks are read only as far as needed.
+    The list is either the document itself or the value of the top-level key, e.g. {"data": [...], ...}.
+
+    Args:
+        chunks (iterable): bytes chunks of the document, e.g. resp.iter_content(65536)
+        key (str): top-level key of the list; ignored if the document is a list
+
+    Yields:
+        items of the list
+    """
+    parser = _JsonArrayParser(chunks)
+    parser.skip_whitespace()
+    if parser.peek() == "[":
+        yield from parser.iter_array()
+        return
+    parser.expect("{")
+    while True:
+        parser.skip_whitespace()
+        if parser.peek() == "}":
+            raise ValueError(f"Key '{key}' is not found in the JSON document")
+        found_key = parser.decode_value()
+        parser.skip_whitespace()
+        parser.expect(":")
+        parser.skip_whitespace()
+        if found_key == key:
+            yield from parser.iter_array()
+            return
+        parser.decode_value()
+        parser.skip_whitespace()
+        if parser.peek() == ",":
+            parser.expect(",")
+
+
+class _JsonArrayParser:
+    """
+    Buffer over the chunks for iter_json_array_items; the consumed part of the buffer is dropped
+    """
+    WHITESPACE = " \t\n\r"
+    DELIMITERS = ",:]}" + WHITESPACE
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._is_exhausted = False
+
+    def _read_more(self, min_size: int = 1) -> bool:
+        """
+        Args:
+            min_size (int): min number of characters to add to the buffer, chunks are joined once
+
+        Returns:
+            bool, False if there's nothing more to read
+        """
+        if self._is_exhausted:
+            return False
+        # the consumed part is dropped only when it's the bigger half, so the buffer isn't copied on every chunk
+        if self._pos > len(self._buffer) // 2:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        parts, size = [], 0
+        for chunk in self._chunks:
+            if chunk:
+                parts.append(self._text_decoder.decode(chunk))
+                size += len(parts[-1])
+                if size >= min_size:
+                    break
+        else:
+            parts.append(self._text_decoder.decode(b"", final=True))
+            self._is_exhausted = True
+        added = "".join(parts)
+        self._buffer += added
+        return bool(added)
+
+    def peek(self) -> str:
+        """
+        Returns:
+            str, the next character, empty string if the document is over
+        """
+        while self._pos >= len(self._buffer):
+            if not self._read_more():
+                return ""
+        return self._buffer[self._pos]
+
+    def expect(self, char: str):
+        """
+        Args:
+            char (str): expected next character, it's consumed
+        """
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' in the JSON document, got '{self.peek()}'")
+        self._pos += 1
+
+    def skip_whitespace(self):
+        """
+        Skipping whitespace characters
+        """
+        while self.peek() and self.peek() in self.WHITESPACE:
+            self._pos += 1
+
+    def decode_value(self):
+        """
+        Decoding the next value; a value cut by the end of the buffer may look complete (e.g. 1.5 cut to 1),
+        so it's accepted only if it's followed by a delimiter or the document is over
+
+        Returns:
+            decoded value
+        """
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+                if self._is_exhausted or (end < len(self._buffer) and self._buffer[end] in self.DELIMITERS):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._is_exhausted:
+                    raise
+            # the pending part is at least doubled, so a big value is decoded O(log n) times, not once per chunk
+            self._read_more(len(self._buffer) - self._pos)
+
+    def iter_array(self):
+        """
+        Yields:
+            items of the array that starts at the current position
+        """
+        self.expect("[")
+        self.skip_whitespace()
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            self.skip_whitespace()
+            yield self.decode_value()
+            self.skip_whitespace()
+            if self.peek() == "]":
+                self._pos += 1
+                return
+            self.expect(",")
@@ -0,0 +1,319 @@
+"""
+Load generation on top of PublicApi with HDR-style latency histograms
+
+The runner drives a request function either at a target rate (open model: requests are started on schedule,
+latency is measured from the scheduled start, so a slow server is not hidden by the client waiting for it)
+or with a fixed number of concurrent workers (closed model) for a set duration.
+
+Run it from the command line:
+    python -m python_pytest_selenium_web_api_test.api.api.load_runner --base-url stand-in --rps 200 --duration 10
+or from tests with the 'load' marker and the run_load fixture, see api/conftest.py
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+class LatencyHistogram:
+    """
+    Log-linear buckets like in HdrHistogram: a value is kept with SUB_BUCKET_BITS bits of precision
+    (< 1% error for 7 bits), so memory does not depend on the number of recorded values
+    """
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+        self._counts = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _bucket(self, value_us: int) -> int:
+        """
+        Args:
+            value_us (int): value in microseconds
+
+        Returns:
+            int, the lowest value of the bucket the value belongs to
+        """
+        shift = max(0, value_us.bit_length() - self.SUB_BUCKET_BITS - 1)
+        return (value_us >> shift) << shift
+
+    def record(self, seconds: float):
+        """
+        Args:
+            seconds (float): latency
+        """
+        value_us = max(0, int(seconds * 1_000_000))
+        bucket = self._bucket(value_us)
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = max(self.max_us, value_us)
+
+    def merge(self, other):
+        """
+        Args:
+            other (LatencyHistogram): histogram to add to this one
+        """
+        for bucket, count in other._counts.items():  # pylint: disable=protected-access
+            self._counts[bucket] = self._counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Args:
+            percent (float): e.g. 99
+
+        Returns:
+            float, milliseconds; the highest value of the bucket, but not more than the recorded max
+        """
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= target:
+                width = 1 << max(0, bucket.bit_length() - self.SUB_BUCKET_BITS - 1)
+                return min(bucket + width - 1, self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict, milliseconds, e.g. {"min": 1.2, "mean": 3.4, "p50": 3.1, "p90": 5.0, "p99": 9.8, "max": 12.0}
+        """
+        return {"min": (self.min_us or 0) / 1000,
+                "mean": self.total_us / self.count / 1000 if self.count else 0.0,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99),
+                "max": self.max_us / 1000}
+
+
+class LoadRunner:
+    """
+    Drives request_func at a target rate or concurrency for a set duration
+    """
+
+    def __init__(self, request_func, duration: float, rps: float = None, concurrency: int = 10):
+        """
+        Args:
+            request_func (callable): makes one request, e.g. lambda: public_api.get_facts(page=1);
+                                     an exception or a returned response with status code >= 400 is an error
+            duration (float): seconds to run for
+            rps (float): target requests per second, None - as fast as concurrency allows (closed model)
+            concurrency (int): number of worker threads
+        """
+        self.request_func = request_func
+        self.duration = duration
+        self.rps = rps
+        self.concurrency = concurrency
+        self._histogram = LatencyHistogram()
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def _call(self, scheduled_at: float):
+        """
+        Args:
+            scheduled_at (float): time.perf_counter() value the request was supposed to start at
+        """
+        error = None
+        try:
+            result = self.request_func()
+            status_code = getattr(result, "status_code", None)
+            if status_code is not None and status_code >= 400:
+                error = f"HTTP {status_code}"
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            error = type(ex).__name__
+        latency = time.perf_counter() - scheduled_at
+        with self._lock:
+            self._histogram.record(latency)
+            if error:
+                self._errors[error] = self._errors.get(error, 0) + 1
+
+    def _run_open_model(self, deadline: float):
+        """
+        Starting requests on schedule, 1 / rps seconds apart
+        """
+        interval = 1 / self.rps
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="load") as executor:
+            scheduled_at = time.perf_counter()
+            while scheduled_at < deadline:
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._call, scheduled_at)
+                scheduled_at += interval
+
+    def _run_closed_model(self, deadline: float):
+        """
+        Every worker makes requests one after another
+        """
+        def worker():
+            while time.perf_counter() < deadline:
+                self._call(time.perf_counter())
+
+        threads = [threading.Thread(target=worker, name=f"load-{index}") for index in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run(self) -> dict:
+        """
+        Returns:
+            dict, summary, see summary()
+        """
+        log.info(f"Load run: duration {self.duration}s, rps {self.rps or 'max'}, concurrency {self.concurrency}")
+        started_at = time.perf_counter()
+        deadline = started_at + self.duration
+        if self.rps:
+            self._run_open_model(deadline)
+        else:
+            self._run_closed_model(deadline)
+        summary = self.summary(time.perf_counter() - started_at)
+        log.info(f"Load run summary: {summary}")
+        return summary
+
+    def summary(self, elapsed: float) -> dict:
+        """
+        Args:
+            elapsed (float): seconds the run took
+
+        Returns:
+            dict, e.g. {"requests": 1000, "error_count": 2, "errors": {"HTTP 503": 2}, "duration_s": 10.0,
+                        "throughput_rps": 100.0, "latency_ms": {"p50": ..., ...}, "target": {...}}
+        """
+        with self._lock:
+            requests_count = self._histogram.count
+            error_count = sum(self._errors.values())
+            return {"requests": requests_count,
+                    "error_count": error_count,
+                    "error_rate": error_count / requests_count if requests_count else 0.0,
+                    "errors": dict(self._errors),
+                    "duration_s": round(elapsed, 3),
+                    "throughput_rps": round(requests_count / elapsed, 2) if elapsed else 0.0,
+                    "latency_ms": self._histogram.summary(),
+                    "target": {"rps": self.rps, "concurrency": self.concurrency, "duration_s": self.duration}}
+
+
+def compare_with_baseline(summary: dict, baseline: dict, tolerance: float = 0.1) -> list:
+    """
+    Args:
+        summary (dict): current run summary
+        baseline (dict): saved run summary
+        tolerance (float): allowed relative degradation, e.g. 0.1 - 10%
+
+    Returns:
+        list, descriptions of the regressions, empty if there are none
+    """
+    regressions = []
+    for percentile in ("p50", "p90", "p99"):
+        current = summary["latency_ms"][percentile]
+        allowed = baseline["latency_ms"][percentile] * (1 + tolerance)
+        if current > allowed:
+            regressions.append(f"latency {percentile}: {current:.2f}ms > {allowed:.2f}ms")
+    allowed_throughput = baseline["throughput_rps"] * (1 - tolerance)
+    if summary["throughput_rps"] < allowed_throughput:
+        regressions.append(f"throughput: {summary['throughput_rps']:.2f}rps < {allowed_throughput:.2f}rps")
+    if summary["error_rate"] > baseline["error_rate"] + tolerance / 10:
+        regressions.append(f"error rate: {summary['error_rate']:.4f} > {baseline['error_rate']:.4f}")
+    return regressions
+
+
+def summary_to_html(summary: dict, regressions: list = None) -> str:
+    """
+    Args:
+        summary (dict): run summary
+        regressions (list): see compare_with_baseline
+
+    Returns:
+        str, HTML table for the pytest-html report
+    """
+    latency = summary["latency_ms"]
+    rows = [("Requests", summary["requests"]),
+            ("Throughput, rps", summary["throughput_rps"]),
+            ("Errors", f"{summary['error_count']} {summary['errors'] or ''}"),
+            ("Latency p50/p90/p99/max, ms", f"{latency['p50']:.2f} / {latency['p90']:.2f} / "
+                                            f"{latency['p99']:.2f} / {latency['max']:.2f}")]
+    if regressions is not None:
+        rows.append(("Baseline regressions", "; ".join(regressions) or "none"))
+    cells = "".join(f"<tr><td>{name}</td><td>{value}</td></tr>" for name, value in rows)
+    return f"<h4>Load summary</h4><table>{cells}</table>"
+
+
+def write_summary(summary: dict, path: str):
+    """
+    Args:
+        summary (dict): run summary
+        path (str): JSON file path
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    log.info(f"Load summary is saved: {path}")
+
+
+def main():
+    """
+    Running load against the Cat Facts API or the stand-in server from the command line
+    """
+    # pylint: disable=import-outside-toplevel
+    from python_pytest_selenium_web_api_test.api.api.public_api import PublicApi
+    from python_pytest_selenium_web_api_test.api.api.stand_in_server import CatFactsStandInServer
+
+    parser = argparse.ArgumentParser(description="Load generation on top of PublicApi")
+    parser.add_argument("--base-url", default=PublicApi.DEFAULT_BASE_URL,
+                        help="API base URL; stand-in - start the local stand-in server and use it")
+    parser.add_argument("--endpoint", choices=("facts", "breeds"), default="facts")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--rps", type=float, default=None, help="target requests per second, default - max")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", default="load-summary.json", help="JSON summary path")
+    parser.add_argument("--baseline", default=None, help="JSON summary of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative degradation")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url == "stand-in":
+        server = CatFactsStandInServer()
+        base_url = server.start()
+    public_api = PublicApi(base_url, pool_maxsize=args.concurrency)
+    request_func = public_api.get_facts if args.endpoint == "facts" else public_api.get_breeds
+    try:
+        summary = LoadRunner(request_func, args.duration, args.rps, args.concurrency).run()
+    finally:
+        public_api.close()
+        if server is not None:
+            server.stop()
+    write_summary(summary, args.output)
+    print(json.dumps(summary, indent=2))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare_with_baseline(summary, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
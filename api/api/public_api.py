@@ -2,8 +2,16 @@
 API methods
 """
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
-from python_pytest_selenium_web_api_test.api.api.api_base import ApiJsonRequest
+from python_pytest_selenium_web_api_test.api.api.api_base import ApiBase, ApiJsonRequest, split_base_url
+from python_pytest_selenium_web_api_test.api.api.response_cache import ResponseCache
+from python_pytest_selenium_web_api_test.api.api.cassette import Cassette
+from python_pytest_selenium_web_api_test.api.api.retry import RetryHandler
+from python_pytest_selenium_web_api_test.api.api.rate_limiter import RateLimiter
+from python_pytest_selenium_web_api_test.api.api.snapshot import Snapshot, diff_snapshots, find_snapshots, get_snapshot_path
 
 
 log = Logger(__name__)
@@ -13,9 +21,36 @@ class PublicApi(ApiJsonRequest):
     """
     API methods
     """
+    DEFAULT_BASE_URL = "https://catfact.ninja"
+    DEFAULT_PREFETCH = 4
+    # dataset name: field that identifies a record between runs
+    SNAPSHOT_KEYS = {"facts": "fact", "breeds": "breed"}
 
-    def __init__(self):
-        super().__init__("https", "catfact.ninja", "443")
+    def __init__(self,
+                 base_url: str = DEFAULT_BASE_URL,
+                 pool_maxsize: int = ApiBase.DEFAULT_POOL_MAXSIZE,
+                 response_cache: ResponseCache = None,
+                 json_decoder: str = None,
+                 cassette: Cassette = None,
+                 retry_handler: RetryHandler = None,
+                 rate_limiter: RateLimiter = None):
+        """
+        Args:
+            base_url (str): e.g. https://catfact.ninja or a local stand-in server, see stand_in_server.py
+            pool_maxsize (int): max number of kept-alive connections to the host
+            response_cache (ResponseCache): cache for GET responses, e.g. SharedResponseCache for several processes,
+                                            None - responses are not cached
+            json_decoder (str): one of ("orjson", "simdjson", "json"), None - the fastest installed one
+            cassette (Cassette): cassette to record requests to or replay them from, None - real requests only
+            retry_handler (RetryHandler): retries of the failed requests, None - requests are made once
+            rate_limiter (RateLimiter): client-side rate limiter, None - requests are not throttled;
+                                        share one instance between all the PublicApi instances
+        """
+        super().__init__(*split_base_url(base_url),
+                         pool_maxsize=pool_maxsize, response_cache=response_cache, json_decoder=json_decoder)
+        self.cassette = cassette
+        self.retry_handler = retry_handler
+        self.rate_limiter = rate_limiter
 
     def get_facts(self, page=None, limit=None):
         """
@@ -32,12 +67,126 @@ class PublicApi(ApiJsonRequest):
         resp = self.make_request("get", "/facts", {}, query_params, {})
         return resp
 
-    def get_breeds(self):
+    def get_breeds(self, page=None, limit=None):
         """
         /breeds
 
         Returns:
             dict
         """
-        resp = self.make_request("get", "/breeds", {}, {}, {})
+        query_params = {}
+        if page is not None:
+            query_params["page"] = page
+        if limit is not None:
+            query_params["limit"] = limit
+        resp = self.make_request("get", "/breeds", {}, query_params, {})
         return resp
+
+    def iter_facts(self, limit=None, prefetch: int = DEFAULT_PREFETCH):
+        """
+        Iterating over all the facts page by page, see _iter_pages
+
+        Args:
+            limit (int): page size
+            prefetch (int): number of pages fetched in background
+
+        Yields:
+            dict, fact
+        """
+        yield from self._iter_pages(self.get_facts, limit, prefetch)
+
+    def iter_breeds(self, limit=None, prefetch: int = DEFAULT_PREFETCH):
+        """
+        Iterating over all the breeds page by page, see _iter_pages
+
+        Args:
+            limit (int): page size
+            prefetch (int): number of pages fetched in background
+
+        Yields:
+            dict, breed
+        """
+        yield from self._iter_pages(self.get_breeds, limit, prefetch)
+
+    def _iter_pages(self, get_page, limit, prefetch: int):
+        """
+        The 1st page is fetched to get 'last_page', then up to prefetch next pages are being fetched in background
+        while items of the current one are yielded, so not more than prefetch + 1 pages are kept in memory.
+        Iteration stops on the last page, i.e. when 'next_page_url' is empty or 'last_page' is reached.
+
+        Args:
+            get_page (callable): method to get a page, e.g. self.get_facts
+            limit (int): page size
+            prefetch (int): number of pages fetched in background
+
+        Yields:
+            dict, item of the 'data' list
+        """
+        body = get_page(page=1, limit=limit)
+        yield from body.get("data", [])
+        if not body.get("next_page_url") or not body.get("data"):
+            return
+        last_page = body.get("last_page")
+        window = max(1, prefetch)
+        next_page = 2
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix="api-prefetch")
+
+        def fill_window():
+            nonlocal next_page
+            while len(pending) < window and (last_page is None or next_page <= last_page):
+                pending.append(executor.submit(get_page, page=next_page, limit=limit))
+                next_page += 1
+
+        try:
+            fill_window()
+            while pending:
+                body = pending.popleft().result()
+                is_last_page = not body.get("next_page_url") or not body.get("data")
+                if not is_last_page:
+                    # keeping the window full while items of the current page are consumed
+                    fill_window()
+                yield from body.get("data", [])
+                if is_last_page:
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def save_snapshot(self, name: str, folder: str, limit=None) -> str:
+        """
+        Saving all the items of the dataset as a compact snapshot, see snapshot.py;
+        items are added to the snapshot while the pages are being fetched
+
+        Args:
+            name (str): one of SNAPSHOT_KEYS, e.g. breeds
+            folder (str): e.g. the artifacts folder
+            limit (int): page size
+
+        Returns:
+            str, path of the snapshot file
+        """
+        iter_items = {"facts": self.iter_facts, "breeds": self.iter_breeds}[name]
+        snapshot = Snapshot(name, self.SNAPSHOT_KEYS[name]).extend(iter_items(limit=limit))
+        return snapshot.save(get_snapshot_path(folder, name))
+
+    def diff_with_previous_snapshot(self, name: str, folder: str, limit=None):
+        """
+        Saving a snapshot of the dataset and comparing it with the previous one in the folder
+
+        Args:
+            name (str): one of SNAPSHOT_KEYS, e.g. breeds
+            folder (str): e.g. the artifacts folder
+            limit (int): page size
+
+        Returns:
+            dict, see diff_snapshots; None if there's no previous snapshot
+        """
+        previous = find_snapshots(folder, name)
+        path = self.save_snapshot(name, folder, limit)
+        if not previous:
+            log.info(f"No previous {name} snapshot in {folder}, nothing to compare with")
+            return None
+        diff = diff_snapshots(Snapshot.load(previous[-1]), Snapshot.load(path))
+        log.info(f"{name} snapshot diff with {previous[-1]}: {diff['added']} added, {diff['removed']} removed, "
+                 f"{diff['changed']} changed, schema: {diff['schema']}")
+        return diff
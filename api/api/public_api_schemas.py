@@ -0,0 +1,45 @@
+"""
+Response schemas of the Cat Facts API, see schema.py; they're compiled once on import
+"""
+
+from python_pytest_selenium_web_api_test.api.api.schema import Schema
+
+
+FACT = {"type": "object",
+        "required": ["fact", "length"],
+        "properties": {"fact": {"type": "string", "minLength": 1},
+                       "length": {"type": "integer", "minimum": 1}}}
+
+BREED = {"type": "object",
+         "required": ["breed", "country", "origin", "coat", "pattern"],
+         "properties": {"breed": {"type": "string", "minLength": 1},
+                        "country": {"type": "string"},
+                        "origin": {"type": "string"},
+                        "coat": {"type": "string"},
+                        "pattern": {"type": "string"}}}
+
+
+def _page(item: dict) -> dict:
+    """
+    Args:
+        item (dict): schema of the items
+
+    Returns:
+        dict, schema of the paginated envelope with the items in 'data'
+    """
+    page_url = {"type": ["string", "null"]}
+    return {"type": "object",
+            "required": ["current_page", "data", "last_page", "per_page", "total"],
+            "properties": {"current_page": {"type": "integer", "minimum": 1},
+                           "data": {"type": "array", "items": item},
+                           "first_page_url": page_url,
+                           "next_page_url": page_url,
+                           "prev_page_url": page_url,
+                           "last_page": {"type": "integer", "minimum": 1},
+                           "per_page": {"type": "integer", "minimum": 1},
+                           "total": {"type": "integer", "minimum": 0}}}
+
+
+FACTS_PAGE_SCHEMA = Schema(_page(FACT), name="facts page")
+BREEDS_PAGE_SCHEMA = Schema(_page(BREED), name="breeds page")
+BREEDS_SCHEMA = Schema({"type": "array", "items": BREED}, name="breeds")
@@ -0,0 +1,249 @@
+"""
+Client-side token-bucket rate limiter per host; it keeps the request rate at the allowed ceiling instead of
+bursting into 429s and backing off. The bucket state can be shared by the pytest-xdist workers through a file,
+and it follows the X-RateLimit-*/RateLimit-* and Retry-After headers of the responses.
+"""
+
+import fcntl
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from requests import Response
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+from python_pytest_selenium_web_api_test.api.api.retry import RetryPolicy
+
+
+log = Logger(__name__)
+
+
+def _get_int_header(resp: Response, name: str):
+    """
+    Args:
+        resp (Response): received response
+        name (str): header name without the X- prefix, e.g. RateLimit-Remaining
+
+    Returns:
+        int, value of X-<name> or <name> header, None if there's no valid header
+    """
+    value = resp.headers.get(f"X-{name}", resp.headers.get(name))
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: tokens are added at rate per second up to capacity, every request takes one
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate (float): max requests per second
+            capacity (float): max burst, defaults to rate (but at least 1)
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._lock = threading.Lock()
+        # "rate" is the current rate, it's lowered when the server reports that the quota is running out
+        self._state = {"tokens": self.capacity, "updated_at": time.time(), "blocked_until": 0.0, "rate": rate}
+
+    @contextmanager
+    def _locked_state(self):
+        """
+        Yields:
+            dict, state that can be changed while the lock is held
+        """
+        with self._lock:
+            yield self._state
+
+    def _try_acquire(self) -> float:
+        """
+        Returns:
+            float, 0 if a token is taken, otherwise seconds to wait before the next try
+        """
+        with self._locked_state() as state:
+            now = time.time()
+            if now < state["blocked_until"]:
+                return state["blocked_until"] - now
+            state["tokens"] = min(self.capacity, state["tokens"] + max(0.0, now - state["updated_at"]) * state["rate"])
+            state["updated_at"] = now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / state["rate"]
+
+    def acquire(self) -> float:
+        """
+        Waiting for a token
+
+        Returns:
+            float, seconds waited
+        """
+        waited = 0.0
+        while True:
+            delay = self._try_acquire()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    def adapt(self, resp: Response):
+        """
+        Following the rate limit headers of the response: Retry-After on 429/503 and an exhausted quota block
+        the bucket until the reset, the remaining quota is spread evenly until the reset
+
+        Args:
+            resp (Response): received response
+        """
+        retry_after = RetryPolicy.get_retry_after(resp) if resp.status_code in (429, 503) else None
+        remaining = _get_int_header(resp, "RateLimit-Remaining")
+        reset = _get_int_header(resp, "RateLimit-Reset")
+        if reset is not None and reset > 10 ** 9:
+            # epoch seconds instead of seconds until the reset
+            reset = max(0, reset - int(time.time()))
+        if retry_after is None and remaining is None:
+            return
+        with self._locked_state() as state:
+            now = time.time()
+            if retry_after is not None:
+                state["blocked_until"] = max(state["blocked_until"], now + retry_after)
+                state["tokens"] = 0.0
+            if remaining is not None:
+                state["tokens"] = min(state["tokens"], float(remaining))
+                if reset:
+                    if remaining == 0:
+                        state["blocked_until"] = max(state["blocked_until"], now + reset)
+                    state["rate"] = min(self.rate, max(remaining, 1) / reset)
+                else:
+                    state["rate"] = self.rate
+            if state["blocked_until"] > now:
+                # tokens are not added while the bucket is blocked, so there's no burst right after it
+                state["updated_at"] = state["blocked_until"]
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state is kept in a file locked with flock, so it's shared by processes, e.g. pytest-xdist workers
+    """
+    STATE = struct.Struct(">dddd")
+
+    def __init__(self, path: str, rate: float, capacity: float = None):
+        """
+        Args:
+            path (str): state file path, the same for all the processes
+            rate (float): max requests per second
+            capacity (float): max burst, defaults to rate (but at least 1)
+        """
+        super().__init__(rate, capacity)
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @contextmanager
+    def _locked_state(self):
+        """
+        Yields:
+            dict, state loaded from the file; it's written back when the context is exited
+        """
+        with self._lock, open(self.path, "a+b") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                data = state_file.read(self.STATE.size)
+                state = dict(self._state)
+                if len(data) == self.STATE.size:
+                    state.update(zip(("tokens", "updated_at", "blocked_until", "rate"), self.STATE.unpack(data)))
+                yield state
+                state_file.truncate(0)
+                state_file.write(self.STATE.pack(state["tokens"], state["updated_at"], state["blocked_until"],
+                                                 state["rate"]))
+                state_file.flush()
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """
+    Token bucket per host; one instance can be shared by several API instances and threads
+    """
+
+    def __init__(self, rate: float = None, capacity: float = None, host_rates: dict = None, shared_dir: str = None):
+        """
+        Args:
+            rate (float): max requests per second to a host, None - only the hosts of host_rates are limited
+            capacity (float): max burst, defaults to rate (but at least 1)
+            host_rates (dict): max requests per second of particular hosts, e.g. {"catfact.ninja": 2}
+            shared_dir (str): folder of the bucket state files shared by processes, None - per-process buckets
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.host_rates = host_rates or {}
+        self.shared_dir = shared_dir
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "throttled": 0, "waited_s": 0.0, "rate_limited": 0}
+
+    def _get_bucket(self, url: str) -> TokenBucket:
+        """
+        Args:
+            url (str): request URL
+
+        Returns:
+            TokenBucket of the host, None if the host is not limited
+        """
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            if host not in self._buckets:
+                rate = self.host_rates.get(host, self.rate)
+                if not rate:
+                    self._buckets[host] = None
+                elif self.shared_dir:
+                    self._buckets[host] = SharedTokenBucket(os.path.join(self.shared_dir, f"{host}.bucket"),
+                                                            rate, self.capacity)
+                else:
+                    self._buckets[host] = TokenBucket(rate, self.capacity)
+            return self._buckets[host]
+
+    def acquire(self, url: str):
+        """
+        Waiting until a request to the host of the URL is allowed
+
+        Args:
+            url (str): request URL
+        """
+        bucket = self._get_bucket(url)
+        waited = bucket.acquire() if bucket is not None else 0.0
+        with self._lock:
+            self._stats["requests"] += 1
+            if waited:
+                self._stats["throttled"] += 1
+                self._stats["waited_s"] += waited
+
+    def adapt(self, url: str, resp: Response):
+        """
+        Args:
+            url (str): request URL
+            resp (Response): received response, see TokenBucket.adapt
+        """
+        if resp.status_code == 429:
+            with self._lock:
+                self._stats["rate_limited"] += 1
+            log.warning(f"Rate limited by {urlsplit(url).netloc}, Retry-After: {resp.headers.get('Retry-After')}")
+        bucket = self._get_bucket(url)
+        if bucket is not None:
+            bucket.adapt(resp)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict, e.g. {"requests": 100, "throttled": 20, "waited_s": 3.5, "rate_limited": 0}
+        """
+        with self._lock:
+            return {**self._stats, "waited_s": round(self._stats["waited_s"], 3)}
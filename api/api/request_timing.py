@@ -0,0 +1,269 @@
+"""
+Per-request timing breakdown: DNS resolution, TCP connect, TLS handshake, time to first byte, body download
+and JSON decode, so network regressions can be told apart from server regressions and client-side overhead
+
+The connection phases are measured by the urllib3 connection classes of TimedHTTPAdapter; they report to
+the timing of the request made in the same thread, see measure_connection().
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+_context = threading.local()
+
+
+class RequestTiming:  # pylint: disable=too-many-instance-attributes
+    """
+    Timing record of one request; phases are in seconds, None - the phase did not happen,
+    e.g. there's no DNS/connect/TLS for a reused kept-alive connection and no TLS for http
+    """
+    PHASES = ("dns", "connect", "tls", "ttfb", "download", "json_decode")
+
+    def __init__(self, request_config: dict, source: str = "network"):
+        """
+        Args:
+            request_config (dict): the keyword arguments of the request
+            source (str): "network", "replay" (from the cassette) or "cache" (from the response cache)
+        """
+        headers = request_config.get("headers") or {}
+        self.request_id = headers.get("X-Request-Id")
+        self.method = request_config.get("method", "").upper()
+        self.url = request_config.get("url")
+        self.source = source
+        self.status_code = None
+        self.dns = None
+        self.connect = None
+        self.tls = None
+        self.ttfb = None
+        self.download = None
+        self.json_decode = None
+        self.total = None
+
+    @property
+    def new_connection(self) -> bool:
+        """
+        Returns:
+            bool, True if a new connection was opened for the request
+        """
+        return self.connect is not None
+
+    @contextmanager
+    def measure_connection(self):
+        """
+        Connections opened by TimedHTTPAdapter in this thread report their phases to this timing
+        """
+        previous = getattr(_context, "timing", None)
+        _context.timing = self
+        try:
+            yield self
+        finally:
+            _context.timing = previous
+
+    def finish(self, resp, total: float, is_streamed: bool = False):
+        """
+        Args:
+            resp (Response): received response; resp.elapsed is the time until the headers are parsed
+            total (float): seconds the whole request took
+            is_streamed (bool): True - the body is read by the caller later, so download is not measured
+        """
+        self.status_code = resp.status_code
+        self.total = total
+        headers_received = resp.elapsed.total_seconds()
+        self.ttfb = max(0.0, headers_received - sum(getattr(self, phase) or 0.0 for phase in ("dns", "connect", "tls")))
+        if not is_streamed:
+            self.download = max(0.0, total - headers_received)
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            dict, phases in milliseconds, e.g. {"request_id": ..., "method": "GET", "url": ..., "source": "network",
+                  "status_code": 200, "new_connection": True, "dns_ms": 1.2, ..., "total_ms": 25.0}
+        """
+        record = {"request_id": self.request_id,
+                  "method": self.method,
+                  "url": self.url,
+                  "source": self.source,
+                  "status_code": self.status_code,
+                  "new_connection": self.new_connection}
+        for phase in self.PHASES + ("total",):
+            value = getattr(self, phase)
+            record[f"{phase}_ms"] = None if value is None else round(value * 1000, 3)
+        return record
+
+
+def _current_timing():
+    """
+    Returns:
+        RequestTiming of the request made in this thread, None if timings are not measured
+    """
+    return getattr(_context, "timing", None)
+
+
+class _TimedConnectionMixin:  # pylint: disable=too-few-public-methods
+    """
+    Measuring DNS resolution, TCP connect and TLS handshake of a new connection
+    """
+
+    def _new_conn(self):
+        """
+        Resolving the host and opening the socket, both are timed
+
+        Returns:
+            socket.socket
+        """
+        timing = _current_timing()
+        if timing is None:
+            return super()._new_conn()
+        started = time.perf_counter()
+        try:
+            address = socket.getaddrinfo(self._dns_host, self.port, type=socket.SOCK_STREAM)[0][4][0]
+        except socket.gaierror:
+            # the error is raised with the urllib3 message
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timing.dns = resolved - started
+        dns_host = self._dns_host
+        # connecting to the resolved address, so the host is not resolved again
+        self._dns_host = address
+        try:
+            sock = super()._new_conn()
+        except NewConnectionError:
+            # falling back to all the addresses of the host
+            self._dns_host = dns_host
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+        timing.connect = time.perf_counter() - resolved
+        return sock
+
+    def connect(self):
+        """
+        Opening the connection; for https the time left after DNS and TCP connect is the TLS handshake
+        """
+        timing = _current_timing()
+        started = time.perf_counter()
+        super().connect()
+        if timing is not None and isinstance(self, HTTPSConnection):
+            timing.tls = max(0.0, time.perf_counter() - started - (timing.dns or 0.0) - (timing.connect or 0.0))
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    """
+    http connection with timing of the connection phases
+    """
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    """
+    https connection with timing of the connection phases
+    """
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    """
+    Pool of TimedHTTPConnection
+    """
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    """
+    Pool of TimedHTTPSConnection
+    """
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections report their DNS/connect/TLS phases, see RequestTiming.measure_connection
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+def summarize_timings(timings: list) -> dict:
+    """
+    Args:
+        timings (list): RequestTiming objects
+
+    Returns:
+        dict, number of requests and sums of the phases in milliseconds,
+              e.g. {"requests": 3, "new_connections": 1, "dns_ms": 1.2, ..., "total_ms": 75.0}
+    """
+    summary = {"requests": len(timings), "new_connections": sum(timing.new_connection for timing in timings)}
+    for phase in RequestTiming.PHASES + ("total",):
+        summary[f"{phase}_ms"] = round(sum(getattr(timing, phase) or 0.0 for timing in timings) * 1000, 3)
+    return summary
+
+
+class TimingRecorder:
+    """
+    Thread-safe collector of the request timings of every test; they're exported to a JSONL file
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): JSONL file path, one line per request
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._test_id = None
+        self._timings = []
+
+    def start_test(self, test_id: str) -> list:
+        """
+        Args:
+            test_id (str): e.g. tests/test_catfacts_api.py::TestApi::test_pagination[1-5]
+
+        Returns:
+            list, RequestTiming objects of the test, it's filled while the test is running
+        """
+        with self._lock:
+            self._test_id = test_id
+            self._timings = []
+            return self._timings
+
+    def add(self, timing: RequestTiming):
+        """
+        Args:
+            timing (RequestTiming): timing of a finished request
+        """
+        with self._lock:
+            self._timings.append(timing)
+
+    def finish_test(self) -> dict:
+        """
+        Writing the timings of the current test to the JSONL file
+
+        Returns:
+            dict, see summarize_timings
+        """
+        with self._lock:
+            timings, self._timings = self._timings, []
+            test_id, self._test_id = self._test_id, None
+        if timings:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as timings_file:
+                for timing in timings:
+                    timings_file.write(json.dumps({"test": test_id, **timing.to_dict()}) + "\n")
+            log.debug(f"{len(timings)} request timings of {test_id} are saved: {self.path}")
+        return summarize_timings(timings)
@@ -0,0 +1,222 @@
+"""
+In-memory HTTP response cache with TTL/LRU eviction and ETag/Last-Modified revalidation
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from requests import Response
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+class CacheEntry:
+    """
+    Cached response and its expiration time
+    """
+
+    def __init__(self, response: Response, expires_at: float):
+        """
+        Args:
+            response (Response): cached response, the body is already read
+            expires_at (float): time.monotonic() value after which the entry needs revalidation
+        """
+        self.response = response
+        self.expires_at = expires_at
+        self.size = len(response.content or b"") + sum(len(k) + len(v) for k, v in response.headers.items())
+
+    def is_fresh(self) -> bool:
+        """
+        Returns:
+            bool, False if the entry is expired
+        """
+        return time.monotonic() < self.expires_at
+
+    def conditional_headers(self) -> dict:
+        """
+        Returns:
+            dict, If-None-Match/If-Modified-Since headers if the server sent ETag/Last-Modified, otherwise empty
+        """
+        headers = {}
+        if self.response.headers.get("ETag"):
+            headers["If-None-Match"] = self.response.headers["ETag"]
+        if self.response.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = self.response.headers["Last-Modified"]
+        return headers
+
+
+class ResponseCache:  # pylint: disable=too-many-instance-attributes
+    """
+    Thread-safe LRU cache of GET responses; the least recently used entries are evicted when max_entries or
+    max_bytes is exceeded. Expired entries are kept while there's room, so they can be revalidated with
+    a conditional request instead of downloading the body again.
+    """
+    DEFAULT_TTL = 300
+    DEFAULT_MAX_ENTRIES = 256
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    # Request headers that change the response, they're a part of the key
+    DEFAULT_VARY_HEADERS = ("Accept", "Accept-Encoding", "Accept-Language", "Authorization")
+    # Max seconds to wait for the identical request that is already in flight
+    DEFAULT_FLIGHT_TIMEOUT = 30
+
+    def __init__(self,
+                 ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 vary_headers: tuple = DEFAULT_VARY_HEADERS):
+        """
+        Args:
+            ttl (float): seconds an entry is served without revalidation
+            max_entries (int): max number of cached responses
+            max_bytes (int): max total size of cached bodies and headers
+            vary_headers (tuple): request headers that are a part of the key
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.vary_headers = tuple(header.lower() for header in vary_headers)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> threading.Event that is set when the request in flight is finished
+        self._flights = {}
+        # "bytes" is the current total size of the entries
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "coalesced": 0, "evictions": 0, "bytes": 0}
+
+    def make_key(self, method: str, url: str, query_params: dict, headers: dict) -> tuple:
+        """
+        Args:
+            method (str): HTTP method
+            url (str): full URL without query params
+            query_params (dict): these params will be used in URL
+            headers (dict): request headers, only vary_headers are used
+
+        Returns:
+            tuple, hashable key
+        """
+        params = tuple(sorted((str(key), str(value)) for key, value in (query_params or {}).items()))
+        vary = tuple(sorted((key.lower(), str(value)) for key, value in (headers or {}).items()
+                            if key.lower() in self.vary_headers))
+        return method.upper(), url, params, vary
+
+    def get(self, key: tuple):
+        """
+        Args:
+            key (tuple): see make_key
+
+        Returns:
+            CacheEntry or None; the entry may be expired, check is_fresh()
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, response: Response):
+        """
+        Caching the response if it's cacheable: 200 status code and no 'no-store' Cache-Control directive
+
+        Args:
+            key (tuple): see make_key
+            response (Response): response to cache
+        """
+        if response.status_code != 200 or "no-store" in response.headers.get("Cache-Control", ""):
+            return
+        entry = CacheEntry(response, time.monotonic() + self.ttl)
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._stats["bytes"] += entry.size
+            while len(self._entries) > self.max_entries or self._stats["bytes"] > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def refresh(self, key: tuple, not_modified_resp: Response) -> Response:
+        """
+        Extending TTL of the entry after the server answered 304 Not Modified
+
+        Args:
+            key (tuple): see make_key
+            not_modified_resp (Response): 304 response, its headers replace the cached ones
+
+        Returns:
+            Response, copy of the cached response; None if the entry was evicted in the meantime
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.response.headers.update(not_modified_resp.headers)
+            entry.expires_at = time.monotonic() + self.ttl
+            return copy.copy(entry.response)
+
+    def _remove(self, key: tuple):
+        """
+        Must be called under the lock
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._stats["bytes"] -= entry.size
+
+    @contextmanager
+    def single_flight(self, key: tuple, timeout: float = DEFAULT_FLIGHT_TIMEOUT):
+        """
+        Coalescing identical requests: the first caller makes the request, the others wait until it's finished
+        and then look for the response in the cache
+
+        Args:
+            key (tuple): see make_key
+            timeout (float): max seconds to wait for the request in flight
+
+        Yields:
+            bool, True - the caller makes the request, False - the identical request is finished (or timed out)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._flights[key] = threading.Event()
+        if not is_leader:
+            flight.wait(timeout)
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.set()
+
+    def count(self, event: str):
+        """
+        Args:
+            event (str): one of ("hits", "misses", "revalidated", "coalesced")
+        """
+        with self._lock:
+            self._stats[event] += 1
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict, e.g. {"hits": 5, "misses": 2, "revalidated": 1, "coalesced": 1, "evictions": 0, "entries": 2,
+                        "bytes": 1024}
+        """
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+    def clear(self):
+        """
+        Removing all the entries
+        """
+        with self._lock:
+            self._entries.clear()
+            self._stats["bytes"] = 0
+        log.info(f"Response cache is cleared; stats: {self.stats()}")
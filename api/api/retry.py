@@ -0,0 +1,319 @@
+"""
+Retries of idempotent API requests with exponential backoff, a retry budget and a per-host circuit breaker,
+so a transient error costs one more request instead of a rerun of the whole test
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from requests import Response
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+from python_pytest_selenium_web_api_test.api.api.api_base import ApiError
+
+
+log = Logger(__name__)
+
+
+class CircuitOpenError(ApiError):
+    """
+    Class for raising the error when the circuit of the host is open and the request is not made
+    """
+
+
+class RetryPolicy:
+    """
+    Which requests are retried and how long to wait before the next attempt
+    """
+    # Methods that can be repeated without side effects, see RFC 9110 9.2.2
+    IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+    RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+    def __init__(self,
+                 max_attempts: int = 3,
+                 backoff_base: float = 0.2,
+                 backoff_max: float = 5.0,
+                 max_retry_after: float = 30.0,
+                 methods: tuple = IDEMPOTENT_METHODS,
+                 retry_statuses: tuple = RETRY_STATUSES):
+        """
+        Args:
+            max_attempts (int): max number of attempts including the first one, 1 - no retries
+            backoff_base (float): seconds, the delay before the Nth retry is random from 0 to backoff_base * 2 ** (N - 1)
+            backoff_max (float): max seconds of the backoff delay
+            max_retry_after (float): max seconds to wait for Retry-After; if the server asks for more, it's not retried
+            methods (tuple): methods that are retried
+            retry_statuses (tuple): status codes that are retried
+        """
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.methods = tuple(method.upper() for method in methods)
+        self.retry_statuses = retry_statuses
+        self._rng = random.Random()
+
+    def is_retryable_response(self, resp: Response) -> bool:
+        """
+        Args:
+            resp (Response): received response
+
+        Returns:
+            bool
+        """
+        return resp.status_code in self.retry_statuses
+
+    @staticmethod
+    def get_retry_after(resp: Response):
+        """
+        Args:
+            resp (Response): received response
+
+        Returns:
+            float, seconds from the Retry-After header (delay-seconds or HTTP-date), None if there's no valid header
+        """
+        value = resp.headers.get("Retry-After") if resp is not None else None
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def get_delay(self, attempt: int, resp: Response = None):
+        """
+        Args:
+            attempt (int): number of the failed attempt, starting from 1
+            resp (Response): failed response, None if the request raised an error
+
+        Returns:
+            float, seconds to wait before the next attempt; None - the server asks to wait longer than max_retry_after
+        """
+        retry_after = self.get_retry_after(resp)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        # "full jitter", so clients that failed together don't retry together
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+
+class RetryBudget:
+    """
+    Retries are allowed while they are not more than min_retries plus ratio of the requests,
+    so retries can't multiply the load on a struggling host
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        """
+        Args:
+            ratio (float): share of the requests that can be retried, e.g. 0.2 - 20%
+            min_retries (int): retries that are always allowed, for the first requests
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._requests = 0
+        self._retries = 0
+        self._lock = threading.Lock()
+
+    def add_request(self):
+        """
+        Counting a new (not retried) request
+        """
+        with self._lock:
+            self._requests += 1
+
+    def try_withdraw(self) -> bool:
+        """
+        Returns:
+            bool, True if a retry is allowed, it's counted
+        """
+        with self._lock:
+            if self._retries >= self.min_retries + self.ratio * self._requests:
+                return False
+            self._retries += 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit: after failure_threshold consecutive failures it's open and requests fail fast for reset_timeout,
+    then one trial request is let through (half-open): success closes the circuit, failure opens it again
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            host (str): e.g. catfact.ninja:443
+            failure_threshold (int): consecutive failures that open the circuit
+            reset_timeout (float): seconds the circuit is open before the trial request
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Returns:
+            bool, False if the circuit is open or the trial request is already in flight
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                log.info(f"Circuit of {self.host} is half-open, making a trial request")
+                return True
+            return False
+
+    def record(self, is_success: bool):
+        """
+        Args:
+            is_success (bool): result of the request
+        """
+        with self._lock:
+            if is_success:
+                if self.state != self.CLOSED:
+                    log.info(f"Circuit of {self.host} is closed")
+                self.state = self.CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    log.warning(f"Circuit of {self.host} is open for {self.reset_timeout}s "
+                                f"after {self._failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class RetryHandler:
+    """
+    Making a request with retries; one instance can be shared by several API instances and threads
+    """
+
+    def __init__(self,
+                 policy: RetryPolicy = None,
+                 budget: RetryBudget = None,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        """
+        Args:
+            policy (RetryPolicy): None - the default policy
+            budget (RetryBudget): None - the default budget
+            failure_threshold (int): consecutive failures that open the circuit of a host, 0 - no circuit breaker
+            reset_timeout (float): seconds the circuit is open before the trial request
+        """
+        self.policy = policy or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "recovered": 0, "gave_up": 0, "budget_exhausted": 0,
+                       "circuit_rejected": 0, "time_lost_s": 0.0}
+
+    def _get_breaker(self, url: str):
+        """
+        Args:
+            url (str): request URL
+
+        Returns:
+            CircuitBreaker of the host, None if the circuit breaker is disabled
+        """
+        if not self.failure_threshold:
+            return None
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def _count(self, event: str, value=1):
+        with self._lock:
+            self._stats[event] += value
+
+    def send(self, request_config: dict, send_once):
+        """
+        Args:
+            request_config (dict): the keyword arguments of the request
+            send_once (callable): makes one attempt, takes request_config, returns Response or raises ApiError
+
+        Returns:
+            Response, the last one if all the attempts failed with a retryable status code
+        """
+        method = request_config["method"].upper()
+        breaker = self._get_breaker(request_config["url"])
+        if breaker is not None and not breaker.allow_request():
+            self._count("circuit_rejected")
+            raise CircuitOpenError(f"Circuit of {breaker.host} is open, {method} {request_config['url']} is not made")
+        self._count("requests")
+        self.budget.add_request()
+        attempt = 1
+        while True:
+            started = time.perf_counter()
+            resp, error = None, None
+            try:
+                resp = send_once(request_config)
+            except ApiError as ex:
+                error = ex
+            is_failed = error is not None or self.policy.is_retryable_response(resp)
+            if breaker is not None:
+                breaker.record(not is_failed)
+            if not is_failed:
+                if attempt > 1:
+                    self._count("recovered")
+                return resp
+            delay = self._get_retry_delay(method, attempt, resp, breaker)
+            if delay is None:
+                if attempt > 1:
+                    self._count("gave_up")
+                if error is not None:
+                    raise error
+                return resp
+            reason = type(error.__cause__ or error).__name__ if error is not None else resp.status_code
+            if resp is not None:
+                resp.close()
+            log.warning(f"Retrying {method} {request_config['url']} in {delay:.2f}s "
+                        f"(attempt {attempt + 1}/{self.policy.max_attempts}): {reason}")
+            time.sleep(delay)
+            self._count("retries")
+            self._count("time_lost_s", time.perf_counter() - started)
+            attempt += 1
+
+    def _get_retry_delay(self, method: str, attempt: int, resp: Response, breaker: CircuitBreaker):
+        """
+        Returns:
+            float, seconds to wait before the next attempt, None if the request must not be retried
+        """
+        if method not in self.policy.methods or attempt >= self.policy.max_attempts:
+            return None
+        if breaker is not None and breaker.state == CircuitBreaker.OPEN:
+            return None
+        delay = self.policy.get_delay(attempt, resp)
+        if delay is None:
+            return None
+        if not self.budget.try_withdraw():
+            self._count("budget_exhausted")
+            return None
+        return delay
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict, e.g. {"requests": 100, "retries": 3, "recovered": 2, "gave_up": 1, "budget_exhausted": 0,
+                        "circuit_rejected": 0, "time_lost_s": 1.25, "open_circuits": []}
+        """
+        with self._lock:
+            return {**self._stats,
+                    "time_lost_s": round(self._stats["time_lost_s"], 3),
+                    "open_circuits": [host for host, breaker in self._breakers.items()
+                                      if breaker.state != CircuitBreaker.CLOSED]}
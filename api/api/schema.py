@@ -0,0 +1,248 @@
+"""
+Declarative response schemas compiled once into validators
+
+A schema is a dict with a subset of JSON Schema keywords:
+    type (str or list, e.g. ["string", "null"]), enum, required, properties, additionalProperties (bool),
+    items, minItems, maxItems, minLength, maxLength, minimum, maximum
+Every keyword becomes a closure when the schema is compiled, so validating a list of thousands of items is
+one pass over it without looking at the schema again; nothing is allocated for valid values.
+"""
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+# bool is a subclass of int, it's excluded from integer and number explicitly
+JSON_TYPES = {"string": (str,), "integer": (int,), "number": (int, float), "boolean": (bool,), "null": (type(None),),
+              "object": (dict,), "array": (list,)}
+
+
+class SchemaValidationError(AssertionError):
+    """
+    Class for raising schema violations, every violation is a string with its JSON path
+    """
+    MAX_REPORTED = 20
+
+    def __init__(self, violations: list):
+        """
+        Args:
+            violations (list): e.g. ["$.data[3].breed: is required", ...]
+        """
+        self.violations = violations
+        reported = "\n".join(violations[:self.MAX_REPORTED])
+        if len(violations) > self.MAX_REPORTED:
+            reported += f"\n... and {len(violations) - self.MAX_REPORTED} more"
+        super().__init__(f"{len(violations)} schema violations:\n{reported}")
+
+
+def _compile_type(expected):
+    types = (expected,) if isinstance(expected, str) else tuple(expected)
+    unknown = [name for name in types if name not in JSON_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown schema types {unknown}, use some of {list(JSON_TYPES)}")
+    python_types = tuple(python_type for name in types for python_type in JSON_TYPES[name])
+    is_bool_allowed = "boolean" in types
+    message = f"expected {' or '.join(types)}"
+
+    def check(value):
+        if not isinstance(value, python_types) or (isinstance(value, bool) and not is_bool_allowed):
+            return [("", f"{message}, got {type(value).__name__}")]
+        return None
+    return check
+
+
+def _compile_enum(allowed):
+    allowed_values = list(allowed)
+
+    def check(value):
+        if value not in allowed_values:
+            return [("", f"{value!r} is not one of {allowed_values}")]
+        return None
+    return check
+
+
+def _compile_bounds(schema: dict, minimum_key: str, maximum_key: str, types: tuple, size, unit: str):
+    """
+    Args:
+        schema (dict): schema with the keywords
+        minimum_key (str): e.g. minLength
+        maximum_key (str): e.g. maxLength
+        types (tuple): Python types the keywords apply to, other values are skipped
+        size (callable): returns the compared value, e.g. len
+        unit (str): for the violation message
+
+    Returns:
+        callable or None if the schema has none of the keywords
+    """
+    minimum, maximum = schema.get(minimum_key), schema.get(maximum_key)
+    if minimum is None and maximum is None:
+        return None
+
+    def check(value):
+        if not isinstance(value, types) or isinstance(value, bool):
+            return None
+        measured = size(value)
+        if minimum is not None and measured < minimum:
+            return [("", f"{unit} {measured} is less than {minimum}")]
+        if maximum is not None and measured > maximum:
+            return [("", f"{unit} {measured} is greater than {maximum}")]
+        return None
+    return check
+
+
+def _get_simple_types(schema: dict):
+    """
+    Args:
+        schema (dict): property schema
+
+    Returns:
+        tuple, Python types if the schema has only a non-boolean type, so it's checked inline; otherwise None
+    """
+    if set(schema) != {"type"}:
+        return None
+    types = (schema["type"],) if isinstance(schema["type"], str) else tuple(schema["type"])
+    if "boolean" in types or any(name not in JSON_TYPES for name in types):
+        return None
+    return tuple(python_type for name in types for python_type in JSON_TYPES[name])
+
+
+def _compile_object(schema: dict):
+    required = frozenset(schema.get("required", ()))
+    simple_properties = []
+    properties = []
+    for name, subschema in schema.get("properties", {}).items():
+        simple_types = _get_simple_types(subschema)
+        if simple_types is not None:
+            simple_properties.append((name, simple_types, _compile(subschema)))
+        else:
+            properties.append((name, _compile(subschema)))
+    known = frozenset(schema.get("properties", {}))
+    is_additional_allowed = schema.get("additionalProperties", True)
+    if not required and not properties and not simple_properties and is_additional_allowed:
+        return None
+
+    def check(value):
+        if not isinstance(value, dict):
+            return None
+        errors = None
+        if required and not required.issubset(value.keys()):
+            errors = [(f".{name}", "is required") for name in sorted(required - value.keys())]
+        # the most common case is checked without a call: a property of a non-boolean type
+        for name, simple_types, validate in simple_properties:
+            property_value = value.get(name)
+            if (property_value is None and name not in value) or (isinstance(property_value, simple_types)
+                                                                   and not isinstance(property_value, bool)):
+                continue
+            errors = errors or []
+            errors.extend((f".{name}{path}", message) for path, message in validate(property_value))
+        for name, validate in properties:
+            if name in value:
+                property_errors = validate(value[name])
+                if property_errors:
+                    errors = errors or []
+                    errors.extend((f".{name}{path}", message) for path, message in property_errors)
+        if not is_additional_allowed and not known.issuperset(value.keys()):
+            errors = errors or []
+            errors.extend((f".{name}", "is not allowed") for name in sorted(value.keys() - known))
+        return errors
+    return check
+
+
+def _compile_items(schema: dict):
+    if "items" not in schema:
+        return None
+    validate_item = _compile(schema["items"])
+
+    def check(value):
+        if not isinstance(value, list):
+            return None
+        errors = None
+        for index, item in enumerate(value):
+            item_errors = validate_item(item)
+            if item_errors:
+                errors = errors or []
+                errors.extend((f"[{index}]{path}", message) for path, message in item_errors)
+        return errors
+    return check
+
+
+def _compile(schema: dict):
+    """
+    Args:
+        schema (dict): see the module docstring
+
+    Returns:
+        callable, takes a value and returns None if it's valid, otherwise list of (relative JSON path, message)
+    """
+    checks = []
+    if "type" in schema:
+        checks.append(_compile_type(schema["type"]))
+    if "enum" in schema:
+        checks.append(_compile_enum(schema["enum"]))
+    checks.append(_compile_bounds(schema, "minLength", "maxLength", JSON_TYPES["string"], len, "length"))
+    checks.append(_compile_bounds(schema, "minItems", "maxItems", JSON_TYPES["array"], len, "number of items"))
+    checks.append(_compile_bounds(schema, "minimum", "maximum", JSON_TYPES["number"], lambda value: value, "value"))
+    checks.append(_compile_object(schema))
+    checks.append(_compile_items(schema))
+    checks = [check for check in checks if check is not None]
+    if not checks:
+        return lambda value: None
+    if len(checks) == 1:
+        return checks[0]
+    type_check, other_checks = (checks[0], checks[1:]) if "type" in schema else (None, checks)
+
+    def validate(value):
+        if type_check is not None:
+            type_errors = type_check(value)
+            if type_errors:
+                # other keywords are meaningless for a value of the wrong type
+                return type_errors
+        errors = None
+        for check in other_checks:
+            check_errors = check(value)
+            if check_errors:
+                errors = errors or []
+                errors.extend(check_errors)
+        return errors
+    return validate
+
+
+class Schema:
+    """
+    Compiled schema; compile it once, e.g. as a module constant, and validate many responses with it
+    """
+
+    def __init__(self, schema: dict, name: str = None):
+        """
+        Args:
+            schema (dict): see the module docstring
+            name (str): for log messages, e.g. breeds page
+        """
+        self.schema = schema
+        self.name = name or "schema"
+        self._validate = _compile(schema)
+
+    def validate(self, data) -> list:
+        """
+        Args:
+            data: decoded JSON
+
+        Returns:
+            list, every violation with its JSON path, e.g. ["$.data[3].breed: is required"]; empty if data is valid
+        """
+        errors = self._validate(data)
+        return [f"${path}: {message}" for path, message in errors] if errors else []
+
+    def check(self, data):
+        """
+        Args:
+            data: decoded JSON
+
+        Raises:
+            SchemaValidationError if data is not valid
+        """
+        violations = self.validate(data)
+        if violations:
+            raise SchemaValidationError(violations)
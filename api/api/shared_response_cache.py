@@ -0,0 +1,234 @@
+"""
+Response cache in an SQLite file shared by processes, e.g. pytest-xdist workers, with single-flight coalescing:
+when several workers need the same response, one of them makes the request and the others wait for its result
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+from python_pytest_selenium_web_api_test.api.api.response_cache import CacheEntry, ResponseCache
+
+
+log = Logger(__name__)
+
+
+class SharedResponseCache(ResponseCache):
+    """
+    The same interface as ResponseCache; the entries and requests in flight are kept in the SQLite file,
+    the stats are per process. Expiration times are wall-clock time, so they're valid in every process.
+    """
+    # Seconds between checks if the identical request in flight is finished
+    POLL_INTERVAL = 0.02
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, status INTEGER, reason TEXT, url TEXT, "
+              "headers TEXT, body BLOB, size INTEGER, expires_at REAL, used_at REAL)",
+              "CREATE TABLE IF NOT EXISTS flights (key TEXT PRIMARY KEY, owner TEXT, started_at REAL)")
+
+    def __init__(self,
+                 path: str,
+                 ttl: float = ResponseCache.DEFAULT_TTL,
+                 max_entries: int = ResponseCache.DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = ResponseCache.DEFAULT_MAX_BYTES,
+                 vary_headers: tuple = ResponseCache.DEFAULT_VARY_HEADERS):
+        """
+        Args:
+            path (str): SQLite file path, the same for all the processes
+            ttl (float): seconds an entry is served without revalidation
+            max_entries (int): max number of cached responses
+            max_bytes (int): max total size of cached bodies and headers
+            vary_headers (tuple): request headers that are a part of the key
+        """
+        super().__init__(ttl, max_entries, max_bytes, vary_headers)
+        self.path = path
+        self._owner = uuid.uuid4().hex
+        # sqlite3 connections can't be shared by threads
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+        log.info(f"Shared response cache: {path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Returns:
+            sqlite3.Connection of the current thread, in autocommit mode
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.DEFAULT_FLIGHT_TIMEOUT, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _db_key(key: tuple) -> str:
+        """
+        Args:
+            key (tuple): see make_key
+
+        Returns:
+            str, the key in the database
+        """
+        return json.dumps(key, separators=(",", ":"))
+
+    def get(self, key: tuple):
+        """
+        Args:
+            key (tuple): see make_key
+
+        Returns:
+            CacheEntry or None; the entry may be expired, check is_fresh()
+        """
+        connection = self._connect()
+        row = connection.execute("SELECT status, reason, url, headers, body, expires_at FROM entries WHERE key = ?",
+                                 (self._db_key(key),)).fetchone()
+        if row is None:
+            return None
+        connection.execute("UPDATE entries SET used_at = ? WHERE key = ?", (time.time(), self._db_key(key)))
+        status, reason, url, headers, body, expires_at = row
+        resp = Response()
+        resp.status_code = status
+        resp.reason = reason
+        resp.url = url
+        resp.headers = CaseInsensitiveDict(json.loads(headers))
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = body  # pylint: disable=protected-access
+        # CacheEntry expects time.monotonic() values, the wall-clock expiration time is converted
+        return CacheEntry(resp, time.monotonic() + expires_at - time.time())
+
+    def put(self, key: tuple, response: Response):
+        """
+        Caching the response if it's cacheable: 200 status code and no 'no-store' Cache-Control directive
+
+        Args:
+            key (tuple): see make_key
+            response (Response): response to cache
+        """
+        if response.status_code != 200 or "no-store" in response.headers.get("Cache-Control", ""):
+            return
+        entry = CacheEntry(response, 0)
+        if entry.size > self.max_bytes:
+            return
+        now = time.time()
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               (self._db_key(key), response.status_code, response.reason, response.url,
+                                json.dumps(dict(response.headers)), response.content or b"", entry.size,
+                                now + self.ttl, now))
+            evicted = self._evict(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        if evicted:
+            with self._lock:
+                self._stats["evictions"] += evicted
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        """
+        Removing the least recently used entries while max_entries or max_bytes is exceeded; called in a transaction
+
+        Returns:
+            int, number of removed entries
+        """
+        count, total_size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        evicted = 0
+        rows = connection.execute("SELECT key, size FROM entries ORDER BY used_at").fetchall() \
+            if count > self.max_entries or total_size > self.max_bytes else []
+        for db_key, size in rows:
+            if count <= self.max_entries and total_size <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM entries WHERE key = ?", (db_key,))
+            count -= 1
+            total_size -= size
+            evicted += 1
+        return evicted
+
+    def refresh(self, key: tuple, not_modified_resp: Response) -> Response:
+        """
+        Extending TTL of the entry after the server answered 304 Not Modified
+
+        Args:
+            key (tuple): see make_key
+            not_modified_resp (Response): 304 response, its headers replace the cached ones
+
+        Returns:
+            Response, the cached response; None if the entry was evicted in the meantime
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        entry.response.headers.update(not_modified_resp.headers)
+        self._connect().execute("UPDATE entries SET headers = ?, expires_at = ? WHERE key = ?",
+                                (json.dumps(dict(entry.response.headers)), time.time() + self.ttl, self._db_key(key)))
+        return entry.response
+
+    @contextmanager
+    def single_flight(self, key: tuple, timeout: float = ResponseCache.DEFAULT_FLIGHT_TIMEOUT):
+        """
+        Coalescing identical requests of all the processes: the first caller makes the request, the others wait
+        until it's finished and then look for the response in the cache. A flight older than timeout is considered
+        abandoned (e.g. the worker crashed) and is taken over.
+
+        Args:
+            key (tuple): see make_key
+            timeout (float): max seconds to wait for the request in flight
+
+        Yields:
+            bool, True - the caller makes the request, False - the identical request is finished (or timed out)
+        """
+        db_key = self._db_key(key)
+        connection = self._connect()
+        # threads of this process are coalesced by the parent class, so only one of them waits on the database
+        with super().single_flight(key, timeout) as is_thread_leader:
+            if not is_thread_leader:
+                yield False
+                return
+            deadline = time.time() + timeout
+            while True:
+                now = time.time()
+                connection.execute("DELETE FROM flights WHERE key = ? AND started_at < ?", (db_key, now - timeout))
+                is_leader = connection.execute("INSERT OR IGNORE INTO flights VALUES (?, ?, ?)",
+                                               (db_key, self._owner, now)).rowcount == 1
+                if is_leader or now >= deadline:
+                    break
+                time.sleep(self.POLL_INTERVAL)
+                if connection.execute("SELECT 1 FROM flights WHERE key = ?", (db_key,)).fetchone() is None:
+                    # the identical request is finished
+                    break
+            try:
+                yield is_leader
+            finally:
+                if is_leader:
+                    connection.execute("DELETE FROM flights WHERE key = ? AND owner = ?", (db_key, self._owner))
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict, e.g. {"hits": 5, "misses": 2, "revalidated": 1, "coalesced": 1, "evictions": 0, "entries": 2,
+                        "bytes": 1024}; entries and bytes are of the shared file, the rest is of this process
+        """
+        count, total_size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        with self._lock:
+            return {**self._stats, "entries": count, "bytes": total_size}
+
+    def clear(self):
+        """
+        Removing all the entries
+        """
+        self._connect().execute("DELETE FROM entries")
+        log.info(f"Shared response cache is cleared; stats: {self.stats()}")
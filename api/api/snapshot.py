@@ -0,0 +1,412 @@
+"""
+Compact column-oriented snapshots of API datasets (e.g. all the /facts or /breeds items) and a run-to-run differ
+
+Every distinct value is stored once in the string table as canonical JSON, every field is a column of uint32 indices
+into the table (0 - the record has no such field), so a snapshot of hundreds of thousands of records is a few arrays
+and its distinct values. The differ maps the string table of one snapshot to the other once and then compares
+the columns as integers, it's linear in the number of records.
+
+File format (gzip): b"APISNAP1" line, header JSON line, one line per string of the table, then the columns in the
+order of header["fields"], count little-endian uint32 each.
+
+Diff two snapshots from the command line:
+    python -m python_pytest_selenium_web_api_test.api.api.snapshot --folder artifacts --name breeds
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from array import array
+from datetime import datetime
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+MAGIC = b"APISNAP1\n"
+FILE_EXT = "snap.gz"
+# index of a value that is missing in the other snapshot's string table; it never equals a real index
+_UNKNOWN = 0xFFFFFFFF
+
+
+def _json_type(value) -> str:
+    """
+    Args:
+        value: decoded JSON value
+
+    Returns:
+        str, JSON type name, see schema.JSON_TYPES
+    """
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if value is None:
+        return "null"
+    return "object" if isinstance(value, dict) else "array"
+
+
+def _new_column(size: int = 0) -> array:
+    """
+    Args:
+        size (int): number of records, they're filled with 0 (missing field)
+
+    Returns:
+        array of uint32 ("I" is 4 bytes on all the supported platforms)
+    """
+    return array("I", bytes(4 * size))
+
+
+class Snapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    Column-oriented dataset; records are added one by one, e.g. from PublicApi.iter_breeds(), so the whole
+    list of dicts is never kept in memory
+    """
+    # strings written to the file at once
+    WRITE_BATCH = 10000
+
+    def __init__(self, name: str, key: str):
+        """
+        Args:
+            name (str): dataset name, e.g. breeds
+            key (str): field that identifies a record between runs, e.g. breed
+        """
+        self.name = name
+        self.key = key
+        self.count = 0
+        self.columns = {}
+        # string 0 is a placeholder for a missing field
+        self.strings = [""]
+        self.schema = {}
+        self._string_index = {}
+        # strings and integers are the most of the values, they're looked up without encoding them
+        self._scalar_index = {str: {}, int: {}}
+
+    def _intern(self, value) -> int:
+        """
+        Args:
+            value: decoded JSON value
+
+        Returns:
+            int, index of its canonical JSON in the string table
+        """
+        scalar_index = self._scalar_index.get(type(value))
+        if scalar_index is not None:
+            index = scalar_index.get(value)
+            if index is None:
+                index = scalar_index[value] = self._intern_encoded(value)
+            return index
+        return self._intern_encoded(value)
+
+    def _intern_encoded(self, value) -> int:
+        """
+        Args:
+            value: decoded JSON value
+
+        Returns:
+            int, index of its canonical JSON in the string table
+        """
+        encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        index = self._string_index.get(encoded)
+        if index is None:
+            index = self._string_index[encoded] = len(self.strings)
+            self.strings.append(encoded)
+        return index
+
+    def add(self, record: dict):
+        """
+        Args:
+            record (dict): item of the dataset; a field seen for the first time gets a new column
+        """
+        for field, value in record.items():
+            column = self.columns.get(field)
+            if column is None:
+                column = self.columns[field] = _new_column(self.count)
+                self.schema[field] = set()
+            self.schema[field].add(_json_type(value))
+        for field, column in self.columns.items():
+            column.append(self._intern(record[field]) if field in record else 0)
+        self.count += 1
+
+    def extend(self, records) -> "Snapshot":
+        """
+        Args:
+            records (iterable): items of the dataset
+
+        Returns:
+            Snapshot, self
+        """
+        for record in records:
+            self.add(record)
+        return self
+
+    def get_value(self, field: str, row: int):
+        """
+        Args:
+            field (str): field name
+            row (int): record number
+
+        Returns:
+            decoded value, None if the record has no such field
+        """
+        column = self.columns.get(field)
+        index = column[row] if column is not None else 0
+        return json.loads(self.strings[index]) if index else None
+
+    def get_key(self, row: int) -> str:
+        """
+        Args:
+            row (int): record number
+
+        Returns:
+            str, canonical JSON of the key field value, e.g. '"Abyssinian"'
+        """
+        column = self.columns.get(self.key)
+        return self.strings[column[row]] if column is not None else str(row)
+
+    def save(self, path: str) -> str:
+        """
+        Args:
+            path (str): file path, see get_snapshot_path
+
+        Returns:
+            str, path
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = {"name": self.name,
+                  "key": self.key,
+                  "count": self.count,
+                  "fields": list(self.columns),
+                  "schema": {field: sorted(types) for field, types in self.schema.items()},
+                  "strings": len(self.strings)}
+        with gzip.open(path, "wb", compresslevel=1) as snapshot_file:
+            snapshot_file.write(MAGIC)
+            snapshot_file.write(json.dumps(header).encode() + b"\n")
+            for start in range(0, len(self.strings), self.WRITE_BATCH):
+                batch = self.strings[start:start + self.WRITE_BATCH]
+                snapshot_file.write("".join(f"{string}\n" for string in batch).encode())
+            for column in self.columns.values():
+                if sys.byteorder == "big":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                snapshot_file.write(column.tobytes())
+        log.info(f"Snapshot of {self.count} {self.name} records ({len(self.strings) - 1} distinct values) is saved: {path}")
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "Snapshot":
+        """
+        Args:
+            path (str): file saved with save()
+
+        Returns:
+            Snapshot, for reading and diffing only
+        """
+        with gzip.open(path, "rb") as snapshot_file:
+            if snapshot_file.readline() != MAGIC:
+                raise ValueError(f"{path} is not a snapshot file")
+            header = json.loads(snapshot_file.readline())
+            snapshot = cls(header["name"], header["key"])
+            snapshot.count = header["count"]
+            snapshot.schema = {field: set(types) for field, types in header["schema"].items()}
+            snapshot.strings = [snapshot_file.readline()[:-1].decode() for _ in range(header["strings"])]
+            for field in header["fields"]:
+                column = _new_column()
+                column.frombytes(snapshot_file.read(column.itemsize * snapshot.count))
+                if sys.byteorder == "big":
+                    column.byteswap()
+                snapshot.columns[field] = column
+        return snapshot
+
+
+def get_snapshot_path(folder: str, name: str) -> str:
+    """
+    Args:
+        folder (str): e.g. the artifacts folder
+        name (str): dataset name, e.g. breeds
+
+    Returns:
+        str, timestamped path, e.g. <folder>/api-snapshot-breeds-20250101-120000.000000.snap.gz
+    """
+    ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S.%f")
+    return os.path.join(folder, f"api-snapshot-{name}-{ts}.{FILE_EXT}")
+
+
+def find_snapshots(folder: str, name: str) -> list:
+    """
+    Args:
+        folder (str): folder with the snapshots
+        name (str): dataset name, e.g. breeds
+
+    Returns:
+        list, paths of the snapshots of the dataset from the oldest to the newest
+    """
+    prefix = f"api-snapshot-{name}-"
+    if not os.path.isdir(folder):
+        return []
+    # the timestamp in the name sorts chronologically
+    return [os.path.join(folder, file_name) for file_name in sorted(os.listdir(folder))
+            if file_name.startswith(prefix) and file_name.endswith(f".{FILE_EXT}")]
+
+
+def _map_strings(old: Snapshot, new: Snapshot) -> array:
+    """
+    Args:
+        old (Snapshot): previous snapshot
+        new (Snapshot): current snapshot
+
+    Returns:
+        array, index in the old string table of every string of the new one, _UNKNOWN if there's no such string
+    """
+    old_index = {string: index for index, string in enumerate(old.strings)}
+    mapping = _new_column()
+    mapping.extend(old_index.get(string, _UNKNOWN) for string in new.strings)
+    mapping[0] = 0
+    return mapping
+
+
+def _index_rows(keys) -> dict:
+    """
+    Args:
+        keys (iterable): key of every record, e.g. the key column
+
+    Returns:
+        dict, row of every key: {key: row}; repeated keys are {(key, occurrence): row}
+    """
+    rows = {}
+    for row, index in enumerate(keys):
+        key = index
+        occurrence = 0
+        while key in rows:
+            occurrence += 1
+            key = (index, occurrence)
+        rows[key] = row
+    return rows
+
+
+def _match_rows(old: Snapshot, new: Snapshot, mapping: array):
+    """
+    Records are matched by the key field, or by their order if a snapshot has no such field;
+    the n-th record with a repeated key is matched with the n-th one of the previous snapshot
+
+    Args:
+        old (Snapshot): previous snapshot
+        new (Snapshot): current snapshot
+        mapping (array): see _map_strings
+
+    Yields:
+        tuple, (row of the new snapshot, row of the old one or None if the record is added)
+    """
+    is_keyed = new.key in new.columns and old.key in old.columns
+    old_rows = _index_rows(old.columns[old.key] if is_keyed else range(old.count))
+    seen = {}
+    for row, index in enumerate(new.columns[new.key] if is_keyed else range(new.count)):
+        key = mapping[index] if is_keyed else index
+        if key == _UNKNOWN:
+            yield row, None
+            continue
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        yield row, old_rows.get(key if not occurrence else (key, occurrence))
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot, max_examples: int = 20) -> dict:
+    """
+    Comparing the current snapshot with the previous one record by record (matched by the key field)
+    and field by field
+
+    Args:
+        old (Snapshot): previous snapshot
+        new (Snapshot): current snapshot
+        max_examples (int): max keys of added/removed/changed records in the report
+
+    Returns:
+        dict, e.g. {"name": "breeds", "old_count": 98, "new_count": 99, "added": 2, "removed": 1, "changed": 3,
+                    "changed_fields": {"coat": 3}, "schema": {"added_fields": [], "removed_fields": [],
+                    "type_changes": {}}, "examples": {"added": [...], "removed": [...], "changed": [...]}}
+    """
+    mapping = _map_strings(old, new)
+    common_columns = [(field, new.columns[field], old.columns[field])
+                      for field in new.columns if field in old.columns and field != new.key]
+    changed_fields = {field: 0 for field, _, _ in common_columns}
+    matched = bytearray(old.count)
+    counts = {"added": 0, "changed": 0}
+    examples = {"added": [], "removed": [], "changed": []}
+    for row, old_row in _match_rows(old, new, mapping):
+        if old_row is None:
+            counts["added"] += 1
+            if len(examples["added"]) < max_examples:
+                examples["added"].append(new.get_key(row))
+            continue
+        matched[old_row] = 1
+        fields = [field for field, new_column, old_column in common_columns
+                  if mapping[new_column[row]] != old_column[old_row]]
+        if not fields:
+            continue
+        counts["changed"] += 1
+        for field in fields:
+            changed_fields[field] += 1
+        if len(examples["changed"]) < max_examples:
+            examples["changed"].append({"key": new.get_key(row),
+                                        "fields": {field: [old.get_value(field, old_row), new.get_value(field, row)]
+                                                   for field in fields}})
+    removed = old.count - sum(matched)
+    if removed:
+        examples["removed"] = [old.get_key(row) for row in range(old.count) if not matched[row]][:max_examples]
+    type_changes = {field: {"old": sorted(old.schema[field]), "new": sorted(new.schema[field])}
+                    for field in new.schema if field in old.schema and new.schema[field] != old.schema[field]}
+    return {"name": new.name,
+            "old_count": old.count,
+            "new_count": new.count,
+            "added": counts["added"],
+            "removed": removed,
+            "changed": counts["changed"],
+            "changed_fields": {field: count for field, count in changed_fields.items() if count},
+            "schema": {"added_fields": [field for field in new.columns if field not in old.columns],
+                       "removed_fields": [field for field in old.columns if field not in new.columns],
+                       "type_changes": type_changes},
+            "examples": examples}
+
+
+def has_changes(diff: dict) -> bool:
+    """
+    Args:
+        diff (dict): see diff_snapshots
+
+    Returns:
+        bool, True if records or the schema changed
+    """
+    return bool(diff["added"] or diff["removed"] or diff["changed"] or any(diff["schema"].values()))
+
+
+def main():
+    """
+    Diffing two snapshot files, or the two newest snapshots of a dataset in a folder
+    """
+    parser = argparse.ArgumentParser(description="Diff of API dataset snapshots")
+    parser.add_argument("files", nargs="*", help="previous and current snapshot files")
+    parser.add_argument("--folder", default=os.getenv("HOST_ARTIFACTS", "."), help="folder with the snapshots")
+    parser.add_argument("--name", default="facts", help="dataset name, e.g. facts or breeds")
+    parser.add_argument("--max-examples", type=int, default=20)
+    args = parser.parse_args()
+
+    files = args.files or find_snapshots(args.folder, args.name)[-2:]
+    if len(files) != 2:
+        parser.error(f"two snapshots are needed, found: {files}")
+    diff = diff_snapshots(Snapshot.load(files[0]), Snapshot.load(files[1]), args.max_examples)
+    print(json.dumps(diff, indent=2, ensure_ascii=False))
+    if has_changes(diff):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Local asyncio stand-in for the Cat Facts API (https://catfact.ninja)
+
+It serves /facts and /breeds from a seeded dataset with the same pagination envelope as the real API,
+so API tests and performance work on ApiBase don't depend on internet and rate limits.
+Latency, error rate and payload size are configurable and can be changed while the server is running.
+
+Run it as a separate process:
+    python -m python_pytest_selenium_web_api_test.api.api.stand_in_server --port 8080 --latency 0.05
+or in-process with --api-base=stand-in, see api/conftest.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import threading
+
+from aiohttp import web
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+WORDS = ("cat", "cats", "kitten", "whiskers", "purr", "tail", "sleep", "hours", "day", "hunt", "mouse", "eyes",
+         "night", "jump", "times", "height", "ears", "muscles", "domestic", "wild", "ancient", "egypt", "fur",
+         "claws", "paws", "milk", "fish", "nose", "print", "unique", "human", "sound", "meow", "years", "old")
+COUNTRIES = ("United States", "United Kingdom", "France", "Egypt", "Thailand", "Russia", "Turkey", "Japan", "Canada",
+             "Burma", "Ethiopia", "Iran (Persia)", "Germany", "Singapore", "Norway", "Kenya")
+ORIGINS = ("Natural", "Mutation", "Crossbreed", "Hybrid", "Natural/Standard", "")
+COATS = ("Short", "Long", "Semi-long", "Rex", "Hairless", "Short/Long")
+PATTERNS = ("Solid", "Tabby", "Colorpoint", "Bicolor", "Spotted", "Ticked", "All", "Mink", "Calico")
+
+
+def build_dataset(seed: int = 0, facts_count: int = 332, breeds_count: int = 98) -> dict:
+    """
+    Args:
+        seed (int): the same seed gives the same dataset
+        facts_count (int): number of facts
+        breeds_count (int): number of breeds
+
+    Returns:
+        dict, {"facts": [{"fact": ..., "length": ...}, ...], "breeds": [{"breed": ..., "country": ..., ...}, ...]}
+    """
+    rng = random.Random(seed)
+    facts = []
+    for _ in range(facts_count):
+        fact = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 40))).capitalize() + "."
+        facts.append({"fact": fact, "length": len(fact)})
+    breeds = []
+    for index in range(breeds_count):
+        breeds.append({"breed": f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()} {index}",
+                       "country": rng.choice(COUNTRIES),
+                       "origin": rng.choice(ORIGINS),
+                       "coat": rng.choice(COATS),
+                       "pattern": rng.choice(PATTERNS)})
+    return {"facts": facts, "breeds": breeds}
+
+
+class CatFactsStandInServer:  # pylint: disable=too-many-instance-attributes
+    """
+    aiohttp server that runs its own event loop in a background thread
+    """
+    DEFAULT_PER_PAGE = 10
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 seed: int = 0,
+                 latency: float = 0.0,
+                 latency_jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 item_padding: int = 0):
+        """
+        Args:
+            host (str): interface to listen on
+            port (int): port to listen on, 0 - any free port
+            seed (int): seed of the dataset and of the injected latency/errors
+            latency (float): seconds every response is delayed for
+            latency_jitter (float): max random seconds added to latency
+            error_rate (float): share of requests answered with 503, from 0 to 1
+            item_padding (int): number of characters in the extra 'padding' field of every item, to grow payloads
+        """
+        self.host = host
+        self.port = port
+        self.dataset = build_dataset(seed)
+        # knobs can be changed while the server is running
+        self.knobs = {"latency": latency, "latency_jitter": latency_jitter, "error_rate": error_rate,
+                      "item_padding": item_padding}
+        self._rng = random.Random(seed)
+        self._loop = None
+        self._thread = None
+        self._start_error = None
+
+    @property
+    def base_url(self) -> str:
+        """
+        Returns:
+            str, e.g. http://127.0.0.1:8080
+        """
+        return f"http://{self.host}:{self.port}"
+
+    def make_app(self) -> web.Application:
+        """
+        Returns:
+            web.Application
+        """
+        app = web.Application(middlewares=[self._knobs_middleware])
+        app.router.add_get("/facts", self._handle_facts)
+        app.router.add_get("/fact", self._handle_fact)
+        app.router.add_get("/breeds", self._handle_breeds)
+        return app
+
+    @web.middleware
+    async def _knobs_middleware(self, request, handler):
+        """
+        Injecting latency and errors
+        """
+        delay = self.knobs["latency"] + self._rng.uniform(0, self.knobs["latency_jitter"])
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self._rng.random() < self.knobs["error_rate"]:
+            return web.json_response({"message": "Service Unavailable (injected by the stand-in server)"}, status=503)
+        return await handler(request)
+
+    def _json_response(self, request, body) -> web.Response:
+        """
+        JSON response with ETag, 304 is returned if the client already has it
+
+        Args:
+            request (web.Request): received request
+            body (dict): response body
+
+        Returns:
+            web.Response
+        """
+        content = json.dumps(body, separators=(",", ":")).encode()
+        etag = f'"{hashlib.sha1(content).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=content, content_type="application/json", headers={"ETag": etag})
+
+    def _pad(self, items: list) -> list:
+        """
+        Args:
+            items (list): dataset items
+
+        Returns:
+            list, items with the 'padding' field if item_padding is set
+        """
+        padding = self.knobs["item_padding"]
+        if not padding:
+            return items
+        return [{**item, "padding": "x" * padding} for item in items]
+
+    def _paginate(self, request, items: list) -> web.Response:
+        """
+        The same envelope as the real API returns
+
+        Args:
+            request (web.Request): received request with optional page and limit query params
+            items (list): all the items
+
+        Returns:
+            web.Response
+        """
+        page = self._get_int_param(request, "page", 1)
+        per_page = self._get_int_param(request, "limit", self.DEFAULT_PER_PAGE)
+        total = len(items)
+        last_page = max(1, -(-total // per_page))
+        start = (page - 1) * per_page
+        data = self._pad(items[start:start + per_page])
+        path = f"{request.url.origin()}{request.path}"
+
+        def page_url(number):
+            return f"{path}?page={number}" if number is not None else None
+
+        body = {"current_page": page,
+                "data": data,
+                "first_page_url": page_url(1),
+                "from": start + 1 if data else None,
+                "last_page": last_page,
+                "last_page_url": page_url(last_page),
+                "links": [{"url": page_url(number), "label": str(number), "active": number == page}
+                          for number in range(1, last_page + 1)],
+                "next_page_url": page_url(page + 1 if page < last_page else None),
+                "path": path,
+                "per_page": per_page,
+                "prev_page_url": page_url(page - 1 if page > 1 else None),
+                "to": start + len(data) if data else None,
+                "total": total}
+        return self._json_response(request, body)
+
+    @staticmethod
+    def _get_int_param(request, name: str, default: int) -> int:
+        """
+        Invalid and non-positive values fall back to the default, like the real API does
+
+        Returns:
+            int
+        """
+        try:
+            value = int(request.query.get(name, default))
+        except ValueError:
+            return default
+        return value if value > 0 else default
+
+    async def _handle_facts(self, request) -> web.Response:
+        facts = self.dataset["facts"]
+        max_length = request.query.get("max_length")
+        if max_length and max_length.isdigit():
+            facts = [fact for fact in facts if fact["length"] <= int(max_length)]
+        return self._paginate(request, facts)
+
+    async def _handle_fact(self, request) -> web.Response:
+        return self._json_response(request, self._pad([self._rng.choice(self.dataset["facts"])])[0])
+
+    async def _handle_breeds(self, request) -> web.Response:
+        return self._paginate(request, self.dataset["breeds"])
+
+    def start(self, timeout: float = 10) -> str:
+        """
+        Starting the server in a background thread
+
+        Args:
+            timeout (float): max seconds to wait until the server is listening
+
+        Returns:
+            str, base URL, e.g. http://127.0.0.1:8080; the error of the server thread (e.g. the port is in use)
+            is raised here, TimeoutError if the server is not listening in timeout seconds
+        """
+        started = threading.Event()
+        self._start_error = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, args=(started,), name="catfacts-stand-in", daemon=True)
+        self._thread.start()
+        if not started.wait(timeout):
+            # the thread may still be stuck in the setup, it's a daemon one, so it's not joined
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread = None
+            raise TimeoutError(f"Cat Facts stand-in server is not started in {timeout}s: {self.host}:{self.port}")
+        if self._start_error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._start_error
+        log.info(f"Cat Facts stand-in server is started: {self.base_url}; knobs: {self.knobs}")
+        return self.base_url
+
+    def _run(self, started: threading.Event):
+        """
+        Args:
+            started (threading.Event): it's set when the server is listening
+        """
+        asyncio.set_event_loop(self._loop)
+        runner = web.AppRunner(self.make_app(), access_log=None)
+        try:
+            self._loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, self.host, self.port)
+            self._loop.run_until_complete(site.start())
+            self.port = runner.addresses[0][1]
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            # raised by start() in the caller's thread
+            self._start_error = ex
+        finally:
+            started.set()
+        if self._start_error is None:
+            self._loop.run_forever()
+        self._loop.run_until_complete(runner.cleanup())
+        self._loop.close()
+
+    def stop(self):
+        """
+        Stopping the server and its thread
+        """
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+        log.info(f"Cat Facts stand-in server is stopped: {self.base_url}")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    """
+    Running the stand-in server in the foreground
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in for the Cat Facts API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every response is delayed for")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="max random seconds added to latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--item-padding", type=int, default=0, help="extra characters in every item")
+    args = parser.parse_args()
+    server = CatFactsStandInServer(args.host, args.port, args.seed, args.latency, args.latency_jitter,
+                                   args.error_rate, args.item_padding)
+    web.run_app(server.make_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
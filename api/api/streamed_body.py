@@ -0,0 +1,209 @@
+"""
+Response body downloaded in chunks and spooled to memory or a temporary file, hashed and size-checked on the fly,
+so peak memory per request doesn't depend on the size of the response
+"""
+
+import hashlib
+import mmap
+import tempfile
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+from python_pytest_selenium_web_api_test.api.api.json_decoder import iter_json_array_items
+
+
+log = Logger(__name__)
+
+
+class BodyCheckError(ValueError):
+    """
+    Class for raising the errors of the body size and hash checks
+    """
+
+
+class StreamedBody:
+    """
+    File-like body of a streamed response; bodies up to spool_size bytes are kept in memory, bigger ones in a temporary
+    file that is removed on close
+    """
+    DEFAULT_CHUNK_SIZE = 65536
+    DEFAULT_SPOOL_SIZE = 1024 * 1024
+
+    def __init__(self, spool_size: int = DEFAULT_SPOOL_SIZE):
+        """
+        Args:
+            spool_size (int): max bytes kept in memory, 0 - always spool to a file
+        """
+        # SpooledTemporaryFile with max_size=0 never rolls over, so a file is used from the start
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_size) if spool_size \
+            else tempfile.TemporaryFile()  # pylint: disable=consider-using-with
+        self._hash = hashlib.sha256()
+        self._mmap = None
+        self.size = 0
+        # taken from the response in from_response
+        self.status_code = None
+        self.headers = {}
+        self.url = None
+
+    @classmethod
+    def from_response(cls,
+                      resp,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      spool_size: int = DEFAULT_SPOOL_SIZE,
+                      max_size: int = None,
+                      expected_sha256: str = None):
+        """
+        Reading the body of the streamed response chunk by chunk; the response is closed after that
+
+        Args:
+            resp (Response): response of ApiBase.make_streaming_request, its body is not read yet
+            chunk_size (int): number of bytes read at once
+            spool_size (int): max bytes kept in memory, 0 - always spool to a file
+            max_size (int): max body size, BodyCheckError is raised as soon as it's exceeded; None - no limit
+            expected_sha256 (str): hex digest the body must have, None - not checked
+
+        Returns:
+            StreamedBody, positioned at the beginning
+        """
+        body = cls(spool_size)
+        body.status_code, body.headers, body.url = resp.status_code, resp.headers, resp.url
+        try:
+            for chunk in resp.iter_content(chunk_size):
+                body.write(chunk)
+                if max_size is not None and body.size > max_size:
+                    raise BodyCheckError(f"Response body of {resp.url} exceeds {max_size} bytes")
+            expected_size = resp.headers.get("Content-Length")
+            if expected_size and expected_size.isdigit() and not resp.headers.get("Content-Encoding") \
+                    and int(expected_size) != body.size:
+                raise BodyCheckError(f"Response body of {resp.url} is {body.size} bytes, Content-Length is {expected_size}")
+            if expected_sha256 is not None and body.sha256 != expected_sha256.lower():
+                raise BodyCheckError(f"Response body of {resp.url} has sha256 {body.sha256}, expected {expected_sha256}")
+        except Exception:
+            body.close()
+            raise
+        finally:
+            resp.close()
+        body.seek(0)
+        log.debug(f"Response body of {resp.url} is downloaded: {body.size} bytes, sha256: {body.sha256}, "
+                  f"{'in memory' if body.is_in_memory else 'spooled to a file'}")
+        return body
+
+    @property
+    def sha256(self) -> str:
+        """
+        Returns:
+            str, hex digest of the body written so far
+        """
+        return self._hash.hexdigest()
+
+    @property
+    def is_in_memory(self) -> bool:
+        """
+        Returns:
+            bool, False if the body is spooled to a file
+        """
+        return not getattr(self._file, "_rolled", True)
+
+    def write(self, chunk: bytes):
+        """
+        Args:
+            chunk (bytes): next part of the body
+        """
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Args:
+            size (int): max number of bytes, -1 - till the end
+
+        Returns:
+            bytes
+        """
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        """
+        Args:
+            offset (int): position
+            whence (int): see io.IOBase.seek
+
+        Returns:
+            int, new position
+        """
+        return self._file.seek(offset, whence)
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            chunk_size (int): number of bytes read at once
+
+        Yields:
+            bytes, chunks of the body from the beginning
+        """
+        self.seek(0)
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def getbuffer(self):
+        """
+        Returns:
+            memoryview of the body without copying it: of the memory buffer or of the memory-mapped file;
+            release it before close()
+        """
+        if self.is_in_memory:
+            return self._file._file.getbuffer()  # pylint: disable=protected-access
+        if self._mmap is None:
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        return memoryview(self._mmap)
+
+    def json(self, json_decoder):
+        """
+        Args:
+            json_decoder (callable): decoder that takes bytes, see get_json_decoder
+
+        Returns:
+            list/dict, decoded body
+        """
+        buffer = self.getbuffer()
+        try:
+            return json_decoder(buffer)
+        except TypeError:
+            # the decoder does not accept memoryview, e.g. json.loads
+            return json_decoder(bytes(buffer))
+        finally:
+            buffer.release()
+
+    def iter_json_items(self, key: str = "data", chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            key (str): top-level key of the list, e.g. "data" for {"data": [...], ...}
+            chunk_size (int): number of bytes read at once
+
+        Yields:
+            items of the list, see iter_json_array_items
+        """
+        yield from iter_json_array_items(self.iter_chunks(chunk_size), key)
+
+    def close(self):
+        """
+        Releasing the memory buffer or removing the temporary file
+        """
+        if self._mmap is not None:
+            if isinstance(self._mmap, mmap.mmap):
+                self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self.iter_chunks()
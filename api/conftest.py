@@ -3,20 +3,38 @@ conftest.py file
 """
 # pylint: disable=duplicate-code
 
+import glob
+import json
 import os
+import shutil
+import tempfile
+import uuid
 from datetime import datetime
 
 import pytest
+import pytest_asyncio
 
 from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
 from python_pytest_selenium_web_api_test.api.api.public_api import PublicApi
+from python_pytest_selenium_web_api_test.api.api.async_public_api import AsyncPublicApi
+from python_pytest_selenium_web_api_test.api.api.response_cache import ResponseCache
+from python_pytest_selenium_web_api_test.api.api.shared_response_cache import SharedResponseCache
+from python_pytest_selenium_web_api_test.api.api.cassette import Cassette
+from python_pytest_selenium_web_api_test.api.api.stand_in_server import CatFactsStandInServer
+from python_pytest_selenium_web_api_test.api.api.retry import RetryBudget, RetryHandler, RetryPolicy
+from python_pytest_selenium_web_api_test.api.api.rate_limiter import RateLimiter
+from python_pytest_selenium_web_api_test.api.api.request_timing import TimingRecorder, summarize_timings
+from python_pytest_selenium_web_api_test.api.api.load_runner import (LoadRunner, compare_with_baseline, summary_to_html,
+                                                                     write_summary)
 
 
 log = Logger(__name__)
+RETRY_HANDLER_KEY = pytest.StashKey()
+RUN_ID_KEY = pytest.StashKey()
 
 
 @pytest.fixture(autouse=True, scope="session")
-def add_loggers() -> None:
+def add_loggers(pytestconfig) -> None:
     """
     The fixture to configure loggers
     It uses built-in pytest arguments to configure loggigng level and files
@@ -25,15 +43,45 @@ def add_loggers() -> None:
         log_level or --log-level general log level for capturing
         log_file_level or --log-file-level  level of log to be stored to a file. Usually lower than general log
         log_file or --log-file  path where logs will be saved
+        --log-queue-size, --log-queue-overflow  records are written to the file by a background thread;
+                                                all of them are written at the end of the session
+        --log-max-size, --log-rotate-interval, --log-compression  rotation of the log file, every pytest-xdist
+                                                                  worker writes its own file
+        --log-json  true - one JSON object per line with the test ID, worker ID, request ID, etc.
     """
     artifacts_folder_default = os.getenv("HOST_ARTIFACTS")
     log_level = "DEBUG"
     log_file_level = "DEBUG"
-    log_file = os.path.join(timestamped_path("pytest", "log", artifacts_folder_default))
+    # every pytest-xdist worker writes its own file, see tools/logger/merge_logs.py
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    log_file = os.path.join(timestamped_path(f"pytest-{worker}" if worker else "pytest", "log", artifacts_folder_default))
+    compression = pytestconfig.getoption('--log-compression')
+    rotation = {"max_bytes": int(float(pytestconfig.getoption('--log-max-size')) * 1024 * 1024),
+                "interval": float(pytestconfig.getoption('--log-rotate-interval')),
+                "compression": None if compression == 'none' else compression}
     log.setup_cli_handler(level=log_level)
-    log.setup_filehandler(level=log_file_level, file_name=log_file)
+    log.setup_filehandler(level=log_file_level, file_name=log_file,
+                          queue_size=int(pytestconfig.getoption('--log-queue-size')),
+                          overflow=pytestconfig.getoption('--log-queue-overflow'),
+                          rotation=rotation if rotation["max_bytes"] or rotation["interval"] else None,
+                          json_lines=pytestconfig.getoption('--log-json').lower() == 'true')
     log.info(f"General loglevel: '{log_level}', File: '{log_file_level}'")
     log.info(f"Test's logs will be stored: '{log_file}'")
+    yield
+    queue_stats = Logger.get_queue_stats()
+    if queue_stats is not None:
+        log.info(f"Log queue stats: {queue_stats}")
+    log.flush_queue()
+
+
+@pytest.fixture(autouse=True)
+def log_test_context(request) -> None:
+    """
+    The test ID is added to every log record of the test, see Logger.set_context
+    """
+    Logger.set_context(test_id=request.node.nodeid)
+    yield
+    Logger.set_context(test_id=None)
 
 
 def timestamped_path(file_name: str, file_ext: str, path_to_file: str = os.getenv("HOST_ARTIFACTS")) -> str:
@@ -50,24 +98,390 @@ def timestamped_path(file_name: str, file_ext: str, path_to_file: str = os.geten
     return os.path.join(path_to_file, f"{file_name}-{ts}.{file_ext}")
 
 
+def shared_state_path(config, shared: str, name: str, ext: str = "") -> str:
+    """
+    Args:
+        config (pytest.Config): config of the session, it keeps the run ID
+        shared (str): true - the state is shared by processes, auto - only by pytest-xdist workers, false - not shared
+        name (str): e.g. api-cache; the files are removed at the end of the run, see pytest_sessionfinish
+        ext (str): e.g. .sqlite
+
+    Returns:
+        str, path in the temp folder that is the same for all the workers of the run; None if the state is not shared
+    """
+    if shared.lower() == 'true' or (shared.lower() == 'auto' and hasattr(config, "workerinput")):
+        # every worker gets the same run ID from the controller, so a new run never inherits the state of the previous one
+        return os.path.join(tempfile.gettempdir(), f"{name}-{config.stash[RUN_ID_KEY]}{ext}")
+    return None
+
+
 def pytest_addoption(parser):
     """
     Supported options
     """
-    parser.addoption('--api-base', action='store', default='https://catfact.ninja', help='Base URL for API tests')
+    parser.addoption('--api-base', action='store', default='https://catfact.ninja',
+                     help='Base URL for API tests; stand-in - start the local stand-in server and use it')
+    parser.addoption('--stand-in-seed', action='store', default='0', help='Dataset seed of the stand-in server')
+    parser.addoption('--stand-in-latency', action='store', default='0',
+                     help='Seconds every response of the stand-in server is delayed for')
+    parser.addoption('--stand-in-error-rate', action='store', default='0',
+                     help='Share of the stand-in server responses that are 503, from 0 to 1')
+    parser.addoption('--stand-in-item-padding', action='store', default='0',
+                     help='Number of extra characters in every item returned by the stand-in server')
+    parser.addoption('--api-pool-size', action='store', default='10', help='Max number of kept-alive connections per host')
+    parser.addoption('--api-max-concurrency', action='store', default='20',
+                     help='Max number of requests in flight for the asyncio API client')
+    parser.addoption('--api-cache-ttl', action='store', default='0',
+                     help='Seconds GET responses are cached for and shared between test classes, 0 - no cache')
+    parser.addoption('--api-cache-shared', action='store', default='auto',
+                     help='Keep the response cache in an SQLite file shared by processes, identical requests in flight '
+                          'are coalesced (true/false), auto - only for pytest-xdist workers')
+    parser.addoption('--api-json-decoder', action='store', default='auto',
+                     help='JSON decoder for API responses (auto/orjson/simdjson/json), auto - the fastest installed one')
+    parser.addoption('--api-record-mode', action='store', default='none',
+                     help='none - real requests, record - save requests to the cassette, replay - serve them from it')
+    parser.addoption('--api-cassette', action='store',
+                     default=os.path.join(os.path.dirname(__file__), "cassettes", "public_api.cassette"),
+                     help='Cassette file path for --api-record-mode')
+    parser.addoption('--api-cassette-strict', action='store', default='true',
+                     help='Fail on requests that are not recorded in the cassette in replay mode (true/false)')
+    parser.addoption('--api-cassette-match-headers', action='store', default='',
+                     help='Comma-separated request headers that must match in replay mode, e.g. Accept')
+    parser.addoption('--api-cassette-ignore-params', action='store', default='',
+                     help='Comma-separated query params that are ignored when matching in replay mode')
+    parser.addoption('--api-retries', action='store', default='3',
+                     help='Max number of attempts of idempotent API requests that failed with 408/429/5xx or a network error, '
+                          '1 - no retries')
+    parser.addoption('--api-retry-backoff', action='store', default='0.2',
+                     help='Seconds, base of the exponential backoff with jitter between the attempts')
+    parser.addoption('--api-retry-budget', action='store', default='0.2',
+                     help='Share of the requests that can be retried in the session, e.g. 0.2 - 20%% (plus 10 retries)')
+    parser.addoption('--api-circuit-threshold', action='store', default='5',
+                     help='Consecutive failures after which requests to the host fail fast, 0 - no circuit breaker')
+    parser.addoption('--api-circuit-reset', action='store', default='30',
+                     help='Seconds requests to the host fail fast before a trial request')
+    parser.addoption('--api-rate-limit', action='store', default='0',
+                     help='Max API requests per second to a host, 0 - no client-side rate limit')
+    parser.addoption('--api-rate-limit-hosts', action='store', default='',
+                     help='Comma-separated max requests per second of particular hosts, e.g. catfact.ninja=2')
+    parser.addoption('--api-rate-limit-burst', action='store', default='0',
+                     help='Max burst of requests, 0 - equal to the rate')
+    parser.addoption('--api-rate-limit-shared', action='store', default='auto',
+                     help='Share the rate limit between processes through files (true/false), '
+                          'auto - only between pytest-xdist workers')
+    parser.addoption('--load-tests', action='store', default='false',
+                     help='Run the tests marked with @pytest.mark.load (true/false); they are skipped by default')
+    parser.addoption('--load-duration', action='store', default='',
+                     help='Seconds every load test runs for, overrides the duration of the load marker')
+    parser.addoption('--load-baseline-dir', action='store', default='',
+                     help='Folder with the saved load summaries, a run is compared with the summary of the same test')
+    parser.addoption('--load-save-baseline', action='store', default='false',
+                     help='Save the load summaries to --load-baseline-dir as the new baseline (true/false)')
+    parser.addoption('--load-tolerance', action='store', default='0.1',
+                     help='Allowed relative degradation against the load baseline, e.g. 0.1 - 10%%')
+    parser.addoption('--log-queue-size', action='store', default='0',
+                     help='Max number of log records waiting to be written to the log file by a background thread, '
+                          '0 - records are written by the test thread')
+    parser.addoption('--log-queue-overflow', action='store', default='block',
+                     help='What to do when the log queue is full: block - wait, drop-debug - drop DEBUG records, '
+                          'sample - keep every 10th DEBUG record while the queue is more than half full')
+    parser.addoption('--log-max-size', action='store', default='0',
+                     help='MB after which the log file is rotated, 0 - not rotated by size')
+    parser.addoption('--log-rotate-interval', action='store', default='0',
+                     help='Seconds after which the log file is rotated, 0 - not rotated by time')
+    parser.addoption('--log-compression', action='store', default='gzip',
+                     help='Compression of the rotated log files (gzip/zstd/none), they are compressed in background')
+    parser.addoption('--log-json', action='store', default='false',
+                     help='Write the log file as JSON lines with the test ID, worker ID, request ID and duration (true/false)')
+
+
+def pytest_configure(config):
+    """
+    Registering the markers; record mode of the cassette is refused under pytest-xdist, every worker would
+    overwrite the same cassette file
+    """
+    is_xdist = bool(os.getenv("PYTEST_XDIST_WORKER") or getattr(config.option, "numprocesses", None))
+    if config.getoption('--api-record-mode') == 'record' and is_xdist:
+        raise pytest.UsageError("--api-record-mode=record can't be used with pytest-xdist, record with one process")
+    config.addinivalue_line("markers",
+                            "load(duration=10, rps=None, concurrency=10): load test, run with --load-tests=true")
+    # ID of the shared state files of the run, pytest-xdist workers get it from the controller
+    workerinput = getattr(config, "workerinput", None)
+    config.stash[RUN_ID_KEY] = workerinput["api_run_id"] if workerinput else uuid.uuid4().hex
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+    Passing the run ID to a pytest-xdist worker
+    """
+    node.workerinput["api_run_id"] = node.config.stash[RUN_ID_KEY]
+
+
+def pytest_sessionfinish(session):
+    """
+    Removing the shared state files of the run (response cache, rate limiter buckets); the controller does it
+    after all the workers are finished
+    """
+    if hasattr(session.config, "workerinput"):
+        return
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f"api-*-{session.config.stash[RUN_ID_KEY]}*")):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """
+    Reporting the API retries, so time lost to transient errors is visible
+    """
+    handler = config.stash.get(RETRY_HANDLER_KEY, None)
+    if handler is not None:
+        terminalreporter.write_line(f"API retries: {handler.stats()}")
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Skipping the load tests unless --load-tests=true
+    """
+    if config.getoption('--load-tests').lower() == 'true':
+        return
+    skip_load = pytest.mark.skip(reason="load test, run with --load-tests=true")
+    for item in items:
+        if item.get_closest_marker("load"):
+            item.add_marker(skip_load)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):  # pylint: disable=unused-argument
+    """
+    Adding the request timings and the load summary section to the pytest-html report
+    """
+    outcome = yield
+    report = outcome.get_result()
+    api_timings = getattr(item, "api_timings", None)
+    if report.when == "call" and api_timings is not None:
+        report.api_timing_summary = summarize_timings(api_timings)
+    load_summary = getattr(item, "load_summary", None)
+    pytest_html = item.config.pluginmanager.getplugin("html")
+    if report.when != "call" or load_summary is None or pytest_html is None:
+        return
+    report_extras = getattr(report, "extras", [])
+    report_extras.append(pytest_html.extras.html(summary_to_html(load_summary, getattr(item, "load_regressions", None))))
+    report_extras.append(pytest_html.extras.json(load_summary, name="Load summary"))
+    report.extras = report_extras
+
+
+# pytest-html columns: (header, key of the request timing summary)
+API_TIMING_COLUMNS = (("API requests", "requests"),
+                      ("DNS+connect+TLS, ms", ("dns_ms", "connect_ms", "tls_ms")),
+                      ("TTFB, ms", "ttfb_ms"),
+                      ("Download, ms", "download_ms"),
+                      ("JSON decode, ms", "json_decode_ms"))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_table_header(cells):
+    """
+    Request timing columns of the pytest-html report
+    """
+    cells.extend(f"<th>{header}</th>" for header, _ in API_TIMING_COLUMNS)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_table_row(report, cells):
+    """
+    Sums of the request timings of the test, empty for tests without requests
+    """
+    summary = getattr(report, "api_timing_summary", None)
+    for _, keys in API_TIMING_COLUMNS:
+        if summary is None:
+            cells.append("<td></td>")
+            continue
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        cells.append(f"<td>{round(sum(summary[key] for key in keys), 3)}</td>")
 
 
 @pytest.fixture(scope='session')
 def api_base(pytestconfig):
     """
-    Get base URL from the fixture
+    Get base URL from the fixture; the local stand-in server is started for --api-base=stand-in
+    """
+    base_url = pytestconfig.getoption('--api-base').rstrip('/')
+    if base_url != 'stand-in':
+        yield base_url
+        return
+    server = CatFactsStandInServer(seed=int(pytestconfig.getoption('--stand-in-seed')),
+                                   latency=float(pytestconfig.getoption('--stand-in-latency')),
+                                   error_rate=float(pytestconfig.getoption('--stand-in-error-rate')),
+                                   item_padding=int(pytestconfig.getoption('--stand-in-item-padding')))
+    yield server.start()
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def response_cache(pytestconfig):
+    """
+    Response cache shared by all the API instances, None if --api-cache-ttl is 0
+    """
+    ttl = float(pytestconfig.getoption('--api-cache-ttl'))
+    if ttl <= 0:
+        yield None
+        return
+    shared_path = shared_state_path(pytestconfig, pytestconfig.getoption('--api-cache-shared'), "api-cache", ".sqlite")
+    cache = SharedResponseCache(shared_path, ttl=ttl) if shared_path else ResponseCache(ttl=ttl)
+    yield cache
+    log.info(f"Response cache stats: {cache.stats()}")
+
+
+@pytest.fixture(scope="session")
+def cassette(pytestconfig):
+    """
+    Cassette shared by all the API instances, None if --api-record-mode is none
+    """
+    mode = pytestconfig.getoption('--api-record-mode')
+    if mode == 'none':
+        yield None
+        return
+    _cassette = Cassette(pytestconfig.getoption('--api-cassette'),
+                         mode,
+                         match_headers=tuple(filter(None, pytestconfig.getoption('--api-cassette-match-headers').split(','))),
+                         ignore_params=tuple(filter(None, pytestconfig.getoption('--api-cassette-ignore-params').split(','))),
+                         strict=pytestconfig.getoption('--api-cassette-strict').lower() == 'true')
+    yield _cassette
+    _cassette.close()
+
+
+@pytest.fixture(scope="session")
+def retry_handler(pytestconfig):
+    """
+    Retries shared by all the API instances, so the retry budget and the circuit breakers are per session;
+    None if --api-retries is 1 and --api-circuit-threshold is 0
     """
-    return pytestconfig.getoption('--api-base').rstrip('/')
+    max_attempts = int(pytestconfig.getoption('--api-retries'))
+    failure_threshold = int(pytestconfig.getoption('--api-circuit-threshold'))
+    if max_attempts <= 1 and not failure_threshold:
+        yield None
+        return
+    handler = RetryHandler(RetryPolicy(max_attempts=max_attempts,
+                                       backoff_base=float(pytestconfig.getoption('--api-retry-backoff'))),
+                           RetryBudget(ratio=float(pytestconfig.getoption('--api-retry-budget'))),
+                           failure_threshold=failure_threshold,
+                           reset_timeout=float(pytestconfig.getoption('--api-circuit-reset')))
+    pytestconfig.stash[RETRY_HANDLER_KEY] = handler
+    yield handler
+    log.info(f"API retry stats: {handler.stats()}")
+
+
+@pytest.fixture(scope="session")
+def rate_limiter(pytestconfig):
+    """
+    Rate limiter shared by all the API instances and, for pytest-xdist, by all the workers;
+    None if neither --api-rate-limit nor --api-rate-limit-hosts is set
+    """
+    rate = float(pytestconfig.getoption('--api-rate-limit'))
+    host_rates = dict(item.split('=', 1) for item in pytestconfig.getoption('--api-rate-limit-hosts').split(',') if item)
+    if rate <= 0 and not host_rates:
+        yield None
+        return
+    shared_dir = shared_state_path(pytestconfig, pytestconfig.getoption('--api-rate-limit-shared'), "api-rate-limit")
+    limiter = RateLimiter(rate if rate > 0 else None,
+                          capacity=float(pytestconfig.getoption('--api-rate-limit-burst')) or None,
+                          host_rates={host: float(host_rate) for host, host_rate in host_rates.items()},
+                          shared_dir=shared_dir)
+    yield limiter
+    log.info(f"API rate limiter stats: {limiter.stats()}")
+
+
+@pytest.fixture(scope="session")
+def timing_recorder():
+    """
+    Collector of the request timings, they're exported to the api-timings-<timestamp>.jsonl file in the artifacts folder
+    """
+    recorder = TimingRecorder(timestamped_path("api-timings", "jsonl", os.getenv("HOST_ARTIFACTS")))
+    yield recorder
+    log.info(f"Request timings are saved: {recorder.path}")
+
+
+# pylint: disable=redefined-outer-name
+@pytest.fixture(autouse=True)
+def collect_api_timings(request, timing_recorder):
+    """
+    Collecting the request timings of every test
+    """
+    request.node.api_timings = timing_recorder.start_test(request.node.nodeid)
+    yield
+    summary = timing_recorder.finish_test()
+    if summary["requests"]:
+        log.info(f"Request timings of {request.node.nodeid}: {summary}")
 
 
 @pytest.fixture(autouse=True, scope="class")
-def setup_api_testing(request):
+def setup_api_testing(request, pytestconfig, api_base, response_cache, cassette, timing_recorder, retry_handler,
+                      rate_limiter):
+    """
+    Setting API instance for testing; kept-alive connections are closed after the test class is finished
+    """
+    pool_maxsize = int(pytestconfig.getoption('--api-pool-size'))
+    json_decoder = pytestconfig.getoption('--api-json-decoder')
+    request.cls.public_api = PublicApi(api_base,
+                                       pool_maxsize=pool_maxsize,
+                                       response_cache=response_cache,
+                                       json_decoder=json_decoder,
+                                       cassette=cassette,
+                                       retry_handler=retry_handler,
+                                       rate_limiter=rate_limiter)
+    request.cls.public_api.timing_recorder = timing_recorder
+    yield
+    request.cls.public_api.close()
+
+
+@pytest.fixture
+def run_load(request, pytestconfig):
+    """
+    Running load with the parameters of the load marker, e.g.:
+        @pytest.mark.load(duration=5, rps=50, concurrency=8)
+        def test_facts_load(self, run_load):
+            summary = run_load(lambda: self.public_api.get_facts(page=1))
+    The JSON summary is saved to the artifacts folder and compared with the baseline if --load-baseline-dir is set
+    """
+    marker = request.node.get_closest_marker("load")
+    params = {"duration": 10, "rps": None, "concurrency": 10, **(marker.kwargs if marker else {})}
+    if pytestconfig.getoption('--load-duration'):
+        params["duration"] = float(pytestconfig.getoption('--load-duration'))
+    baseline_dir = pytestconfig.getoption('--load-baseline-dir')
+    baseline_path = os.path.join(baseline_dir, f"{request.node.name}.json") if baseline_dir else None
+
+    def _run_load(request_func) -> dict:
+        summary = LoadRunner(request_func, **params).run()
+        request.node.load_summary = summary
+        write_summary(summary, timestamped_path(f"load-{request.node.name}", "json", os.getenv("HOST_ARTIFACTS")))
+        if baseline_path is None:
+            return summary
+        if pytestconfig.getoption('--load-save-baseline').lower() == 'true':
+            write_summary(summary, baseline_path)
+        elif os.path.exists(baseline_path):
+            with open(baseline_path, encoding="utf-8") as baseline_file:
+                request.node.load_regressions = compare_with_baseline(summary, json.load(baseline_file),
+                                                                      float(pytestconfig.getoption('--load-tolerance')))
+            assert not request.node.load_regressions, f"Load regressions: {request.node.load_regressions}"
+        return summary
+
+    return _run_load
+
+
+@pytest_asyncio.fixture
+async def async_public_api(pytestconfig, api_base, cassette):
     """
-    Setting API instance for testing
+    Asyncio API instance for the async tests (marked with @pytest.mark.asyncio)
     """
-    request.cls.public_api = PublicApi()
+    pool_maxsize = int(pytestconfig.getoption('--api-pool-size'))
+    max_concurrency = int(pytestconfig.getoption('--api-max-concurrency'))
+    json_decoder = pytestconfig.getoption('--api-json-decoder')
+    async with AsyncPublicApi(api_base,
+                              pool_maxsize=pool_maxsize,
+                              max_concurrency=max_concurrency,
+                              json_decoder=json_decoder,
+                              cassette=cassette) as api:
+        yield api
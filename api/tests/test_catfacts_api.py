@@ -2,8 +2,20 @@
 API tests
 """
 
+import asyncio
+import time
+
 import pytest
 
+from python_pytest_selenium_web_api_test.api.api.api_base import ApiError
+from python_pytest_selenium_web_api_test.api.api.cassette import Cassette
+from python_pytest_selenium_web_api_test.api.api.public_api import PublicApi
+from python_pytest_selenium_web_api_test.api.api.retry import RetryHandler, RetryPolicy
+from python_pytest_selenium_web_api_test.api.api.rate_limiter import RateLimiter
+from python_pytest_selenium_web_api_test.api.api.shared_response_cache import SharedResponseCache
+from python_pytest_selenium_web_api_test.api.api.public_api_schemas import BREEDS_PAGE_SCHEMA, BREEDS_SCHEMA
+from python_pytest_selenium_web_api_test.api.api.stand_in_server import CatFactsStandInServer
+
 
 @pytest.mark.public_api
 class TestApi:
@@ -35,18 +47,44 @@ class TestApi:
         assert body.get('current_page') == page
         assert len(body.get('data', [])) <= limit
 
+    def test_pagination_batch(self):
+        """
+        Get several /facts pages in one batch, check if every page is returned and contains not more than limit items
+        """
+        limit = 5
+        specs = [{"method": "get", "uri": "/facts", "query_params": {'page': page, 'limit': limit}} for page in range(1, 11)]
+        results = self.public_api.make_requests(specs)
+        for result in results:
+            assert result.ok, result.error
+            assert result.response.get('current_page') == result.spec["query_params"]["page"]
+            assert len(result.response.get('data', [])) <= limit
+
+    def test_iter_facts_whole_collection(self):
+        """
+        Iterate over all the /facts pages, check if the number of facts equals to 'total' from the 1st page
+        """
+        total = self.public_api.get_facts(page=1, limit=1).get('total')
+        facts = list(self.public_api.iter_facts(limit=50, prefetch=4))
+        assert len(facts) == total
+        assert all('fact' in fact for fact in facts)
+
     def test_breeds_schema(self):
         """
-        Get /breads, check if status code == 200, then check if response contains the list
+        Get /breads, check if status code == 200, then check if the whole response matches the schema:
+        every item contains 'breed', 'country', 'origin', 'coat', 'pattern' strings
         """
-        resp = self.public_api.make_request("get", "/breeds", is_return_resp_obj=True)
+        resp = self.public_api.make_request("get", "/breeds", is_return_resp_obj=True,
+                                            schema=BREEDS_PAGE_SCHEMA, raise_error_if_failed=True)
         assert resp.status_code == 200
-        body = resp.json()
-        assert 'data' in body and isinstance(body['data'], list)
-        required = {'breed','country','origin','coat','pattern'}
-        # Assert at least one item and all required keys exist on each item
-        for item in body['data'][:10]:  # sample first 10
-            assert required.issubset(item.keys())
+        assert resp.json()['data']
+
+    def test_all_breeds_schema(self):
+        """
+        Iterate over all the /breeds pages, check if every breed matches the schema
+        """
+        breeds = list(self.public_api.iter_breeds(limit=50))
+        assert breeds
+        BREEDS_SCHEMA.check(breeds)
 
     def test_invalid_limit_handled(self):
         """
@@ -60,3 +98,146 @@ class TestApi:
         if resp.status_code == 200:
             body = resp.json()
             assert 'data' in body
+
+    def test_retries_recover_from_injected_errors(self):
+        """
+        Get /facts from the local stand-in server that answers 503 to 30% of requests,
+        check if every request succeeds with retries and the retries are counted
+        """
+        retry_handler = RetryHandler(RetryPolicy(max_attempts=6, backoff_base=0.01))
+        with CatFactsStandInServer(seed=1, error_rate=0.3) as server, \
+                PublicApi(server.base_url, retry_handler=retry_handler) as public_api:
+            for page in range(1, 11):
+                resp = public_api.make_request("get", "/facts", query_params={'page': page}, is_return_resp_obj=True)
+                assert resp.status_code == 200
+        stats = retry_handler.stats()
+        assert stats["retries"] > 0
+        assert stats["recovered"] > 0 and stats["gave_up"] == 0
+
+    def test_rate_limiter_keeps_rate(self):
+        """
+        Get /facts from the local stand-in server in a batch with the rate limit of 50 requests per second,
+        check if 25 requests take at least 0.4s (the first token is available at once) and all of them succeed
+        """
+        rate_limiter = RateLimiter(rate=50, capacity=1)
+        specs = [{"method": "get", "uri": "/facts", "query_params": {'page': page}} for page in range(1, 26)]
+        with CatFactsStandInServer() as server, PublicApi(server.base_url, rate_limiter=rate_limiter) as public_api:
+            started = time.perf_counter()
+            results = public_api.make_requests(specs, max_workers=5)
+            elapsed = time.perf_counter() - started
+        assert all(result.ok for result in results)
+        assert elapsed >= 24 / 50 - 0.05
+        assert rate_limiter.stats()["throttled"] > 0
+
+    def test_shared_cache_coalesces_identical_requests(self, tmp_path):
+        """
+        Get the same /breeds page 8 times concurrently from the slow local stand-in server through the shared cache,
+        check if only one request is made and the others get its response
+        """
+        cache = SharedResponseCache(str(tmp_path / "api-cache.sqlite"), ttl=60)
+        specs = [{"method": "get", "uri": "/breeds", "query_params": {'page': 1}}] * 8
+        with CatFactsStandInServer(latency=0.2) as server, PublicApi(server.base_url, response_cache=cache) as public_api:
+            results = public_api.make_requests(specs, max_workers=8)
+        assert all(result.ok for result in results)
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["coalesced"] + stats["hits"] == 7
+
+    def test_download_spools_large_body(self):
+        """
+        Download a large /facts page from the local stand-in server with a small spool size,
+        check if the body is spooled to a file, its size and sha256 are checked and its items are parsed from the file
+        """
+        with CatFactsStandInServer(item_padding=4096) as server, PublicApi(server.base_url) as public_api:
+            with public_api.download("get", "/facts", query_params={'limit': 100}, spool_size=64 * 1024) as body:
+                assert body.status_code == 200
+                assert not body.is_in_memory
+                assert body.size == int(body.headers["Content-Length"]) > 100 * 4096
+                assert len(list(body.iter_json_items("data"))) == 100
+                assert body.json(public_api.json_decoder)["per_page"] == 100
+                expected_sha256 = body.sha256
+            with public_api.download("get", "/facts", query_params={'limit': 100},
+                                     expected_sha256=expected_sha256) as body:
+                assert body.is_in_memory
+            with pytest.raises(ApiError):
+                public_api.download("get", "/facts", query_params={'limit': 100}, max_size=100 * 4096)
+
+    def test_streaming_requests_replayed_from_cassette(self, tmp_path):
+        """
+        Record a /facts page from the local stand-in server, then replay it with the server stopped through
+        the streaming requests, check if the items and the downloaded body are the recorded ones
+        """
+        cassette_path = str(tmp_path / "streaming.cassette")
+        query_params = {'limit': 20}
+        with CatFactsStandInServer() as server, \
+                PublicApi(server.base_url, cassette=Cassette(cassette_path, "record")) as public_api:
+            recorded = public_api.make_request("get", "/facts", query_params=query_params)
+            public_api.cassette.close()
+        with PublicApi(server.base_url, cassette=Cassette(cassette_path, "replay")) as public_api:
+            assert list(public_api.iter_json_items("get", "/facts", query_params=query_params)) == recorded['data']
+            with public_api.download("get", "/facts", query_params=query_params) as body:
+                assert body.status_code == 200
+                assert list(body.iter_json_items("data")) == recorded['data']
+            public_api.cassette.close()
+
+    def test_breeds_snapshot_diff(self, tmp_path):
+        """
+        Snapshot /breeds of the local stand-in server, then remove, change and add breeds and snapshot them again,
+        check if the diff with the previous snapshot reports exactly these records and the new field
+        """
+        with CatFactsStandInServer() as server, PublicApi(server.base_url) as public_api:
+            assert public_api.diff_with_previous_snapshot("breeds", str(tmp_path), limit=25) is None
+            breeds = server.dataset["breeds"]
+            removed = breeds.pop(0)
+            old_coat = breeds[10]["coat"]
+            breeds[10] = {**breeds[10], "coat": "Wire"}
+            breeds.append({**breeds[20], "breed": "Snapshot Cat", "rare": True})
+            diff = public_api.diff_with_previous_snapshot("breeds", str(tmp_path), limit=25)
+        assert (diff["added"], diff["removed"], diff["changed"]) == (1, 1, 1)
+        assert diff["examples"]["removed"] == [f'"{removed["breed"]}"']
+        assert diff["examples"]["changed"] == [{"key": f'"{breeds[10]["breed"]}"', "fields": {"coat": [old_coat, "Wire"]}}]
+        assert diff["schema"]["added_fields"] == ["rare"]
+
+
+@pytest.mark.public_api
+class TestAsyncApi:
+    """
+    Asyncio API tests
+    """
+
+    @pytest.mark.asyncio
+    async def test_get_facts_pages_concurrently(self, async_public_api):
+        """
+        Get several /facts pages concurrently, check if every response contains the requested page
+        """
+        pages = [1, 2, 3, 4, 5]
+        bodies = await asyncio.gather(*(async_public_api.get_facts(page=page, limit=5) for page in pages))
+        for page, body in zip(pages, bodies):
+            assert body.get('current_page') == page
+            assert len(body.get('data', [])) <= 5
+
+    @pytest.mark.asyncio
+    async def test_breeds_schema(self, async_public_api):
+        """
+        Get /breeds with the asyncio client, check if the response matches the schema
+        """
+        resp = await async_public_api.make_request("get", "/breeds", query_params={'limit': 5}, is_return_resp_obj=True,
+                                                   schema=BREEDS_PAGE_SCHEMA, raise_error_if_failed=True)
+        assert resp.status_code == 200
+        assert len(resp.json()['data']) <= 5
+
+
+@pytest.mark.public_api
+class TestApiLoad:
+    """
+    API load tests, they're skipped unless --load-tests=true
+    """
+
+    @pytest.mark.load(duration=5, rps=50, concurrency=8)
+    def test_get_facts_under_load(self, run_load):
+        """
+        Get /facts at 50 requests per second, check if there are no errors and the target rate is reached
+        """
+        summary = run_load(lambda: self.public_api.make_request("get", "/facts", is_return_resp_obj=True))
+        assert summary["error_count"] == 0, summary["errors"]
+        assert summary["throughput_rps"] >= 0.9 * 50
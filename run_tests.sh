@@ -10,7 +10,12 @@ if [[ $? -ne 0 ]]; then
   return 1
 fi
 
-python3 -m pytest -v --tb=short -s --reruns 2 --reruns-delay 2 --html=$HOST_ARTIFACTS/test_report_$(date +%Y-%m-%d_%H-%M-%S).html
+# API requests are retried by the client (--api-retries), failed API tests are not rerun on top of the retries
+RERUN_ARGS="--reruns 2 --reruns-delay 2"
+if [[ "$1" == "api" ]]; then
+  RERUN_ARGS=""
+fi
+python3 -m pytest -v --tb=short -s $RERUN_ARGS --html=$HOST_ARTIFACTS/test_report_$(date +%Y-%m-%d_%H-%M-%S).html
 # Now, let's deactivate venv
 deactivate
 # Returning to the original project path to be able to run the test again with new changes, if there are any
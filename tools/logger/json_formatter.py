@@ -0,0 +1,45 @@
+"""
+JSON-lines log format, an alternative to Logger.log_format that a log shipper ingests without regex parsing
+"""
+
+import json
+import logging
+import os
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record, e.g.
+        {"ts": "2025-01-01 12:00:00,123", "level": "DEBUG", "logger": "test.api.api.api_base", "message": "...",
+         "worker_id": "gw0", "test_id": "tests/test_catfacts_api.py::TestApi::test_pagination[1-5]",
+         "request_id": "...", "duration_ms": 12.5}
+    "ts" goes first in the asctime format, so JSON and text logs are merged the same way, see merge_logs.py;
+    test_id and the other context fields come from Logger.set_context, request_id etc. from the Logger call
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.worker_id = os.getenv("PYTEST_XDIST_WORKER", "main")
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Args:
+            record (LogRecord): record to format
+
+        Returns:
+            str, JSON object without line breaks
+        """
+        entry = {"ts": self.formatTime(record),
+                 "level": record.levelname,
+                 "logger": record.name,
+                 "message": record.getMessage(),
+                 "worker_id": self.worker_id,
+                 "thread": record.threadName,
+                 "func": f"{record.module}.{record.funcName}:{record.lineno}"}
+        entry.update(getattr(record, "context", None) or {})
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
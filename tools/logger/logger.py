@@ -7,14 +7,21 @@ import logging.config
 import os
 import sys
 
+from python_pytest_selenium_web_api_test.tools.logger.json_formatter import JsonLinesFormatter
+from python_pytest_selenium_web_api_test.tools.logger.queued_handler import BoundedQueueHandler
+from python_pytest_selenium_web_api_test.tools.logger.rotating_handler import RotatingCompressedFileHandler
+
 
 class Logger:
     """
     Logger
     """
     __file_handler = None
+    __queue_handler = None
     __cli_handler = None
     __loggers = []  # links to all created loggers
+    # fields of every record, e.g. the test ID, see set_context; it's replaced, not changed, so records keep their own
+    __extra = {"context": {}}
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
     def __init__(self, logger_name: str):
@@ -33,29 +40,66 @@ class Logger:
         if self.__logger not in Logger.__loggers:
             Logger.__loggers.append(self.__logger)
 
-    def info(self, message: str):
+    def __log(self, level: int, message, args: tuple, fields: dict):
+        """
+        Args:
+            level (int): e.g. logging.DEBUG
+            message (str/callable): %-format string, or a callable that returns the message; it's called
+                                    only if the record of the level is handled
+            args (tuple): arguments of the format string, it's formatted only if the record is handled
+            fields (dict): extra fields of the record, e.g. request_id, see JsonLinesFormatter
+        """
+        if callable(message):
+            if not self.__logger.isEnabledFor(level):
+                return
+            message = message()
+        extra = {**Logger.__extra, "fields": fields} if fields else Logger.__extra
+        # stacklevel points the record to the caller of info/debug/...
+        self.__logger.log(level, message, *args, extra=extra, stacklevel=3)
+
+    def info(self, message, *args, **fields):
+        """
+        INFO log line, e.g. log.info("Page %s is loaded", url) or log.info(lambda: build_message(), duration_ms=10)
+        """
+        self.__log(logging.INFO, message, args, fields)
+
+    def debug(self, message, *args, **fields):
         """
-        INFO log line
+        DEBUG log line, see info
         """
-        self.__logger.info(message)
+        self.__log(logging.DEBUG, message, args, fields)
 
-    def debug(self, message: str):
+    def error(self, message, *args, **fields):
         """
-        DEBUG log line
+        ERROR log line, see info
         """
-        self.__logger.debug(message)
+        self.__log(logging.ERROR, message, args, fields)
 
-    def error(self, message: str):
+    def warning(self, message, *args, **fields):
         """
-        ERROR log line
+        WARNING log line, see info
         """
-        self.__logger.error(message)
+        self.__log(logging.WARNING, message, args, fields)
 
-    def warning(self, message: str):
+    @staticmethod
+    def set_context(**fields):
         """
-        WARNING log line
+        Fields added to every next record of this process, e.g. Logger.set_context(test_id=request.node.nodeid);
+        a field with None value is removed
         """
-        self.__logger.warning(message)
+        context = {**Logger.__extra["context"], **fields}
+        Logger.__extra = {"context": {name: value for name, value in context.items() if value is not None}}
+
+    def is_enabled_for(self, level) -> bool:
+        """
+        Check if a log line of the level will be handled, so expensive messages are built only when needed
+
+        Args:
+            level (str/int): level name or number, e.g. DEBUG
+        """
+        if isinstance(level, str):
+            level = logging.getLevelName(level.upper())
+        return self.__logger.isEnabledFor(level)
 
     def __update_handler(self, logr, handlr):
         """
@@ -73,20 +117,23 @@ class Logger:
         else:
             logr.addHandler(handlr)
 
-    def __get_file_handler(self, level: str, file_name: str):
+    def __get_file_handler(self, level: str, file_name: str, rotation: dict = None, json_lines: bool = False):
         """
         Method to create file handler or get it from a cash
 
         Args:
             level (str): level name
             file_name (str): logger file name
+            rotation (dict): keyword arguments of RotatingCompressedFileHandler, None - the file is not rotated
+            json_lines (bool): True - JsonLinesFormatter, False - log_format
 
         Returns:
             handler
         """
         if not Logger.__file_handler:
-            file_handler = logging.FileHandler(file_name)
-            formatter = logging.Formatter(self.log_format)
+            file_handler = RotatingCompressedFileHandler(file_name, **rotation) if rotation \
+                else logging.FileHandler(file_name)
+            formatter = JsonLinesFormatter() if json_lines else logging.Formatter(self.log_format)
             file_handler.setFormatter(formatter)
             file_handler.setLevel(level)
             file_handler.name = "main_log_file"
@@ -125,7 +172,33 @@ class Logger:
         self.__update_handler(root_logger, cli_handler)
         root_logger.setLevel(min(cli_handler.level, root_logger.level))
 
-    def setup_filehandler(self, file_name: str, level: str = "DEBUG"):
+    def __get_queue_handler(self, file_handler, queue_size: int, overflow: str):
+        """
+        Method to create the queue handler in front of the file handler or get it from a cash
+
+        Args:
+            file_handler (handler): handler that writes the records in the background thread
+            queue_size (int): max number of records waiting to be written
+            overflow (str): see BoundedQueueHandler.OVERFLOW_POLICIES
+
+        Returns:
+            handler
+        """
+        if not Logger.__queue_handler:
+            queue_handler = BoundedQueueHandler([file_handler], queue_size, overflow)
+            queue_handler.setLevel(file_handler.level)
+            # the same name as the file handler, so the level is updated the same way
+            queue_handler.name = file_handler.name
+            Logger.__queue_handler = queue_handler
+        return Logger.__queue_handler
+
+    def setup_filehandler(self,
+                          file_name: str,
+                          level: str = "DEBUG",
+                          queue_size: int = 0,
+                          overflow: str = "block",
+                          rotation: dict = None,
+                          json_lines: bool = False):
         """
         Method to setup file handler for particular logger or all available
         If file handler was setup for all loggers then all new will be created with the same config
@@ -133,7 +206,12 @@ class Logger:
         Args:
             file_name (str): path where logs should be stored
             level: (str/int): level for the file handler
-            logger_name (str): name of logger file handler to be applied for
+            queue_size (int): 0 - records are written in the calling thread; otherwise they're put to a queue
+                              of this size and written by a background thread, see BoundedQueueHandler
+            overflow (str): what to do when the queue is full: block, drop-debug or sample
+            rotation (dict): e.g. {"max_bytes": 100 * 1024 * 1024, "interval": 3600, "compression": "gzip"},
+                             see RotatingCompressedFileHandler; None - the file is not rotated
+            json_lines (bool): True - one JSON object per record with the context fields, see JsonLinesFormatter
         """
         root_logger = logging.getLogger()
         if not os.path.exists(os.path.dirname(file_name)):
@@ -141,7 +219,34 @@ class Logger:
 
         loggers_list = []
         loggers_list.append(root_logger)
-        file_handler = self.__get_file_handler(level, file_name)
+        file_handler = self.__get_file_handler(level, file_name, rotation, json_lines)
+        if queue_size:
+            file_handler = self.__get_queue_handler(file_handler, queue_size, overflow)
         for logger in loggers_list:
             self.__update_handler(logger, file_handler)
         root_logger.setLevel(min(file_handler.level, root_logger.level))
+
+    @staticmethod
+    def get_queue_stats():
+        """
+        Returns:
+            dict, see BoundedQueueHandler.stats; None if records are not queued
+        """
+        return Logger.__queue_handler.stats() if Logger.__queue_handler else None
+
+    def flush_queue(self):
+        """
+        Writing all the queued records and stopping the background thread, e.g. at the end of the session;
+        the file handler writes the next records in the calling thread
+        """
+        queue_handler = Logger.__queue_handler
+        if not queue_handler:
+            return
+        Logger.__queue_handler = None
+        root_logger = logging.getLogger()
+        # the queued records are written before the file handler is attached, so a record of another thread
+        # can't be written ahead of the older queued ones or twice
+        root_logger.removeHandler(queue_handler)
+        queue_handler.close()
+        root_logger.addHandler(Logger.__file_handler)
+        self.__logger.debug("Log queue is flushed; stats: %s", queue_handler.stats())
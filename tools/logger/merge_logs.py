@@ -0,0 +1,133 @@
+"""
+Streaming merge of the per-worker log files into one view ordered by timestamp
+
+Every file (with its rotated segments, see rotating_handler.py) is read record by record and the records of
+all the files are interleaved with heapq.merge, so only one record per file is kept in memory.
+A record starts with the asctime of Logger.log_format, e.g. "2025-01-01 12:00:00,123 - ...", or it's a JSON line
+of JsonLinesFormatter, e.g. {"ts": "2025-01-01 12:00:00,123", ...}; lines that don't start with a timestamp
+(tracebacks, multi-line messages) belong to the previous record.
+
+    python -m python_pytest_selenium_web_api_test.tools.logger.merge_logs --folder artifacts -o merged.log
+"""
+
+import argparse
+import heapq
+import os
+import re
+import sys
+
+from python_pytest_selenium_web_api_test.tools.logger.rotating_handler import SEGMENT_PATTERN, open_log_file
+
+
+TIMESTAMP_PATTERN = re.compile(r'^(?:\{"ts": ")?(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}[,.]\d{3})')
+DEFAULT_PATTERN = re.compile(r"^pytest-.*\.log$")
+
+
+def group_log_files(paths: list) -> dict:
+    """
+    Args:
+        paths (list): active log files and rotated segments
+
+    Returns:
+        dict, {active file path: [segments from the oldest to the newest and the active file if it exists]}
+    """
+    groups = {}
+    for path in paths:
+        folder, file_name = os.path.split(path)
+        match = SEGMENT_PATTERN.match(file_name)
+        base = os.path.join(folder, match.group("base")) if match else path
+        number = int(match.group("number")) if match else sys.maxsize
+        segments = groups.setdefault(base, {})
+        # an uncompressed segment that is being compressed is read once
+        segments.setdefault(number, path)
+    return {base: [segments[number] for number in sorted(segments)] for base, segments in groups.items()}
+
+
+def find_log_files(folder: str, pattern=DEFAULT_PATTERN) -> list:
+    """
+    Args:
+        folder (str): e.g. the artifacts folder
+        pattern (re.Pattern): name of the active log files, rotated segments of these files are found too
+
+    Returns:
+        list, paths
+    """
+    paths = []
+    for file_name in sorted(os.listdir(folder)):
+        match = SEGMENT_PATTERN.match(file_name)
+        if pattern.match(match.group("base") if match else file_name):
+            paths.append(os.path.join(folder, file_name))
+    return paths
+
+
+def iter_records(paths: list, label: str = ""):
+    """
+    Args:
+        paths (list): segments of one log file in the order they were written
+        label (str): prefix of every record, e.g. the worker log file name
+
+    Yields:
+        tuple, (timestamp, label, record text with all its lines)
+    """
+    timestamp, lines = "", []
+    for path in paths:
+        with open_log_file(path) as log_file:
+            for line in log_file:
+                match = TIMESTAMP_PATTERN.match(line)
+                if match and lines:
+                    yield timestamp, label, "".join(lines)
+                    lines = []
+                if match:
+                    timestamp = match.group(1).replace(".", ",")
+                lines.append(line if line.endswith("\n") else f"{line}\n")
+    if lines:
+        yield timestamp, label, "".join(lines)
+
+
+def merge_logs(paths: list, output, with_labels: bool = True) -> int:
+    """
+    Args:
+        paths (list): active log files and their rotated segments, e.g. of all the pytest-xdist workers
+        output (file): text file to write the merged records to
+        with_labels (bool): True - every record is prefixed with [<log file name>]
+
+    Returns:
+        int, number of written records
+    """
+    streams = []
+    for base, segments in group_log_files(paths).items():
+        label = f"[{os.path.basename(base)}] " if with_labels else ""
+        streams.append(iter_records(segments, label))
+    count = 0
+    # the records of every file are already in the timestamp order
+    for _, label, record in heapq.merge(*streams, key=lambda item: item[0]):
+        output.write(f"{label}{record}")
+        count += 1
+    return count
+
+
+def main():
+    """
+    Merging the log files from the command line
+    """
+    parser = argparse.ArgumentParser(description="Merge of the per-worker log files ordered by timestamp")
+    parser.add_argument("files", nargs="*", help="log files and rotated segments, default - all pytest-*.log in --folder")
+    parser.add_argument("--folder", default=os.getenv("HOST_ARTIFACTS", "."), help="folder with the log files")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN.pattern, help="regex of the active log file names")
+    parser.add_argument("-o", "--output", default="-", help="merged log path, - for stdout")
+    parser.add_argument("--no-labels", action="store_true", help="don't prefix the records with the log file name")
+    args = parser.parse_args()
+
+    paths = args.files or find_log_files(args.folder, re.compile(args.pattern))
+    if not paths:
+        parser.error(f"no log files in {args.folder}")
+    if args.output == "-":
+        merge_logs(paths, sys.stdout, not args.no_labels)
+        return
+    with open(args.output, "w", encoding="utf-8") as output:
+        count = merge_logs(paths, output, not args.no_labels)
+    print(f"{count} records of {len(group_log_files(paths))} log files are merged: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Queue handler that moves file I/O of log records to a background writer thread
+"""
+
+import itertools
+import logging
+import logging.handlers
+import queue
+import threading
+
+
+class _WriterListener(logging.handlers.QueueListener):
+    """
+    QueueListener whose stop sentinel waits for a free slot, so stopping never fails on a full queue
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Records are put to a bounded queue and written by the handlers of a background thread;
+    when the queue is full the overflow policy decides:
+        block - the caller waits for a free slot, nothing is lost
+        drop-debug - DEBUG records are dropped, the others wait
+        sample - DEBUG records are dropped when the queue is full, and only every sample_every-th of them
+                 is kept while the queue is more than half full; the others wait
+    """
+    OVERFLOW_POLICIES = ("block", "drop-debug", "sample")
+    DEFAULT_QUEUE_SIZE = 10000
+    DEFAULT_SAMPLE_EVERY = 10
+
+    def __init__(self,
+                 handlers: list,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 overflow: str = "block",
+                 sample_every: int = DEFAULT_SAMPLE_EVERY):
+        """
+        Args:
+            handlers (list): handlers that write the records in the background thread, e.g. [FileHandler]
+            queue_size (int): max number of records waiting to be written
+            overflow (str): one of OVERFLOW_POLICIES
+            sample_every (int): for the sample policy, one of sample_every DEBUG records is kept under pressure
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log queue overflow policy '{overflow}', use one of {self.OVERFLOW_POLICIES}")
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.handlers = handlers
+        self.overflow = overflow
+        self.sample_every = max(1, sample_every)
+        self._sample_counter = itertools.count()
+        self._stats_lock = threading.Lock()
+        self._stats = {"queued": 0, "dropped": 0, "blocked": 0}
+        self._listener = _WriterListener(self.queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+
+    def _count(self, event: str):
+        with self._stats_lock:
+            self._stats[event] += 1
+
+    def _is_dropped(self, record: logging.LogRecord) -> bool:
+        """
+        Args:
+            record (LogRecord): record to enqueue
+
+        Returns:
+            bool, True if the record is dropped by the overflow policy
+        """
+        if self.overflow == "block" or record.levelno > logging.DEBUG:
+            return False
+        size = self.queue.qsize()
+        if size >= self.queue.maxsize:
+            return True
+        if self.overflow == "sample" and size >= self.queue.maxsize // 2:
+            return next(self._sample_counter) % self.sample_every != 0
+        return False
+
+    def emit(self, record: logging.LogRecord):
+        """
+        Args:
+            record (LogRecord): record to write, it's formatted in the caller thread and written in the background one
+        """
+        try:
+            if self._is_dropped(record):
+                self._count("dropped")
+                return
+            record = self.prepare(record)
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                if self._is_dropped(record):
+                    self._count("dropped")
+                    return
+                self._count("blocked")
+                self.queue.put(record)
+            self._count("queued")
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handleError(record)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict, e.g. {"queued": 1000, "dropped": 0, "blocked": 2, "pending": 10}; blocked - records that waited
+            for a free slot
+        """
+        with self._stats_lock:
+            return {**self._stats, "pending": self.queue.qsize()}
+
+    def flush(self):
+        """
+        Waiting until all the queued records are written
+        """
+        if self._listener._thread is not None:  # pylint: disable=protected-access
+            # the listener marks every record as done after it's handled
+            self.queue.join()
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self):
+        """
+        Writing all the queued records and stopping the background thread; called by logging.shutdown() at exit too
+        """
+        if self._listener._thread is not None:  # pylint: disable=protected-access
+            self._listener.stop()
+        for handler in self.handlers:
+            handler.flush()
+        super().close()
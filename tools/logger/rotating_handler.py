@@ -0,0 +1,176 @@
+"""
+Log file handler with size/time rotation; rotated segments are compressed by a background thread
+
+The active file is <name>.log, rotated segments are <name>.log.001.gz, <name>.log.002.gz, ... (.zst for zstd),
+so the segments of one file sort in the order they were written, see merge_logs.py
+"""
+
+import gzip
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# rotated segment of a log file: <base>.<number>[.<compression extension>]
+SEGMENT_PATTERN = re.compile(r"^(?P<base>.+?)\.(?P<number>\d{3,})(?P<ext>\.gz|\.zst)?$")
+
+
+def _open_gzip(path: str, mode: str):
+    """
+    Args:
+        path (str): file path
+        mode (str): e.g. wb or rt
+
+    Returns:
+        file object
+    """
+    return gzip.open(path, mode, compresslevel=6) if "w" in mode else gzip.open(path, mode, encoding="utf-8")
+
+
+def _open_zstd(path: str, mode: str):
+    """
+    Args:
+        path (str): file path
+        mode (str): e.g. wb or rt
+
+    Returns:
+        file object; ImportError if zstandard is not installed
+    """
+    import zstandard  # pylint: disable=import-outside-toplevel,import-error
+    return zstandard.open(path, mode) if "w" in mode else zstandard.open(path, mode, encoding="utf-8")
+
+
+# compression name: (file extension, function that opens a compressed file)
+COMPRESSIONS = {"gzip": (".gz", _open_gzip), "zstd": (".zst", _open_zstd)}
+
+
+def open_log_file(path: str):
+    """
+    Args:
+        path (str): plain, gzip or zstd log file
+
+    Returns:
+        text file object
+    """
+    for ext, open_compressed in COMPRESSIONS.values():
+        if path.endswith(ext):
+            return open_compressed(path, "rt")
+    return open(path, encoding="utf-8", errors="replace")  # pylint: disable=consider-using-with
+
+
+class RotatingCompressedFileHandler(logging.FileHandler):  # pylint: disable=too-many-instance-attributes
+    """
+    The file is rotated when it exceeds max_bytes or every interval seconds; the rotated segment is renamed
+    at once and compressed in the background, so the logging thread doesn't wait for the compression
+    """
+
+    def __init__(self,
+                 filename: str,
+                 max_bytes: int = 0,
+                 interval: float = 0,
+                 compression: str = "gzip",
+                 backup_count: int = 0,
+                 encoding: str = "utf-8"):
+        """
+        Args:
+            filename (str): active log file path
+            max_bytes (int): max size of a segment, 0 - not rotated by size
+            interval (float): seconds a segment is written, 0 - not rotated by time
+            compression (str): one of COMPRESSIONS keys; None - rotated segments are not compressed
+            backup_count (int): max number of kept rotated segments, the oldest are removed; 0 - all are kept
+            encoding (str): file encoding
+        """
+        if compression and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown log compression '{compression}', use one of {list(COMPRESSIONS)}")
+        if compression == "zstd":
+            # failing now instead of in the background thread
+            import zstandard  # pylint: disable=import-outside-toplevel,import-error,unused-import
+        super().__init__(filename, encoding=encoding)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.compression = compression
+        self.backup_count = backup_count
+        self._segment = 0
+        self._rollover_at = time.time() + interval if interval else None
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compressor")
+
+    def should_rollover(self) -> bool:
+        """
+        Returns:
+            bool, True if the active file must be rotated before the next record
+        """
+        if self._rollover_at is not None and time.time() >= self._rollover_at:
+            return True
+        return bool(self.max_bytes) and self.stream is not None and self.stream.tell() >= self.max_bytes
+
+    def emit(self, record: logging.LogRecord):
+        """
+        Args:
+            record (LogRecord): record to write; the handler lock is held by logging.Handler.handle
+        """
+        try:
+            if self.should_rollover():
+                self.rollover()
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handleError(record)
+        super().emit(record)
+
+    def rollover(self):
+        """
+        Renaming the active file to the next segment and starting a new one; the segment is compressed in the background
+        """
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        self._segment += 1
+        segment_path = f"{self.baseFilename}.{self._segment:03d}"
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, segment_path)
+            self._compressor.submit(self._compress_and_clean, segment_path)
+        if self._rollover_at is not None:
+            self._rollover_at = time.time() + self.interval
+        self.stream = self._open()
+
+    def _compress_and_clean(self, segment_path: str):
+        """
+        Args:
+            segment_path (str): rotated segment, it's replaced with the compressed one
+        """
+        try:
+            if self.compression:
+                ext, open_compressed = COMPRESSIONS[self.compression]
+                with open(segment_path, "rb") as source, open_compressed(f"{segment_path}{ext}.tmp", "wb") as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+                os.replace(f"{segment_path}{ext}.tmp", f"{segment_path}{ext}")
+                os.remove(segment_path)
+            if self.backup_count:
+                for path in self.get_segments()[:-self.backup_count]:
+                    os.remove(path)
+        except OSError as ex:
+            # reported the same way as logging.Handler.handleError does, there's no record to pass to it
+            sys.stderr.write(f"--- Log segment {segment_path} is not compressed: {ex}\n")
+
+    def get_segments(self) -> list:
+        """
+        Returns:
+            list, paths of the rotated segments (compressed or not yet) from the oldest to the newest
+        """
+        folder, name = os.path.split(self.baseFilename)
+        segments = {}
+        for file_name in os.listdir(folder or "."):
+            match = SEGMENT_PATTERN.match(file_name)
+            if match and match.group("base") == name and not file_name.endswith(".tmp"):
+                # a segment that is being compressed is listed once
+                segments.setdefault(int(match.group("number")), os.path.join(folder, file_name))
+        return [segments[number] for number in sorted(segments)]
+
+    def close(self):
+        """
+        Closing the file and waiting until the rotated segments are compressed
+        """
+        super().close()
+        self._compressor.shutdown(wait=True)
@@ -11,16 +11,24 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 
 from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+from python_pytest_selenium_web_api_test.web.src.devices import (DEVICES, apply_device_emulation, get_mobile_emulation,
+                                                                 parse_devices)
+from python_pytest_selenium_web_api_test.web.src.driver_pool import DriverPool, get_origin
+from python_pytest_selenium_web_api_test.web.src.network_policy import NetworkPolicy, NetworkReport, read_network_events
 from python_pytest_selenium_web_api_test.web.src.pages.home_page import HomePage
 from python_pytest_selenium_web_api_test.web.src.pages.search_page import SearchPage
 from python_pytest_selenium_web_api_test.web.src.pages.streamer_page import StreamerPage
 
 
 log = Logger(__name__)
+DRIVER_POOL_KEY = pytest.StashKey()
+NETWORK_REPORT_KEY = pytest.StashKey()
+# True if any collected test has the network marker
+NETWORK_MARKER_KEY = pytest.StashKey()
 
 
 @pytest.fixture(autouse=True, scope="session")
-def add_loggers() -> None:
+def add_loggers(pytestconfig) -> None:
     """
     The fixture to configure loggers
     It uses built-in pytest arguments to configure loggigng level and files
@@ -29,15 +37,45 @@ def add_loggers() -> None:
         log_level or --log-level general log level for capturing
         log_file_level or --log-file-level  level of log to be stored to a file. Usually lower than general log
         log_file or --log-file  path where logs will be saved
+        --log-queue-size, --log-queue-overflow  records are written to the file by a background thread;
+                                                all of them are written at the end of the session
+        --log-max-size, --log-rotate-interval, --log-compression  rotation of the log file, every pytest-xdist
+                                                                  worker writes its own file
+        --log-json  true - one JSON object per line with the test ID, worker ID, request ID, etc.
     """
     artifacts_folder_default = os.getenv("HOST_ARTIFACTS")
     log_level = "DEBUG"
     log_file_level = "DEBUG"
-    log_file = os.path.join(timestamped_path("pytest", "log", artifacts_folder_default))
+    # every pytest-xdist worker writes its own file, see tools/logger/merge_logs.py
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    log_file = os.path.join(timestamped_path(f"pytest-{worker}" if worker else "pytest", "log", artifacts_folder_default))
+    compression = pytestconfig.getoption("--log-compression")
+    rotation = {"max_bytes": int(float(pytestconfig.getoption("--log-max-size")) * 1024 * 1024),
+                "interval": float(pytestconfig.getoption("--log-rotate-interval")),
+                "compression": None if compression == "none" else compression}
     log.setup_cli_handler(level=log_level)
-    log.setup_filehandler(level=log_file_level, file_name=log_file)
+    log.setup_filehandler(level=log_file_level, file_name=log_file,
+                          queue_size=int(pytestconfig.getoption("--log-queue-size")),
+                          overflow=pytestconfig.getoption("--log-queue-overflow"),
+                          rotation=rotation if rotation["max_bytes"] or rotation["interval"] else None,
+                          json_lines=pytestconfig.getoption("--log-json").lower() == "true")
     log.info(f"General loglevel: '{log_level}', File: '{log_file_level}'")
     log.info(f"Test's logs will be stored: '{log_file}'")
+    yield
+    queue_stats = Logger.get_queue_stats()
+    if queue_stats is not None:
+        log.info(f"Log queue stats: {queue_stats}")
+    log.flush_queue()
+
+
+@pytest.fixture(autouse=True)
+def log_test_context(request) -> None:
+    """
+    The test ID is added to every log record of the test, see Logger.set_context
+    """
+    Logger.set_context(test_id=request.node.nodeid)
+    yield
+    Logger.set_context(test_id=None)
 
 
 @pytest.fixture(scope="session")
@@ -69,20 +107,79 @@ def pytest_addoption(parser):
     """
     Supported options
     """
+    parser.addoption("--log-queue-size", action="store", default="0",
+                     help="Max number of log records waiting to be written to the log file by a background thread, "
+                          "0 - records are written by the test thread")
+    parser.addoption("--log-queue-overflow", action="store", default="block",
+                     help="What to do when the log queue is full: block - wait, drop-debug - drop DEBUG records, "
+                          "sample - keep every 10th DEBUG record while the queue is more than half full")
+    parser.addoption("--log-max-size", action="store", default="0",
+                     help="MB after which the log file is rotated, 0 - not rotated by size")
+    parser.addoption("--log-rotate-interval", action="store", default="0",
+                     help="Seconds after which the log file is rotated, 0 - not rotated by time")
+    parser.addoption("--log-compression", action="store", default="gzip",
+                     help="Compression of the rotated log files (gzip/zstd/none), they are compressed in background")
+    parser.addoption("--log-json", action="store", default="false",
+                     help="Write the log file as JSON lines with the test ID, worker ID, request ID and duration (true/false)")
     parser.addoption("--base-url", action="store", default="https://m.twitch.tv", help="Base URL for the site")
-    parser.addoption("--device", action="store", default="Pixel 5", help="Chrome mobile emulation device name")
+    parser.addoption("--device", action="store", default="Pixel 5",
+                     help="Comma-separated Chrome mobile emulation device names, the tests are run for every device "
+                          "in the same browser, e.g. 'Pixel 5,iPhone 12 Pro'")
     parser.addoption("--headless", action="store", default="false", help="Run headless Chrome (true/false)")
     parser.addoption("--window-size", action="store", default="300,1000", help="Web browser window size")
+    parser.addoption("--driver-pool-size", action="store", default="1",
+                     help="Number of Chrome instances kept warm per pytest-xdist worker, a test leases one of them")
+    parser.addoption("--driver-max-uses", action="store", default="50",
+                     help="Number of tests after which a Chrome instance is relaunched, 0 - never")
+    parser.addoption("--driver-reset", action="store", default="true",
+                     help="Clear cookies, cache, storage and service workers after every test through CDP (true/false)")
+    parser.addoption("--network-preset", action="store", default="none",
+                     help="Blocked requests: none, lean - video, ads and analytics, strict - lean plus images and fonts")
+    parser.addoption("--network-block", action="store", default="",
+                     help="Comma-separated URL patterns blocked in addition to the preset, * is a wildcard")
+    parser.addoption("--network-block-types", action="store", default="",
+                     help="Comma-separated resource types blocked in addition to the preset (Media/Image/Font)")
+    parser.addoption("--network-throttle", action="store", default="none",
+                     help="Network throttling profile (none/4g/fast-3g/slow-3g)")
+    parser.addoption("--network-report", action="store", default="auto",
+                     help="Report the requests, transferred bytes and the blocked requests of every test (true/false), "
+                          "auto - only if --network-preset, --network-block, --network-block-types or "
+                          "--network-throttle is set or any test has the network marker")
 
 
-@pytest.fixture(scope="session")
-def driver(pytestconfig):
+def is_network_report_enabled(config) -> bool:
+    """
+    The report reads the Chrome performance log, so it's enabled only if the options block or throttle anything,
+    a collected test has the network marker (see pytest_collection_modifyitems) or --network-report is true
+
+    Returns:
+        bool
+    """
+    value = config.getoption("--network-report").lower()
+    if value != "auto":
+        return value == "true"
+    return (config.getoption("--network-preset") != "none"
+            or bool(config.getoption("--network-block"))
+            or bool(config.getoption("--network-block-types"))
+            or config.getoption("--network-throttle") != "none"
+            or config.stash.get(NETWORK_MARKER_KEY, False))
+
+
+def create_driver(config):
     """
-    Browser driver
+    Launching Chrome with the command line options; it's launched with the 1st --device,
+    the other ones are switched to through CDP
+
+    If you get "selenium.common.exceptions.InvalidArgumentException: Message:
+    invalid argument: cannot parse capability: goog:chromeOptions" error,
+    you need to provide the device metrics in web/src/devices.py
+
+    Returns:
+        WebDriver
     """
-    device = pytestconfig.getoption("--device")
-    window_size = pytestconfig.getoption("--window-size", "300,1000")
-    headless = pytestconfig.getoption("--headless").lower() == "true"
+    device = parse_devices(config.getoption("--device"))[0]
+    window_size = config.getoption("--window-size", "300,1000")
+    headless = config.getoption("--headless").lower() == "true"
 
     options = Options()
     mobile_emulation = get_mobile_emulation(device)
@@ -93,19 +190,140 @@ def driver(pytestconfig):
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument(f"--window-size={window_size}")
+    if is_network_report_enabled(config):
+        # Network events of the performance log are read by the network report
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
     _driver = webdriver.Chrome(options=options)
     _driver.set_page_load_timeout(60)
-    yield _driver
-    _driver.quit()
+    return _driver
+
+
+def get_driver_pool(config) -> DriverPool:
+    """
+    Driver pool of the session (of the pytest-xdist worker), it's created and started at the first call
+
+    Returns:
+        DriverPool
+    """
+    pool = config.stash.get(DRIVER_POOL_KEY, None)
+    if pool is None:
+        pool = DriverPool(lambda: create_driver(config),
+                          size=int(config.getoption("--driver-pool-size")),
+                          max_uses=int(config.getoption("--driver-max-uses")),
+                          reset=config.getoption("--driver-reset").lower() == "true",
+                          reset_origins=(get_origin(config.getoption("--base-url")),))
+        config.stash[DRIVER_POOL_KEY] = pool.start()
+    return pool
+
+
+def pytest_generate_tests(metafunc):
+    """
+    Every test is run for every --device, see the device argument of setup_for_testing
+    """
+    if "device" not in metafunc.fixturenames:
+        return
+    devices = parse_devices(metafunc.config.getoption("--device"))
+    unknown = [device for device in devices if device not in DEVICES]
+    if len(devices) > 1 and unknown:
+        raise pytest.UsageError(f"Devices {unknown} can't be switched through CDP, use the ones of {list(DEVICES)}")
+    metafunc.parametrize("device", devices, ids=devices)
+
+
+def pytest_configure(config):
+    """
+    Registering the markers
+    """
+    config.addinivalue_line("markers",
+                            "network(preset=None, block=(), block_types=(), throttle=None): network policy of the test, "
+                            "it overrides the --network-* options")
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Pre-warming the drivers as soon as the tests are collected if any of them uses a driver;
+    the pytest-xdist controller runs no tests, only its workers pre-warm
+
+    The network markers are looked for before, Chrome needs the performance log for the network report of them
+    """
+    config.stash[NETWORK_MARKER_KEY] = any(item.get_closest_marker("network") for item in items)
+    is_xdist_controller = not hasattr(config, "workerinput") and bool(getattr(config.option, "numprocesses", None))
+    if config.option.collectonly or is_xdist_controller:
+        return
+    if any("driver" in getattr(item, "fixturenames", ()) for item in items):
+        get_driver_pool(config)
+
+
+def pytest_sessionfinish(session):
+    """
+    Quitting the pooled drivers
+    """
+    pool = session.config.stash.get(DRIVER_POOL_KEY, None)
+    if pool is not None:
+        log.info(f"Driver pool stats: {pool.stats()}")
+        pool.close()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """
+    Reporting the driver pool usage, so time spent on launching and waiting for Chrome is visible
+    """
+    pool = config.stash.get(DRIVER_POOL_KEY, None)
+    if pool is not None:
+        terminalreporter.write_line(f"Driver pool: {pool.stats()}")
+    report = config.stash.get(NETWORK_REPORT_KEY, None)
+    if report is not None:
+        terminalreporter.write_line(f"Network: {report.stats()}")
+
+
+@pytest.fixture(scope="function")
+def driver(pytestconfig):
+    """
+    Browser driver leased from the pool for the test, it's reset when the test is finished
+    """
+    with get_driver_pool(pytestconfig).lease() as _driver:
+        yield _driver
+
+
+@pytest.fixture(scope="session")
+def network_policy(pytestconfig) -> NetworkPolicy:
+    """
+    Network policy of the --network-* options
+    """
+    return NetworkPolicy(pytestconfig.getoption("--network-preset"),
+                         block=tuple(filter(None, pytestconfig.getoption("--network-block").split(","))),
+                         block_types=tuple(filter(None, pytestconfig.getoption("--network-block-types").split(","))),
+                         throttle=pytestconfig.getoption("--network-throttle"))
+
+
+@pytest.fixture(scope="session")
+def network_report(pytestconfig):
+    """
+    Requests of all the tests, None if the report is not enabled, see is_network_report_enabled
+    """
+    if not is_network_report_enabled(pytestconfig):
+        yield None
+        return
+    report = NetworkReport()
+    pytestconfig.stash[NETWORK_REPORT_KEY] = report
+    yield report
+    log.info(f"Network report: {report.stats()}")
 
 
 # pylint: disable=redefined-outer-name
 @pytest.fixture(autouse=True, scope="function")
-def setup_for_testing(request, driver):
+def setup_for_testing(request, driver, device, network_policy, network_report):
     """
-    Setting up pages for testing
+    Setting up pages for testing; the device and the network policy are applied before the home page is opened
     """
+    if device in DEVICES:
+        # an unknown device (it can be the only one) is emulated by Chrome from the launch
+        apply_device_emulation(driver, device)
+    marker = request.node.get_closest_marker("network")
+    (network_policy.override(**marker.kwargs) if marker else network_policy).apply(driver)
+    if network_report is not None:
+        # the requests of the previous test and of the driver reset
+        read_network_events(driver)
     request.cls.driver = driver
     request.cls.home_page = HomePage(driver)
     request.cls.search_page = SearchPage(driver)
@@ -115,6 +333,9 @@ def setup_for_testing(request, driver):
     request.cls.home_page.open("https://m.twitch.tv")
     # Getting rid off the cookies overlay
     request.cls.home_page.confirm_cookies_overlay_if_shown()
+    yield
+    if network_report is not None:
+        log.info(f"Network of the test: {network_report.add_events(read_network_events(driver))}")
 
 
 @pytest.fixture(scope="session")
@@ -123,26 +344,3 @@ def base_url(pytestconfig) -> str:
     Get base URL from the fixture
     """
     return pytestconfig.getoption("--base-url").rstrip("/")
-
-
-def get_mobile_emulation(version):
-    """
-    If you get "selenium.common.exceptions.InvalidArgumentException: Message:
-    invalid argument: cannot parse capability: goog:chromeOptions" error,
-    you need to provide capability manually
-    """
-    mobile_emulation = {"deviceName": version}
-    if version == "Pixel 5":
-        mobile_emulation = {
-        "deviceMetrics": {
-            "width": 393,    # width for Pixel 5 (dp)
-            "height": 851,   # height for Pixel 5 (dp)
-            "pixelRatio": 2.75
-        },
-        "userAgent": (
-            "Mozilla/5.0 (Linux; Android 11; Pixel 5) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Mobile Safari/537.36"
-        )
-    }
-    return mobile_emulation
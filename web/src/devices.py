@@ -0,0 +1,84 @@
+"""
+Mobile devices for Chrome emulation; a device is switched on a running driver through CDP, so a device matrix
+is run in one browser instead of one launch per device
+"""
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+ANDROID_UA = ("Mozilla/5.0 (Linux; Android {android}; {model}) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/120.0.0.0 Mobile Safari/537.36")
+IOS_UA = ("Mozilla/5.0 ({model}; CPU {os} {version} like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+          "Version/{safari} Mobile/15E148 Safari/604.1")
+
+# name: CSS pixel size, device pixel ratio, user agent and navigator.platform
+DEVICES = {
+    "Pixel 5": {"width": 393, "height": 851, "pixelRatio": 2.75, "platform": "Linux armv8l",
+                "userAgent": ANDROID_UA.format(android="11", model="Pixel 5")},
+    "Pixel 7": {"width": 412, "height": 915, "pixelRatio": 2.625, "platform": "Linux armv8l",
+                "userAgent": ANDROID_UA.format(android="13", model="Pixel 7")},
+    "Samsung Galaxy S20 Ultra": {"width": 412, "height": 915, "pixelRatio": 3.5, "platform": "Linux armv8l",
+                                 "userAgent": ANDROID_UA.format(android="10", model="SM-G981B")},
+    "iPhone SE": {"width": 375, "height": 667, "pixelRatio": 2, "platform": "iPhone",
+                  "userAgent": IOS_UA.format(model="iPhone", os="iPhone OS", version="13_2_3", safari="13.0.3")},
+    "iPhone 12 Pro": {"width": 390, "height": 844, "pixelRatio": 3, "platform": "iPhone",
+                      "userAgent": IOS_UA.format(model="iPhone", os="iPhone OS", version="14_4", safari="14.0.3")},
+    "iPad Mini": {"width": 768, "height": 1024, "pixelRatio": 2, "platform": "iPad",
+                  "userAgent": IOS_UA.format(model="iPad", os="OS", version="13_3", safari="13.0.4")},
+}
+
+
+def parse_devices(value: str) -> list:
+    """
+    Args:
+        value (str): comma-separated device names, e.g. "Pixel 5, iPhone 12 Pro"
+
+    Returns:
+        list, device names without duplicates in the given order
+    """
+    devices = []
+    for name in (item.strip() for item in value.split(",")):
+        if name and name not in devices:
+            devices.append(name)
+    return devices
+
+
+def get_mobile_emulation(name: str) -> dict:
+    """
+    Args:
+        name (str): device name, a known one (see DEVICES) or any Chrome device name
+
+    Returns:
+        dict, mobileEmulation option of Chrome; unknown devices are passed by name,
+        they're emulated from the launch but can't be switched to through CDP
+    """
+    device = DEVICES.get(name)
+    if device is None:
+        return {"deviceName": name}
+    return {"deviceMetrics": {"width": device["width"], "height": device["height"], "pixelRatio": device["pixelRatio"]},
+            "userAgent": device["userAgent"]}
+
+
+def apply_device_emulation(driver, name: str) -> None:
+    """
+    Switching the emulated device of the current tab; it must be done before navigation,
+    the page that is already loaded keeps the old user agent
+
+    Args:
+        driver (WebDriver): Chrome driver
+        name (str): one of DEVICES
+    """
+    device = DEVICES.get(name)
+    if device is None:
+        raise ValueError(f"Device '{name}' can't be switched through CDP, use one of {list(DEVICES)}")
+    driver.execute_cdp_cmd("Emulation.setDeviceMetricsOverride",
+                           {"width": device["width"], "height": device["height"],
+                            "deviceScaleFactor": device["pixelRatio"], "mobile": True,
+                            "screenWidth": device["width"], "screenHeight": device["height"]})
+    driver.execute_cdp_cmd("Emulation.setUserAgentOverride",
+                           {"userAgent": device["userAgent"], "platform": device["platform"]})
+    driver.execute_cdp_cmd("Emulation.setTouchEmulationEnabled", {"enabled": True, "maxTouchPoints": 5})
+    log.debug(f"Emulated device: {name}")
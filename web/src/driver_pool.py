@@ -0,0 +1,326 @@
+"""
+Pool of pre-warmed Chrome drivers; a test leases a driver and gets it back with a clean state instead of launching
+a new Chrome. The state (cookies, cache, storage, service workers) is cleared through CDP, unhealthy drivers are
+replaced and every driver is recycled after max_uses leases.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+def get_origin(url: str):
+    """
+    Args:
+        url (str): e.g. https://m.twitch.tv/directory
+
+    Returns:
+        str, e.g. https://m.twitch.tv; None for about:blank, data: etc.
+    """
+    parts = urlsplit(url or "")
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class PooledDriver:  # pylint: disable=too-few-public-methods
+    """
+    Driver of the pool with its usage
+    """
+
+    def __init__(self, driver, number: int):
+        """
+        Args:
+            driver (WebDriver): Chrome driver
+            number (int): number of the driver in the session, for the logs
+        """
+        self.driver = driver
+        self.number = number
+        self.uses = 0
+        # origins the driver visited, their storage is cleared on reset
+        self.origins = set()
+
+
+class DriverPool:  # pylint: disable=too-many-instance-attributes
+    """
+    Keeps size Chrome drivers warm; they're launched in the background as soon as the pool is started
+    """
+
+    def __init__(self,
+                 factory,
+                 size: int = 1,
+                 max_uses: int = 0,
+                 reset: bool = True,
+                 reset_origins: tuple = (),
+                 lease_timeout: float = 120):
+        """
+        Args:
+            factory (callable): returns a new driver, e.g. lambda: webdriver.Chrome(options=options)
+            size (int): number of drivers kept warm
+            max_uses (int): number of leases after which a driver is quit and replaced with a new one; 0 - no limit
+            reset (bool): True - cookies, cache, storage and service workers are cleared when a driver is returned
+            reset_origins (tuple): origins whose storage is always cleared, e.g. ("https://m.twitch.tv",);
+                                   the origins of the visited pages are cleared too
+            lease_timeout (float): max seconds to wait for a free driver
+        """
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.reset = reset
+        self.reset_origins = tuple(reset_origins)
+        self.lease_timeout = lease_timeout
+        self._idle = queue.Queue()
+        self._launcher = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="driver-launcher")
+        self._lock = threading.Lock()
+        self._all = set()
+        self._launched = 0
+        self._pending_launches = 0
+        # error of the last failed launch; it's raised by acquire() while no driver is alive or being launched
+        self._launch_error = None
+        self._closed = False
+        self._stats = {"launched": 0, "launch_failed": 0, "leases": 0, "resets": 0, "reset_failed": 0,
+                       "recycled": 0, "unhealthy": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0,
+                       "lease_ms_total": 0.0, "lease_ms_max": 0.0, "reset_ms_total": 0.0, "launch_ms_total": 0.0}
+
+    def _add_stat(self, name: str, value: float = 1, max_name: str = None):
+        with self._lock:
+            self._stats[name] += value
+            if max_name:
+                self._stats[max_name] = max(self._stats[max_name], value)
+
+    def start(self):
+        """
+        Launching all the drivers in the background, a lease waits only for the first free one
+
+        Returns:
+            DriverPool, self
+        """
+        for _ in range(self.size):
+            self._submit_launch()
+        return self
+
+    def _submit_launch(self):
+        """
+        Launching a new driver in the background; the caller holds the lock or the pool is not shared yet
+        """
+        self._pending_launches += 1
+        self._launcher.submit(self._launch)
+
+    def _launch(self):
+        """
+        Launching a new driver and putting it to the idle ones
+        """
+        started = time.perf_counter()
+        try:
+            driver = self.factory()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            with self._lock:
+                self._pending_launches -= 1
+                self._launch_error = ex
+            self._add_stat("launch_failed")
+            log.error(f"Failed to launch a pooled driver: {ex}")
+            # wakes up a waiting lease, it fails at once if no driver is left instead of waiting for lease_timeout
+            self._idle.put(ex)
+            return
+        with self._lock:
+            self._pending_launches -= 1
+            self._launch_error = None
+            self._launched += 1
+            pooled = PooledDriver(driver, self._launched)
+            self._all.add(pooled)
+            closed = self._closed
+        self._add_stat("launched")
+        self._add_stat("launch_ms_total", (time.perf_counter() - started) * 1000)
+        if closed:
+            self._quit(pooled)
+            return
+        log.debug(f"Pooled driver #{pooled.number} is launched in {time.perf_counter() - started:.1f}s")
+        self._idle.put(pooled)
+
+    def _quit(self, pooled: PooledDriver):
+        """
+        Args:
+            pooled (PooledDriver): driver to quit, errors are ignored, the browser may be gone already
+        """
+        with self._lock:
+            self._all.discard(pooled)
+        try:
+            pooled.driver.quit()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            log.debug(f"Pooled driver #{pooled.number} quit failed: {ex}")
+
+    def _replace(self, pooled: PooledDriver):
+        """
+        Args:
+            pooled (PooledDriver): driver to quit; a new one is launched in the background unless the pool is closed
+        """
+        with self._lock:
+            # the driver is not alive for acquire() anymore, even before it's quit
+            self._all.discard(pooled)
+            # close() shuts the launcher down, it doesn't take new tasks
+            if not self._closed:
+                self._launcher.submit(self._quit, pooled)
+                self._submit_launch()
+                return
+        self._quit(pooled)
+
+    @staticmethod
+    def is_healthy(pooled: PooledDriver) -> bool:
+        """
+        Args:
+            pooled (PooledDriver): driver to check
+
+        Returns:
+            bool, True if the browser answers and has a window
+        """
+        try:
+            return bool(pooled.driver.window_handles) and pooled.driver.execute_script("return 1;") == 1
+        except Exception:  # pylint: disable=broad-exception-caught
+            return False
+
+    def acquire(self) -> PooledDriver:
+        """
+        Returns:
+            PooledDriver, healthy driver; the error of the last launch if it failed and no driver is alive
+            or being launched (every lease fails fast then), TimeoutError if no driver is free for lease_timeout seconds
+        """
+        started = time.perf_counter()
+        while True:
+            remaining = self.lease_timeout - (time.perf_counter() - started)
+            try:
+                pooled = self._idle.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                raise TimeoutError(f"No pooled driver is free in {self.lease_timeout}s, pool size: {self.size}; "
+                                   f"stats: {self.stats()}") from None
+            if isinstance(pooled, Exception):
+                with self._lock:
+                    error = self._launch_error if not self._all and not self._pending_launches else None
+                if error is None:
+                    # a driver is alive or being launched, it's waited for
+                    continue
+                # for the next leases
+                self._idle.put(error)
+                raise error
+            if self.is_healthy(pooled):
+                break
+            log.warning(f"Pooled driver #{pooled.number} is not healthy, it's replaced")
+            self._add_stat("unhealthy")
+            self._replace(pooled)
+        wait_ms = (time.perf_counter() - started) * 1000
+        self._add_stat("wait_ms_total", wait_ms, "wait_ms_max")
+        self._add_stat("leases")
+        pooled.uses += 1
+        return pooled
+
+    def release(self, pooled: PooledDriver):
+        """
+        Args:
+            pooled (PooledDriver): leased driver; it's reset and returned to the idle ones or replaced if it's worn out
+        """
+        if self._closed:
+            self._quit(pooled)
+            return
+        if self.max_uses and pooled.uses >= self.max_uses:
+            log.debug(f"Pooled driver #{pooled.number} is used {pooled.uses} times, it's recycled")
+            self._add_stat("recycled")
+            self._replace(pooled)
+            return
+        if self.reset:
+            try:
+                self.reset_state(pooled)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                log.warning(f"Failed to reset pooled driver #{pooled.number}, it's replaced: {ex}")
+                self._add_stat("reset_failed")
+                self._replace(pooled)
+                return
+        self._idle.put(pooled)
+
+    def reset_state(self, pooled: PooledDriver):
+        """
+        Clearing cookies, cache and the storage of the visited origins (local/session storage, IndexedDB,
+        Cache Storage, service workers) through CDP and leaving one blank tab
+
+        Args:
+            pooled (PooledDriver): driver to reset
+        """
+        started = time.perf_counter()
+        driver = pooled.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            pooled.origins.add(get_origin(driver.current_url))
+            driver.close()
+        driver.switch_to.window(handles[0])
+        pooled.origins.add(get_origin(driver.current_url))
+        driver.get("about:blank")
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        for origin in pooled.origins.union(self.reset_origins) - {None}:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        pooled.origins.clear()
+        self._add_stat("resets")
+        self._add_stat("reset_ms_total", (time.perf_counter() - started) * 1000)
+
+    @contextmanager
+    def lease(self):
+        """
+        Yields:
+            WebDriver, it's reset and returned to the pool on exit
+        """
+        pooled = self.acquire()
+        started = time.perf_counter()
+        try:
+            yield pooled.driver
+        finally:
+            self._add_stat("lease_ms_total", (time.perf_counter() - started) * 1000, "lease_ms_max")
+            self.release(pooled)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict, e.g. {"launched": 2, "leases": 10, "recycled": 1, "unhealthy": 0, "wait_ms_avg": 5.1, ...};
+            wait - time a lease waited for a free driver, lease - time a driver was used by a test
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        leases = stats["leases"] or 1
+        return {"size": self.size,
+                "launched": stats["launched"],
+                "launch_failed": stats["launch_failed"],
+                "leases": stats["leases"],
+                "resets": stats["resets"],
+                "reset_failed": stats["reset_failed"],
+                "recycled": stats["recycled"],
+                "unhealthy": stats["unhealthy"],
+                "launch_ms_avg": round(stats["launch_ms_total"] / (stats["launched"] or 1), 1),
+                "wait_ms_avg": round(stats["wait_ms_total"] / leases, 1),
+                "wait_ms_max": round(stats["wait_ms_max"], 1),
+                "lease_ms_avg": round(stats["lease_ms_total"] / leases, 1),
+                "lease_ms_max": round(stats["lease_ms_max"], 1),
+                "reset_ms_avg": round(stats["reset_ms_total"] / (stats["resets"] or 1), 1)}
+
+    def close(self):
+        """
+        Quitting all the drivers, including the ones that are being launched
+        """
+        with self._lock:
+            self._closed = True
+        self._launcher.shutdown(wait=True)
+        with self._lock:
+            drivers = list(self._all)
+        for pooled in drivers:
+            self._quit(pooled)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
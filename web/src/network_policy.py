@@ -0,0 +1,211 @@
+"""
+Network policy of the web tests: URL patterns and resource types that are blocked and throttling, applied to
+the driver through CDP; the requests of a test are read from the Chrome performance log to report what was blocked
+and how much was saved
+
+Chromedriver doesn't pass CDP events to execute_cdp_cmd, so the resource types are blocked by the URL patterns
+of their file extensions (Network.setBlockedURLs) instead of intercepting every request with the Fetch domain.
+"""
+
+import json
+import threading
+
+from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
+
+
+log = Logger(__name__)
+
+
+ADS_PATTERNS = ("*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*", "*amazon-adsystem.com*",
+                "*imasdk.googleapis.com*", "*adsrvr.org*")
+ANALYTICS_PATTERNS = ("*google-analytics.com*", "*googletagmanager.com*", "*scorecardresearch.com*",
+                      "*spade.twitch.tv*", "*countess.twitch.tv*", "*sentry.io*")
+# HLS playlists and segments of the Twitch player
+VIDEO_PATTERNS = ("*usher.ttvnw.net*", "*.hls.ttvnw.net/*", "*.m3u8", "*.m3u8?*")
+
+# resource type: URL patterns of its files
+RESOURCE_TYPE_PATTERNS = {
+    "Media": ("*.mp4", "*.mp4?*", "*.webm", "*.webm?*", "*.ts", "*.ts?*", "*.m4s", "*.m4s?*", "*.mp3", "*.mp3?*"),
+    "Image": ("*.png", "*.png?*", "*.jpg", "*.jpg?*", "*.jpeg", "*.jpeg?*", "*.gif", "*.gif?*", "*.webp", "*.webp?*",
+              "*.avif", "*.avif?*", "*.svg", "*.svg?*"),
+    "Font": ("*.woff", "*.woff?*", "*.woff2", "*.woff2?*", "*.ttf", "*.ttf?*", "*.otf", "*.otf?*"),
+}
+
+# preset: (blocked URL patterns, blocked resource types)
+PRESETS = {
+    "none": ((), ()),
+    # what the assertions never look at: video, ads and analytics
+    "lean": (ADS_PATTERNS + ANALYTICS_PATTERNS + VIDEO_PATTERNS, ("Media",)),
+    # lean plus images and fonts, the pages are checked by their structure only
+    "strict": (ADS_PATTERNS + ANALYTICS_PATTERNS + VIDEO_PATTERNS, ("Media", "Image", "Font")),
+}
+
+# profile: Network.emulateNetworkConditions parameters, throughput in bytes per second
+THROTTLING_PROFILES = {
+    "none": None,
+    "4g": {"latency": 60, "downloadThroughput": 9 * 1024 * 1024 / 8, "uploadThroughput": 1.5 * 1024 * 1024 / 8},
+    "fast-3g": {"latency": 562.5, "downloadThroughput": 1.6 * 1024 * 1024 / 8, "uploadThroughput": 750 * 1024 / 8},
+    "slow-3g": {"latency": 2000, "downloadThroughput": 500 * 1024 / 8, "uploadThroughput": 500 * 1024 / 8},
+}
+
+
+class NetworkPolicy:
+    """
+    Blocked URL patterns, blocked resource types and the throttling profile
+    """
+
+    def __init__(self, preset: str = "none", block: tuple = (), block_types: tuple = (), throttle: str = "none"):
+        """
+        Args:
+            preset (str): one of PRESETS
+            block (tuple): URL patterns blocked in addition to the preset ones, * is a wildcard, e.g. "*.twitchcdn.net/*"
+            block_types (tuple): resource types blocked in addition to the preset ones, keys of RESOURCE_TYPE_PATTERNS
+            throttle (str): one of THROTTLING_PROFILES
+        """
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown network preset '{preset}', use one of {list(PRESETS)}")
+        if throttle not in THROTTLING_PROFILES:
+            raise ValueError(f"Unknown throttling profile '{throttle}', use one of {list(THROTTLING_PROFILES)}")
+        unknown_types = set(block_types) - set(RESOURCE_TYPE_PATTERNS)
+        if unknown_types:
+            raise ValueError(f"Unknown resource types {sorted(unknown_types)}, use {list(RESOURCE_TYPE_PATTERNS)}")
+        self.preset = preset
+        self.block = tuple(block)
+        self.block_types = tuple(block_types)
+        self.throttle = throttle
+
+    def override(self, preset: str = None, block: tuple = (), block_types: tuple = (), throttle: str = None):
+        """
+        Args:
+            preset (str): replaces the preset, None - the same
+            block (tuple): URL patterns that are blocked in addition
+            block_types (tuple): resource types that are blocked in addition
+            throttle (str): replaces the throttling profile, None - the same
+
+        Returns:
+            NetworkPolicy, new policy, e.g. for the network marker of a test
+        """
+        return NetworkPolicy(preset or self.preset,
+                             self.block + tuple(block),
+                             self.block_types + tuple(block_types),
+                             throttle or self.throttle)
+
+    def get_blocked_urls(self) -> list:
+        """
+        Returns:
+            list, URL patterns for Network.setBlockedURLs without duplicates
+        """
+        preset_patterns, preset_types = PRESETS[self.preset]
+        patterns = list(preset_patterns) + list(self.block)
+        for resource_type in preset_types + self.block_types:
+            patterns.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+        return list(dict.fromkeys(patterns))
+
+    def apply(self, driver) -> None:
+        """
+        Applying the policy to the current tab, it must be done before navigation; the previous policy is replaced
+
+        Args:
+            driver (WebDriver): Chrome driver
+        """
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.get_blocked_urls()})
+        conditions = THROTTLING_PROFILES[self.throttle] or {"latency": 0, "downloadThroughput": -1, "uploadThroughput": -1}
+        driver.execute_cdp_cmd("Network.emulateNetworkConditions", {"offline": False, **conditions})
+        log.debug(f"Network policy: {self}")
+
+    def __repr__(self):
+        return (f"NetworkPolicy(preset={self.preset!r}, block={self.block!r}, block_types={self.block_types!r}, "
+                f"throttle={self.throttle!r})")
+
+
+def read_network_events(driver) -> list:
+    """
+    Reading (and clearing) the Network events of the Chrome performance log,
+    it's enabled by the goog:loggingPrefs capability {"performance": "ALL"}
+
+    Args:
+        driver (WebDriver): Chrome driver
+
+    Returns:
+        list, [(method, params), ...], e.g. ("Network.loadingFinished", {"requestId": "1.2", "encodedDataLength": 100})
+    """
+    events = []
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        if message["method"].startswith("Network."):
+            events.append((message["method"], message["params"]))
+    return events
+
+
+class NetworkReport:
+    """
+    Requests and bytes of the tests; the bytes a blocked request would take are estimated by the average
+    transferred size of the loaded requests of the same resource type in the session
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # resource type: [loaded requests, transferred bytes]
+        self._loaded_by_type = {}
+        self._blocked_by_type = {}
+
+    def add_events(self, events: list) -> dict:
+        """
+        Args:
+            events (list): network events of one test, see read_network_events
+
+        Returns:
+            dict, e.g. {"requests": 120, "transferred_bytes": 3500000, "blocked_requests": 40,
+                        "blocked_by_type": {"XHR": 30, "Image": 10}}
+        """
+        types = {}
+        summary = {"requests": 0, "transferred_bytes": 0, "blocked_requests": 0, "blocked_by_type": {}}
+        loaded_by_type = {}
+        for method, params in events:
+            if method == "Network.requestWillBeSent":
+                types[params["requestId"]] = params.get("type", "Other")
+            elif method == "Network.loadingFinished":
+                resource_type = types.get(params["requestId"], "Other")
+                counts = loaded_by_type.setdefault(resource_type, [0, 0])
+                counts[0] += 1
+                counts[1] += int(params.get("encodedDataLength", 0))
+                summary["requests"] += 1
+                summary["transferred_bytes"] += int(params.get("encodedDataLength", 0))
+            elif method == "Network.loadingFailed" and params.get("blockedReason") == "inspector":
+                # blocked by Network.setBlockedURLs
+                resource_type = params.get("type") or types.get(params["requestId"], "Other")
+                summary["blocked_requests"] += 1
+                summary["blocked_by_type"][resource_type] = summary["blocked_by_type"].get(resource_type, 0) + 1
+        with self._lock:
+            for resource_type, (requests, size) in loaded_by_type.items():
+                counts = self._loaded_by_type.setdefault(resource_type, [0, 0])
+                counts[0] += requests
+                counts[1] += size
+            for resource_type, requests in summary["blocked_by_type"].items():
+                self._blocked_by_type[resource_type] = self._blocked_by_type.get(resource_type, 0) + requests
+        return summary
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict, e.g. {"requests": 500, "transferred_bytes": 12000000, "blocked_requests": 150,
+                        "saved_bytes_estimate": 30000000, "blocked_without_estimate": 20, "blocked_by_type": {...}};
+            blocked_without_estimate - blocked requests of the types no request of which was loaded
+        """
+        with self._lock:
+            loaded_by_type = {key: list(value) for key, value in self._loaded_by_type.items()}
+            blocked_by_type = dict(self._blocked_by_type)
+        saved_bytes, without_estimate = 0, 0
+        for resource_type, requests in blocked_by_type.items():
+            loaded, size = loaded_by_type.get(resource_type, (0, 0))
+            if loaded:
+                saved_bytes += requests * size // loaded
+            else:
+                without_estimate += requests
+        return {"requests": sum(loaded for loaded, _ in loaded_by_type.values()),
+                "transferred_bytes": sum(size for _, size in loaded_by_type.values()),
+                "blocked_requests": sum(blocked_by_type.values()),
+                "saved_bytes_estimate": saved_bytes,
+                "blocked_without_estimate": without_estimate,
+                "blocked_by_type": blocked_by_type}
@@ -4,6 +4,7 @@ Base methods for derived pages
 
 import time
 
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver import ActionChains
@@ -15,7 +16,98 @@ from python_pytest_selenium_web_api_test.tools.logger.logger import Logger
 log = Logger(__name__)
 
 
-class BasePage:
+# Scrolls by arguments[0], arguments[1] (if not null) and calls back when scrolling is settled:
+# the scroll position is stable for arguments[3] animation frames (or the scrollend event fired) and no nodes
+# were added/removed for arguments[2] ms (lazy loaded content landed), or arguments[4] ms passed
+SCROLL_SETTLE_JS = """
+const x = arguments[0], y = arguments[1], quietMs = arguments[2], stableFrames = arguments[3], timeoutMs = arguments[4];
+const done = arguments[arguments.length - 1];
+const started = performance.now();
+let lastMutation = started, lastX = window.scrollX, lastY = window.scrollY, frames = 0, scrollEnded = false, finished = false;
+const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+observer.observe(document.documentElement, {childList: true, subtree: true});
+const onScrollEnd = () => { scrollEnded = true; };
+window.addEventListener('scrollend', onScrollEnd);
+const ceiling = setTimeout(() => finish('timeout'), timeoutMs);
+
+function finish(reason) {
+  if (finished) return;
+  finished = true;
+  clearTimeout(ceiling);
+  observer.disconnect();
+  window.removeEventListener('scrollend', onScrollEnd);
+  done({reason: reason, elapsed_ms: performance.now() - started, scroll_y: window.scrollY});
+}
+
+function check() {
+  if (finished) return;
+  const now = performance.now();
+  if (window.scrollX !== lastX || window.scrollY !== lastY) {
+    lastX = window.scrollX;
+    lastY = window.scrollY;
+    frames = 0;
+  } else {
+    frames++;
+  }
+  const scrollSettled = scrollEnded || frames >= stableFrames;
+  if (scrollSettled && now - lastMutation >= quietMs) {
+    finish(scrollEnded ? 'scrollend' : 'stable');
+    return;
+  }
+  requestAnimationFrame(check);
+}
+
+if (x !== null && y !== null) window.scrollBy(x, y);
+requestAnimationFrame(check);
+"""
+
+# Finds the elements of all the locators arguments[0] ([[by, value], ...], by - css/xpath) matching
+# the condition arguments[1] (present/visible/clickable) in one call; returns [[locator index, element], ...]
+# in the locators order, only the first match if arguments[2] is true; invalid selectors are skipped
+FIND_ANY_JS = """
+const locators = arguments[0], condition = arguments[1], firstOnly = arguments[2];
+function query(by, value) {
+  if (by === 'xpath') {
+    const snap = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const els = [];
+    for (let i = 0; i < snap.snapshotLength; i++) els.push(snap.snapshotItem(i));
+    return els;
+  }
+  return Array.from(document.querySelectorAll(value));
+}
+function visible(el) {
+  const styles = window.getComputedStyle(el);
+  if (styles.display === 'none' || styles.visibility === 'hidden' || parseFloat(styles.opacity) === 0) return false;
+  const r = el.getBoundingClientRect();
+  return r.width > 0 && r.height > 0;
+}
+function matches(el) {
+  if (condition === 'present') return true;
+  if (!visible(el)) return false;
+  return condition !== 'clickable' || !(el.disabled || el.getAttribute('aria-disabled') === 'true');
+}
+const found = [];
+for (let i = 0; i < locators.length; i++) {
+  let els;
+  try {
+    els = query(locators[i][0], locators[i][1]);
+  } catch (e) {
+    continue;
+  }
+  const el = els.find(matches);
+  if (el) {
+    found.push([i, el]);
+    if (firstOnly) break;
+  }
+}
+return found;
+"""
+
+# locator strategies that are converted to CSS for FIND_ANY_JS
+CSS_BY_STRATEGY = {By.ID: '[id="{}"]', By.NAME: '[name="{}"]', By.CLASS_NAME: ".{}", By.TAG_NAME: "{}"}
+
+
+class BasePage:  # pylint: disable=too-many-public-methods
     """
     Base methods for derived pages
     """
@@ -28,7 +120,8 @@ class BasePage:
         Args:
             timeout (int/float): time in seconds to wait
         """
-        log.info(f"{reason}; timeout: {timeout}")
+        # a blind sleep, it's logged as a warning to find the ones that can be replaced with waiting for a condition
+        log.warning(f"{reason}; blind pause: {timeout}")
         time.sleep(timeout)
 
     def web_driver_wait(self, timeout: int = 5):
@@ -78,6 +171,83 @@ class BasePage:
         """
         return self.web_driver_wait(timeout).until(EC.element_to_be_clickable(locator))
 
+    def find_any(self, locators: list, condition: str = "visible", first_only: bool = True) -> list:
+        """
+        Checking all the locators in one browser round-trip
+
+        Args:
+            locators (list): e.g. [(By.CSS_SELECTOR, "video"), (By.XPATH, "//h1")]
+            condition (str): present/visible/clickable
+            first_only (bool): True - stop at the first matching locator
+
+        Returns:
+            list, [(locator, WebElement), ...] in the locators order, one element per locator
+        """
+        if condition not in ("present", "visible", "clickable"):
+            raise ValueError(f"Unknown condition '{condition}', use present/visible/clickable")
+        js_locators = []
+        for by, value in locators:
+            if by in CSS_BY_STRATEGY:
+                js_locators.append(["css", CSS_BY_STRATEGY[by].format(value)])
+            elif by in (By.CSS_SELECTOR, By.XPATH):
+                js_locators.append(["xpath" if by == By.XPATH else "css", value])
+            else:
+                raise ValueError(f"Locator strategy '{by}' is not supported by this helper.")
+        found = self.driver.execute_script(FIND_ANY_JS, js_locators, condition, first_only)
+        return [(locators[index], web_element) for index, web_element in found]
+
+    def wait_any(self, locators: list, condition: str = "visible", timeout: float = 5, poll_frequency: float = 0.25):
+        """
+        Waiting until any of the locators matches the condition; every poll is one execute_script for all of them
+
+        Args:
+            locators (list): candidates, the earlier ones win if several match in the same poll
+            condition (str): present/visible/clickable
+            timeout (float): max seconds to wait; 0 - check once
+            poll_frequency (float): seconds between the checks
+
+        Returns:
+            tuple, (matched locator, WebElement); TimeoutException if none matched
+        """
+        if not timeout:
+            found = self.find_any(locators, condition)
+            if not found:
+                raise TimeoutException(f"None of {locators} is {condition}")
+            return found[0]
+        return WebDriverWait(self.driver, timeout, poll_frequency).until(
+            lambda _: next(iter(self.find_any(locators, condition)), False),
+            f"None of {locators} is {condition} in {timeout}s")
+
+    def dismiss_present(self, locators: list, timeout: float = 0) -> list:
+        """
+        Clicking every popup close/accept button that is shown, costs one poll if nothing is shown
+
+        Args:
+            locators (list): close/accept buttons of the possible popups
+            timeout (float): seconds to wait for any of them to appear; 0 - check once
+
+        Returns:
+            list, locators of the clicked buttons
+        """
+        try:
+            self.wait_any(locators, "clickable", timeout)
+        except TimeoutException:
+            return []
+        clicked = []
+        for locator, web_element in self.find_any(locators, "clickable", first_only=False):
+            try:
+                web_element.click()
+            except Exception:
+                # e.g. covered by another popup or removed after the previous one is closed
+                try:
+                    self.driver.execute_script("arguments[0].click();", web_element)
+                except Exception as ex:
+                    log.debug(f"Popup button {locator} is not clicked: {ex}")
+                    continue
+            clicked.append(locator)
+        log.debug(f"Dismissed popups: {clicked}")
+        return clicked
+
     def click(self, locator) -> None:
         """
         Regular click
@@ -111,10 +281,52 @@ class BasePage:
         When you need to scroll particular number of times
         """
         for _ in range(times):
-            self.scroll_by(x, y)
-            self.pause(1)
+            self.scroll_by_and_settle(x, y)
         self.blur_active_element()
 
+    def wait_scroll_settled(self,
+                            x: int = None,
+                            y: int = None,
+                            quiet_period: float = 0.3,
+                            stable_frames: int = 3,
+                            timeout: float = 5) -> dict:
+        """
+        Waiting in the browser (one round-trip) until scrolling is finished and lazy loaded content is rendered,
+        instead of sleeping for a fixed time
+
+        Args:
+            x (int): scroll by x pixels before waiting, None - just wait
+            y (int): scroll by y pixels before waiting, None - just wait
+            quiet_period (float): seconds without added/removed DOM nodes after the scroll position settled
+            stable_frames (int): number of animation frames the scroll position must stay the same
+                                 (if the browser doesn't fire the scrollend event)
+            timeout (float): max seconds to wait, it must be less than the driver script timeout
+
+        Returns:
+            dict, e.g. {"reason": "stable", "elapsed_ms": 350.1, "scroll_y": 1400}; reason - scrollend/stable/timeout;
+            None if the script failed
+        """
+        try:
+            result = self.driver.execute_async_script(
+                SCROLL_SETTLE_JS, x, y, int(quiet_period * 1000), int(stable_frames), int(timeout * 1000))
+        except Exception as ex:
+            log.warning(f"Failed to wait for the scroll to settle: {ex}")
+            return None
+        if result["reason"] == "timeout":
+            log.warning(f"Scroll is not settled in {timeout}s, the page keeps changing")
+        else:
+            log.debug("Scroll settled (%s) in %.0f ms", result["reason"], result["elapsed_ms"])
+        return result
+
+    def scroll_by_and_settle(self, x: int = 0, y: int = 700, **kwargs) -> dict:
+        """
+        Scroll the page and wait until scrolling is settled, see wait_scroll_settled for kwargs
+
+        Returns:
+            dict, see wait_scroll_settled
+        """
+        return self.wait_scroll_settled(x, y, **kwargs)
+
     def scroll_into_center(self, locator) -> None:
         """
         Scroll into center
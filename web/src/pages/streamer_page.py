@@ -20,7 +20,7 @@ class StreamerPage(BasePage):
         (By.CSS_SELECTOR, "button[aria-label='Close'], button[aria-label='Dismiss']"),
         (By.CSS_SELECTOR, "button:has(svg[aria-label='Close'])"),
         (By.CSS_SELECTOR, "button[data-a-target='consent-banner-accept'], button[aria-label*='Accept']"),
-        (By.CSS_SELECTOR, "button:contains('Continue'), a:contains('Continue')")
+        (By.XPATH, "//button[contains(., 'Continue')] | //a[contains(., 'Continue')]")
     ]
 
     VIDEO_PLAYER = (By.CSS_SELECTOR, "video, div[data-a-target='video-player'], div[class*='player']")
@@ -30,11 +30,8 @@ class StreamerPage(BasePage):
         """
         Make sure the video/player is visible
         """
-        # Try to close any modal/popups if they appear
-        for loc in self.DISMISS_SELECTORS:
-            self.maybe_click(loc)
+        # Close the modals/popups that are shown, one check if there are none
+        self.dismiss_present(self.DISMISS_SELECTORS)
         # Wait for either a video/player container or channel header to be visible
-        try:
-            return self.wait_visible(self.VIDEO_PLAYER)
-        except Exception:
-            return self.wait_visible(self.CHANNEL_HEADER)
+        _, web_element = self.wait_any([self.VIDEO_PLAYER, self.CHANNEL_HEADER], "visible", timeout=10)
+        return web_element
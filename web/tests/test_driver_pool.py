@@ -0,0 +1,202 @@
+"""
+Driver pool tests, fake drivers are used instead of Chrome
+"""
+
+import threading
+import time
+
+import pytest
+
+from python_pytest_selenium_web_api_test.web.src.driver_pool import DriverPool
+
+
+class FakeDriver:
+    """
+    Driver that answers like a healthy Chrome with one blank tab
+    """
+
+    def __init__(self):
+        self.healthy = True
+        self.quit_calls = 0
+        self.window_handles = ["tab-1"]
+        self.current_url = "about:blank"
+        self.cdp_commands = []
+
+    def execute_script(self, script):
+        """
+        Raises an error if the driver is not healthy
+        """
+        if not self.healthy:
+            raise RuntimeError("chrome not reachable")
+        return 1 if script == "return 1;" else None
+
+    def execute_cdp_cmd(self, cmd, params):
+        """
+        Recording the CDP command
+        """
+        self.cdp_commands.append((cmd, params))
+
+    def get(self, url):
+        """
+        Opening the URL
+        """
+        self.current_url = url
+
+    @property
+    def switch_to(self):
+        """
+        The driver switches windows itself
+        """
+        return self
+
+    def window(self, handle):
+        """
+        Switching to the tab
+        """
+        assert handle in self.window_handles
+
+    def quit(self):
+        """
+        Counting the quits
+        """
+        self.quit_calls += 1
+
+
+class FakeFactory:
+    """
+    Returns FakeDriver, fails while failing is set or for the first failures calls
+    """
+
+    def __init__(self, failing: bool = False, failures: int = 0):
+        self.failing = failing
+        self.failures = failures
+        self.drivers = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self.failing or self.failures:
+                self.failures = max(0, self.failures - 1)
+                raise RuntimeError("session not created")
+            driver = FakeDriver()
+            self.drivers.append(driver)
+        return driver
+
+
+# pylint: disable=redefined-outer-name
+@pytest.fixture(autouse=True)
+def setup_for_testing():
+    """
+    Overrides the one of conftest.py, no Chrome is launched for the pool tests
+    """
+    yield
+
+
+def wait_for(condition, timeout: float = 5):
+    """
+    Args:
+        condition (callable): returns True when the background work of the pool is done
+        timeout (float): max seconds to wait
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition is not met in time"
+        time.sleep(0.01)
+
+
+def test_launch_failure_fails_every_lease_fast():
+    """
+    The launch error is raised by every lease while no driver is alive, they don't wait for lease_timeout
+    """
+    with DriverPool(FakeFactory(failing=True), size=2, lease_timeout=30) as pool:
+        for _ in range(3):
+            started = time.perf_counter()
+            with pytest.raises(RuntimeError, match="session not created"):
+                pool.acquire()
+            assert time.perf_counter() - started < 5
+        assert pool.stats()["launch_failed"] == 2
+
+
+def test_launch_failure_with_alive_driver_is_skipped():
+    """
+    A failed launch doesn't fail a lease while another driver is alive or being launched
+    """
+    factory = FakeFactory(failures=1)
+    with DriverPool(factory, size=2, lease_timeout=5) as pool:
+        for _ in range(3):
+            with pool.lease() as driver:
+                assert driver is factory.drivers[0]
+
+
+def test_relaunch_failure_fails_lease_fast():
+    """
+    The relaunch error of a worn out driver is raised by the next leases if no driver is left
+    """
+    factory = FakeFactory()
+    with DriverPool(factory, size=1, max_uses=1, lease_timeout=30) as pool:
+        pooled = pool.acquire()
+        factory.failing = True
+        pool.release(pooled)
+        for _ in range(2):
+            started = time.perf_counter()
+            with pytest.raises(RuntimeError, match="session not created"):
+                pool.acquire()
+            assert time.perf_counter() - started < 5
+
+
+def test_worn_out_driver_is_recycled():
+    """
+    A driver is quit and replaced after max_uses leases
+    """
+    factory = FakeFactory()
+    with DriverPool(factory, size=1, max_uses=2, lease_timeout=5) as pool:
+        for _ in range(2):
+            with pool.lease() as driver:
+                assert driver is factory.drivers[0]
+        with pool.lease() as driver:
+            assert driver is factory.drivers[1]
+        wait_for(lambda: factory.drivers[0].quit_calls == 1)
+        assert pool.stats()["recycled"] == 1
+
+
+def test_unhealthy_driver_is_replaced():
+    """
+    An unhealthy driver is quit and a new one is leased instead
+    """
+    factory = FakeFactory()
+    with DriverPool(factory, size=1, lease_timeout=5) as pool:
+        with pool.lease():
+            pass
+        factory.drivers[0].healthy = False
+        with pool.lease() as driver:
+            assert driver is factory.drivers[1]
+        wait_for(lambda: factory.drivers[0].quit_calls == 1)
+        assert pool.stats()["unhealthy"] == 1
+
+
+def test_released_driver_is_reset():
+    """
+    Cookies, cache and the storage of the reset origins are cleared when a driver is returned
+    """
+    factory = FakeFactory()
+    with DriverPool(factory, size=1, reset_origins=("https://m.twitch.tv",), lease_timeout=5) as pool:
+        with pool.lease() as driver:
+            driver.current_url = "https://m.twitch.tv/directory"
+        commands = [cmd for cmd, _ in factory.drivers[0].cdp_commands]
+        assert commands == ["Network.clearBrowserCookies", "Network.clearBrowserCache", "Storage.clearDataForOrigin"]
+        assert factory.drivers[0].current_url == "about:blank"
+
+
+def test_close_quits_all_drivers():
+    """
+    close() quits the idle and the leased drivers, a driver returned after it is quit too
+    """
+    factory = FakeFactory()
+    pool = DriverPool(factory, size=2, lease_timeout=5).start()
+    pooled = pool.acquire()
+    wait_for(lambda: len(factory.drivers) == 2)
+    pool.close()
+    assert [driver.quit_calls for driver in factory.drivers] == [1, 1]
+    pool.release(pooled)
+    assert pooled.driver.quit_calls == 2
+    assert len(factory.drivers) == 2